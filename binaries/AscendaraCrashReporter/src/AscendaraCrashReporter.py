@@ -21,8 +21,15 @@ import sys
 import os
 import webbrowser
 import json
+import threading
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from AscendaraCrash import (crash_dir, crash_endpoint, load_records, mark_records, prune_records,
+                            reporter_lock, spool_crash, upload_pending)
+
+SPOOL_POLL_MS = 2000  # how often an open reporter looks for crashes spooled after it started
+
 class AscendaraTool:
     GOFILE_HELPER = "gofilehelper"
     MAIN_DOWNLOADER = "maindownloader"
@@ -567,6 +574,44 @@ class CrashReporter:
         )
         close_button.grid(row=0, column=2, padx=(10, 0))
     
+    def set_records(self, records):
+        """Show spooled crash records, the most recent one as the main error"""
+        self.records = {record["fingerprint"]: record for record in records}
+        latest = records[0]
+        self.set_error(latest["tool"], latest["errorCode"], self._details_text(records))
+        mark_records(self.records, shown=True)
+        self.root.after(SPOOL_POLL_MS, self.refresh_records)
+
+    @staticmethod
+    def _details_text(records):
+        latest = records[0]
+        text = latest["message"]
+        if latest.get("count", 1) > 1:
+            text += f"\n\n(This error happened {latest['count']} times)"
+        if len(records) > 1:
+            text += "\n\nOther errors:"
+            for record in records[1:]:
+                first_line = (record["message"].splitlines() or [""])[0][:120]
+                text += (f"\n• {AscendaraTool.get_tool_name(record['tool'])} ({record['errorCode']}) "
+                         f"x{record.get('count', 1)}: {first_line}")
+        return text
+
+    def refresh_records(self):
+        """Add crashes spooled while this window is open instead of opening another one"""
+        try:
+            new_records = load_records(pending_only=True)
+            if new_records:
+                for record in new_records:
+                    self.records[record["fingerprint"]] = record
+                mark_records([record["fingerprint"] for record in new_records], shown=True)
+                records = sorted(self.records.values(), key=lambda record: record.get("lastSeen", 0), reverse=True)
+                details = self.critical_error_details if self.critical_frame.winfo_ismapped() else self.error_details
+                details.delete(1.0, tk.END)
+                details.insert(tk.END, self._details_text(records))
+        except Exception:
+            pass
+        self.root.after(SPOOL_POLL_MS, self.refresh_records)
+
     def set_error(self, tool_id, error_code, error_message):
         tool_name = AscendaraTool.get_tool_name(tool_id)
         error_desc = ErrorCodes.get_error_description(error_code)
@@ -624,33 +669,64 @@ class CrashReporter:
 
     
     def upload_crash_report(self):
+        if not crash_endpoint():
+            messagebox.showinfo(
+                "Crash Report",
+                f"No crash report endpoint is configured.\nThe crash report has been saved to:\n{crash_dir()}"
+            )
+            return
+        # Upload every pending record in one batch on a thread, retries back off for seconds
+        self.upload_result = None
+        threading.Thread(target=self._upload, daemon=True).start()
+        self.root.after(200, self._check_upload)
+
+    def _upload(self):
         try:
-            # In a real implementation, this would send the crash_data to a server
+            self.upload_result = ("uploaded", upload_pending())
+        except Exception as e:
+            self.upload_result = ("error", str(e))
+
+    def _check_upload(self):
+        if self.upload_result is None:
+            self.root.after(200, self._check_upload)
+            return
+        status, detail = self.upload_result
+        if status == "uploaded":
             messagebox.showinfo(
                 "Crash Report",
                 "Thank you for helping improve Ascendara!\nThe crash report has been uploaded successfully."
             )
-        except Exception as e:
+        else:
             messagebox.showerror(
                 "Error",
-                "Failed to upload crash report. Please try again later."
+                f"Failed to upload crash report. Please try again later.\n\n{detail}"
             )
     
     def run(self):
         self.root.mainloop()
 
 def main():
-    if len(sys.argv) < 4:
-        sys.exit(1)
-        
     try:
-        tool_id = sys.argv[1].lower()
-        error_code = int(sys.argv[2])
-        error_message = sys.argv[3]
-        
-        reporter = CrashReporter()
-        reporter.set_error(tool_id, error_code, error_message)
-        reporter.run()
+        # The tools spool their crash and start the reporter without arguments,
+        # main.js still passes the tool, error code and message. Those are spooled
+        # without an attachment, this process's log and resources say nothing about it.
+        if len(sys.argv) >= 4:
+            spool_crash(sys.argv[1].lower(), int(sys.argv[2]), sys.argv[3], attachment={})
+
+        # Only one reporter shows the spool, a second instance leaves it to the first
+        lock = reporter_lock()
+        if not lock.try_acquire():
+            return
+        try:
+            records = load_records(pending_only=True)
+            if not records:
+                return
+            reporter = CrashReporter()
+            reporter.set_records(records)
+            reporter.run()
+        finally:
+            lock.release()
+            prune_records()
     except Exception as e:
         print(f"Failed to start crash reporter: {str(e)}")
         sys.exit(1)
@@ -15,6 +15,7 @@
 
 
 
+import io
 import os
 import json
 import ssl
@@ -24,9 +25,10 @@ import sys
 import atexit
 import time
 import threading
+import tempfile
+import zipfile
 from queue import Queue
 from concurrent.futures import ThreadPoolExecutor
-from tempfile import NamedTemporaryFile
 import requests
 import patoolib
 from requests.adapters import HTTPAdapter
@@ -35,24 +37,25 @@ import argparse
 import logging
 import subprocess
 
-def _launch_crash_reporter_on_exit(error_code, error_message):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from AscendaraState import StateFile, replace_json, write_json
+from AscendaraGamingMode import GamingMode
+from AscendaraCrash import launch_reporter, spool_crash
+from AscendaraManifest import build_manifest, load_manifest, refresh_entries, verify_install
+
+RANGE_READ_BUFFER = 1024 * 1024  # bytes fetched per range request when repairing from a zip
+
+def _launch_crash_reporter_on_exit():
     try:
-        crash_reporter_path = os.path.join('./AscendaraCrashReporter.exe')
-        if os.path.exists(crash_reporter_path):
-            # Use subprocess.Popen with CREATE_NO_WINDOW flag to hide console
-            subprocess.Popen(
-                [crash_reporter_path, "maindownloader", str(error_code), error_message],
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-        else:
-            logging.error(f"Crash reporter not found at: {crash_reporter_path}")
+        launch_reporter()
     except Exception as e:
         logging.error(f"Failed to launch crash reporter: {e}")
 
 def launch_crash_reporter(error_code, error_message):
-    # Only register once
+    """Spool the error and register the crash reporter to open on exit"""
+    spool_crash("maindownloader", error_code, error_message)
     if not hasattr(launch_crash_reporter, "_registered"):
-        atexit.register(_launch_crash_reporter_on_exit, error_code, error_message)
+        atexit.register(_launch_crash_reporter_on_exit)
         launch_crash_reporter._registered = True
 
 def _launch_notification(theme, title, message):
@@ -109,7 +112,7 @@ def retryfolder(game, online, dlc, version, size, download_dir, newfolder):
         }
     }
     game_info["downloadingData"]["extracting"] = True
-    safe_write_json(game_info_path, game_info)
+    write_json(game_info_path, game_info)
 
     extracted_folder = os.path.join(download_dir, newfolder)
     tempdownloading = os.path.join(download_dir, f"temp-{os.urandom(6).hex()}")
@@ -126,28 +129,7 @@ def retryfolder(game, online, dlc, version, size, download_dir, newfolder):
     game_info["downloadingData"]["extracting"] = False
     del game_info["downloadingData"]
     shutil.rmtree(tempdownloading, ignore_errors=True)
-    safe_write_json(game_info_path, game_info)
-
-def safe_write_json(filepath, data):
-    temp_dir = os.path.dirname(filepath)
-    temp_file_path = None
-    try:
-        with NamedTemporaryFile('w', delete=False, dir=temp_dir) as temp_file:
-            json.dump(data, temp_file, indent=4)
-            temp_file_path = temp_file.name
-        retry_attempts = 3
-        for attempt in range(retry_attempts):
-            try:
-                os.replace(temp_file_path, filepath)
-                break
-            except PermissionError as e:
-                if attempt < retry_attempts - 1:
-                    time.sleep(1)
-                else:
-                    raise e
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+    write_json(game_info_path, game_info)
 
 def handleerror(game_info, game_info_path, e):
     game_info['online'] = ""
@@ -159,7 +141,7 @@ def handleerror(game_info, game_info_path, e):
         "error": True,
         "message": str(e)
     }
-    safe_write_json(game_info_path, game_info)
+    write_json(game_info_path, game_info)
 
 class SSLContextAdapter(HTTPAdapter):
     def init_poolmanager(self, *args, **kwargs):
@@ -197,6 +179,7 @@ class DownloadManager:
         self.downloaded_size = 0
         self.lock = threading.Lock()
         self.max_retries = 3  # Maximum number of retries per chunk
+        self.gaming_mode = GamingMode()
         
     def split_chunks(self):
         chunk_size = self.total_size // self.num_threads
@@ -235,6 +218,7 @@ class DownloadManager:
                         self.downloaded_size += len(data)
                         if callback:
                             callback(len(data))
+                    self.gaming_mode.throttle(len(data))
                 
                 # Verify the downloaded size matches expected size
                 if len(chunk.data) != expected_size:
@@ -333,7 +317,7 @@ def download_file(link, game, online, dlc, isVr, version, size, download_dir, wi
             
             game_info["downloadingData"]["downloading"] = True
             start_time = time.time()
-            safe_write_json(game_info_path, game_info)
+            write_json(game_info_path, game_info)
 
             def update_progress(bytes_downloaded):
                 nonlocal start_time
@@ -366,7 +350,8 @@ def download_file(link, game, online, dlc, isVr, version, size, download_dir, wi
                 else:
                     game_info["downloadingData"]["timeUntilComplete"] = "Calculating..."
 
-                safe_write_json(game_info_path, game_info)
+                # Progress only, this process owns the file while downloading
+                replace_json(game_info_path, game_info)
 
             if total_size > 0:
                 # Download chunks in parallel if we know the size
@@ -393,6 +378,7 @@ def download_file(link, game, online, dlc, isVr, version, size, download_dir, wi
                             f.write(chunk)
                             manager.downloaded_size += len(chunk)
                             update_progress(len(chunk))
+                            manager.gaming_mode.throttle(len(chunk))
             return archive_file_path, archive_ext
 
         except Exception as e:
@@ -401,7 +387,7 @@ def download_file(link, game, online, dlc, isVr, version, size, download_dir, wi
         finally:
             session.close()
 
-    safe_write_json(game_info_path, game_info)
+    write_json(game_info_path, game_info)
 
     try:
         archive_file_path, archive_ext = download_with_requests()
@@ -417,6 +403,7 @@ def download_file(link, game, online, dlc, isVr, version, size, download_dir, wi
             elif sys.platform == "darwin":
                 patoolib.extract_archive(archive_file_path, download_path)
 
+            archive_members = list_archive_members(archive_file_path, archive_ext)
             os.remove(archive_file_path)
             game_info["downloadingData"]["extracting"] = False
 
@@ -427,18 +414,31 @@ def download_file(link, game, online, dlc, isVr, version, size, download_dir, wi
 
             extracted_folder = os.path.join(download_path, game)
             tempdownloading = os.path.join(download_path, f"temp-{os.urandom(6).hex()}")
-            if os.path.exists(extracted_folder):
+            flattened = os.path.exists(extracted_folder)
+            if flattened:
                 shutil.copytree(extracted_folder, tempdownloading)
                 shutil.rmtree(extracted_folder)
                 shutil.copytree(tempdownloading, download_path, dirs_exist_ok=True)
                 shutil.rmtree(tempdownloading, ignore_errors=True)
 
             del game_info["downloadingData"]
-            safe_write_json(game_info_path, game_info)
+            write_json(game_info_path, game_info)
 
             if withNotification:
                 _launch_notification(withNotification, "Download Complete", f"Successfully downloaded and extracted {game}")
 
+            # The game is playable already, the manifest is written afterwards
+            try:
+                prefix = f"{game}/" if flattened else ""
+                members = {}
+                for member in archive_members:
+                    rel_path = member[len(prefix):] if prefix and member.startswith(prefix) else member
+                    members[rel_path] = [0, member]
+                archive = {"name": os.path.basename(archive_file_path), "url": link, "format": archive_ext}
+                build_manifest(download_path, [archive], members)
+            except Exception as e:
+                logging.error(f"Failed to write the install manifest: {e}")
+
         except Exception as e:
             handleerror(game_info, game_info_path, e)
             raise e
@@ -446,6 +446,165 @@ def download_file(link, game, online, dlc, isVr, version, size, download_dir, wi
     except Exception as e:
         print(f"Failed to download or extract {game}. Error: {e}")
 
+def list_archive_members(archive_path, archive_format):
+    """File members of an archive with / separators, empty when the format cannot be listed here"""
+    try:
+        if archive_format == "zip":
+            with zipfile.ZipFile(archive_path) as archive:
+                return [info.filename for info in archive.infolist() if not info.is_dir()]
+        if archive_format == "rar" and sys.platform == "win32":
+            from unrar import rarfile
+            with rarfile.RarFile(archive_path, 'r') as archive:
+                return [name.replace('\\', '/') for name in archive.namelist() if not name.endswith(('/', '\\'))]
+    except Exception as e:
+        logging.error(f"Failed to list members of {archive_path}: {e}")
+    return []
+
+class HttpRangeFile(io.RawIOBase):
+    """Seekable read-only view of a remote file through HTTP range requests.
+
+    Wrapped in an io.BufferedReader it lets zipfile read the central directory and
+    single members of a remote archive without downloading the rest of it.
+    """
+
+    def __init__(self, session, url):
+        self.session = session
+        self.url = url
+        self.position = 0
+        response = session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=(30, 60))
+        response.raise_for_status()
+        content_range = response.headers.get('Content-Range', '')
+        response.close()
+        if response.status_code != 206 or '/' not in content_range:
+            raise IOError("The server does not support range requests")
+        self.size = int(content_range.split('/')[-1])
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = self.size + offset
+        return self.position
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+        end = min(self.size, self.position + len(buffer)) - 1
+        response = self.session.get(self.url, headers={'Range': f'bytes={self.position}-{end}'}, timeout=(30, 300))
+        response.raise_for_status()
+        data = response.content[:len(buffer)]
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+def _open_archive(session, archive, temp_dir):
+    """Open an archive for member extraction, remotely via range requests when possible"""
+    if archive["format"] == "zip":
+        try:
+            source = zipfile.ZipFile(io.BufferedReader(HttpRangeFile(session, archive["url"]), RANGE_READ_BUFFER))
+            logging.info(f"Reading members of {archive['name']} with range requests")
+            return source
+        except (IOError, zipfile.BadZipFile, requests.exceptions.RequestException) as e:
+            logging.info(f"Range requests unavailable for {archive['name']} ({e}), downloading the archive")
+
+    archive_path = os.path.join(temp_dir, archive["name"])
+    with session.get(archive["url"], stream=True, timeout=(30, 300)) as response:
+        response.raise_for_status()
+        with open(archive_path, 'wb') as f:
+            for data in response.iter_content(chunk_size=1024 * 1024):
+                f.write(data)
+    if archive["format"] == "zip":
+        return zipfile.ZipFile(archive_path)
+    if sys.platform == "win32":
+        from unrar import rarfile
+        return rarfile.RarFile(archive_path, 'r')
+    # Without unrar the whole archive is unpacked and only the needed files are used
+    extract_dir = os.path.join(temp_dir, "extracted")
+    patoolib.extract_archive(archive_path, outdir=extract_dir)
+    return extract_dir
+
+def repair_install(game_dir, report):
+    """Re-fetch the archive members covering the files in a verify report's repair list"""
+    manifest = load_manifest(game_dir)
+    by_archive = {}
+    unrepairable = []
+    for item in report["repair"]:
+        if item["archive"] is None:
+            unrepairable.append(item["path"])
+        else:
+            by_archive.setdefault(item["archive"], []).append(item)
+
+    repaired = []
+    session = requests.Session()
+    session.mount('https://', SSLContextAdapter())
+    try:
+        for index, items in by_archive.items():
+            archive = manifest["archives"][index]
+            with tempfile.TemporaryDirectory(prefix="repair-", dir=game_dir) as temp_dir:
+                source = _open_archive(session, archive, temp_dir)
+                for item in items:
+                    member = item["member"]
+                    try:
+                        if isinstance(source, str):
+                            extracted = os.path.join(source, *member.split('/'))
+                        else:
+                            # extract() sanitizes drive letters and '..', use where it actually wrote
+                            extracted = source.extract(member, temp_dir)
+                        target = os.path.join(game_dir, item["path"])
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.replace(extracted, target)
+                        repaired.append(item["path"])
+                    except Exception as e:
+                        logging.error(f"Failed to repair {item['path']}: {e}")
+                        unrepairable.append(item["path"])
+                if hasattr(source, "close"):
+                    source.close()
+    finally:
+        session.close()
+
+    refresh_entries(game_dir, repaired)
+    logging.info(f"Repaired {len(repaired)} files, {len(unrepairable)} could not be repaired")
+    return repaired, unrepairable
+
+def verify_main(argv):
+    """verify <game_dir> [--quick] [--repair]: check an install and optionally repair it"""
+    parser = argparse.ArgumentParser(prog="AscendaraDownloader verify", description="Verify a game install against its manifest.")
+    parser.add_argument("game_dir", help="Folder of the installed game")
+    parser.add_argument("--quick", action="store_true", help="Trust files whose size and modification time match")
+    parser.add_argument("--repair", action="store_true", help="Re-fetch the archive members of damaged files")
+    args = parser.parse_args(argv)
+
+    report = verify_install(args.game_dir, quick=args.quick)
+    if args.repair and report["repair"]:
+        repaired, unrepairable = repair_install(args.game_dir, report)
+        report["repaired"] = repaired
+        report["unrepairable"] = unrepairable
+
+    game = os.path.basename(os.path.normpath(args.game_dir))
+    game_info_path = os.path.join(args.game_dir, f"{game}.ascendara.json")
+    if os.path.exists(game_info_path):
+        with StateFile(game_info_path) as game_info:
+            game_info.set("verifyResult", {
+                "time": report["time"],
+                "quick": report["quick"],
+                "files": report["files"],
+                "damaged": len(report["repair"]),
+                "repaired": len(report.get("repaired", []))
+            })
+    print(json.dumps(report, indent=2))
+    return 0 if not report["repair"] or (args.repair and not report["unrepairable"]) else 2
+
 def parse_boolean(value):
     """Helper function to parse boolean values from command-line arguments."""
     if value.lower() in ['true', '1', 'yes']:
@@ -456,6 +615,9 @@ def parse_boolean(value):
         raise argparse.ArgumentTypeError(f"Invalid boolean value: {value}")
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "verify":
+        sys.exit(verify_main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(description="Download and manage game files.")
     parser.add_argument("link", help="URL of the file to download")
     parser.add_argument("game", help="Name of the game")
@@ -15,11 +15,10 @@
 
 
 import os
-import json
 import sys
 import time
 import shutil
-from tempfile import NamedTemporaryFile, gettempdir
+from tempfile import gettempdir
 import requests
 import atexit
 from threading import Lock
@@ -30,6 +29,12 @@ import subprocess
 import logging
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from AscendaraState import replace_json, write_json
+from AscendaraGamingMode import GamingMode
+from AscendaraCrash import launch_reporter, set_crash_context, spool_crash
+from AscendaraManifest import build_manifest
+
 # Set up logging to both console and temp file
 def setup_logging():
     log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -59,28 +64,22 @@ def setup_logging():
 
 # Initialize logging
 temp_log_file = setup_logging()
+set_crash_context(logFile=temp_log_file)
 
 NEW_LINE = "\n" if sys.platform != "Windows" else "\r\n"
 IS_DEV = False  # Development mode flag
 
-def _launch_crash_reporter_on_exit(error_code, error_message):
+def _launch_crash_reporter_on_exit():
     try:
-        crash_reporter_path = os.path.join('./AscendaraCrashReporter.exe')
-        if os.path.exists(crash_reporter_path):
-            # Use subprocess.Popen with CREATE_NO_WINDOW flag to hide console
-            subprocess.Popen(
-                [crash_reporter_path, "maindownloader", str(error_code), error_message],
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-        else:
-            logging.error(f"Crash reporter not found at: {crash_reporter_path}")
+        launch_reporter()
     except Exception as e:
         logging.error(f"Failed to launch crash reporter: {e}")
 
 def launch_crash_reporter(error_code, error_message):
-    # Only register once
+    """Spool the error and register the crash reporter to open on exit"""
+    spool_crash("maindownloader", error_code, error_message)
     if not hasattr(launch_crash_reporter, "_registered"):
-        atexit.register(_launch_crash_reporter_on_exit, error_code, error_message)
+        atexit.register(_launch_crash_reporter_on_exit)
         launch_crash_reporter._registered = True
 
 def _launch_notification(theme, title, message):
@@ -103,27 +102,6 @@ def _launch_notification(theme, title, message):
     except Exception as e:
         logging.error(f"Failed to launch notification helper: {e}")
 
-def safe_write_json(filepath, data):
-    temp_dir = os.path.dirname(filepath)
-    temp_file_path = None
-    try:
-        with NamedTemporaryFile('w', delete=False, dir=temp_dir) as temp_file:
-            json.dump(data, temp_file, indent=4)
-            temp_file_path = temp_file.name
-        retry_attempts = 3
-        for attempt in range(retry_attempts):
-            try:
-                os.replace(temp_file_path, filepath)
-                break
-            except PermissionError as e:
-                if attempt < retry_attempts - 1:
-                    time.sleep(1)
-                else:
-                    raise e
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-
 def handleerror(game_info, game_info_path, e):
     game_info['online'] = ""
     game_info['dlc'] = ""
@@ -134,7 +112,7 @@ def handleerror(game_info, game_info_path, e):
         "error": True,
         "message": str(e)
     }
-    safe_write_json(game_info_path, game_info)
+    write_json(game_info_path, game_info)
 
 class GofileDownloader:
     def __init__(self, game, online, dlc, isVr, version, size, download_dir, max_workers=5):
@@ -148,6 +126,7 @@ class GofileDownloader:
         self._current_file_progress = {}  # Track progress per file
         self._total_downloaded = 0  # Track total bytes downloaded
         self._total_size = 0  # Track total bytes to download
+        self._gaming_mode = GamingMode()  # Throttle while a game is running
         self.game = game
         self.online = online
         self.dlc = dlc
@@ -178,7 +157,7 @@ class GofileDownloader:
                 "timeUntilComplete": "0s"
             }
         }
-        safe_write_json(self.game_info_path, self.game_info)
+        write_json(self.game_info_path, self.game_info)
 
     @staticmethod
     def _getToken():
@@ -357,6 +336,7 @@ class GofileDownloader:
                             
                             f.write(chunk)
                             downloaded += len(chunk)
+                            self._gaming_mode.throttle(len(chunk))
                             bytes_since_last_update += len(chunk)
                             current_time = time.time()
                             
@@ -425,6 +405,7 @@ class GofileDownloader:
         with self._lock:
             self.game_info["downloadingData"]["downloading"] = not done
             self.game_info["downloadingData"]["progressCompleted"] = f"{progress:.2f}"
+            set_crash_context(phase="downloading" if not done else "downloaded", throughputKBps=round(rate / 1024, 2))
             
             # Format speed with consistent decimal places and thresholds
             def format_speed(rate):
@@ -468,11 +449,13 @@ class GofileDownloader:
             else:
                 print(f"\rDownloading {filename}: {progress:.1f}% {format_speed(rate)} ETA: {eta}", end="")
             
-            safe_write_json(self.game_info_path, self.game_info)
+            # Progress only, this process owns the file while downloading
+            replace_json(self.game_info_path, self.game_info)
 
     def _extract_files(self):
+        set_crash_context(phase="extracting")
         self.game_info["downloadingData"]["extracting"] = True
-        safe_write_json(self.game_info_path, self.game_info)
+        write_json(self.game_info_path, self.game_info)
 
         # First extract all archives
         for root, _, files in os.walk(self.download_dir):
@@ -531,7 +514,14 @@ class GofileDownloader:
                 shutil.rmtree(root)
 
         del self.game_info["downloadingData"]
-        safe_write_json(self.game_info_path, self.game_info)
+        write_json(self.game_info_path, self.game_info)
+
+        # Files are moved around after extraction, so the manifest supports verifying
+        # but not member-level repair for GoFile downloads
+        try:
+            build_manifest(self.download_dir)
+        except Exception as e:
+            logging.error(f"Failed to write the install manifest: {e}")
 
 def open_console():
     if IS_DEV and sys.platform == "win32":
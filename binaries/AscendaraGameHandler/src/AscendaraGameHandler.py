@@ -22,36 +22,60 @@ import json
 import logging
 import atexit
 import subprocess
-from pypresence import Presence
-import argparse
-import psutil
-import asyncio
-from datetime import datetime
+import threading
+import struct
+import hashlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from AscendaraState import FileLock, StateFile, atomic_write, read_json, write_json
+from AscendaraCrash import launch_reporter, set_crash_context, spool_crash
+from AscendaraGamingMode import GAMING_MODE_TOOLS
 
 CLIENT_ID = '1277379302945718356'
+HANDLER_START = time.perf_counter()
+
+# psutil, asyncio and pypresence cost tens of milliseconds to import. They are loaded on a
+# background thread once the game has been started, so they never delay the launch itself.
+psutil = None
+asyncio = None
+_deferred_imports = None
 
-def _launch_crash_reporter_on_exit(error_code, error_message):
+def _import_deferred():
+    global psutil, asyncio
+    import psutil
+    import asyncio
     try:
-        crash_reporter_path = os.path.join('./AscendaraCrashReporter.exe')
-        if os.path.exists(crash_reporter_path):
-            # Use subprocess.Popen with CREATE_NO_WINDOW flag to hide console
-            subprocess.Popen(
-                [crash_reporter_path, "gamehandler", str(error_code), error_message],
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-        else:
-            logging.error(f"Crash reporter not found at: {crash_reporter_path}")
+        import pypresence
+    except ImportError as e:
+        logging.error(f"Failed to import pypresence: {e}")
+
+def start_deferred_imports():
+    global _deferred_imports
+    if _deferred_imports is None:
+        _deferred_imports = threading.Thread(target=_import_deferred, daemon=True)
+        _deferred_imports.start()
+
+def wait_for_imports():
+    start_deferred_imports()
+    _deferred_imports.join()
+
+def _launch_crash_reporter_on_exit():
+    try:
+        launch_reporter()
     except Exception as e:
         logging.error(f"Failed to launch crash reporter: {e}")
 
 def launch_crash_reporter(error_code, error_message):
-    """Register the crash reporter to launch on exit with the given error details"""
+    """Spool the error and register the crash reporter to open on exit"""
+    spool_crash("gamehandler", error_code, error_message)
     if not hasattr(launch_crash_reporter, "_registered"):
-        atexit.register(_launch_crash_reporter_on_exit, error_code, error_message)
+        atexit.register(_launch_crash_reporter_on_exit)
         launch_crash_reporter._registered = True
 
 def setup_discord_rpc():
     try:
+        wait_for_imports()
+        from pypresence import Presence
         rpc = Presence(CLIENT_ID)
         rpc.connect()
         return rpc
@@ -81,48 +105,778 @@ def clear_discord_presence(rpc):
         except Exception as e:
             logging.error(f"Failed to clear Discord presence: {e}")
 
-def is_process_running(exe_path):
-    for proc in psutil.process_iter(['name']):
+def get_sessions_dir():
+    return os.path.join(os.environ.get('APPDATA', os.path.expanduser("~")), 'ascendara', 'sessions')
+
+class LibraryStore:
+    """Custom game library backed by games.json with an executable -> entry index.
+
+    Lookups are O(1) and updates are recorded per entry and field, so a save only
+    re-reads games.json when another process (main.js) changed it in the meantime and
+    then re-applies just our pending changes before writing it back atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = {}
+        self._load()
+
+    def _load(self):
+        with open(self.path, "r") as f:
+            self.data = json.load(f)
+        self.mtime = os.path.getmtime(self.path)
+        self.index = {game.get("executable"): game for game in self.data.get("games", [])}
+
+    def get(self, exe_path):
+        return self.index.get(exe_path)
+
+    def _pending(self, exe_path):
+        if exe_path not in self.index:
+            raise Exception(f"Game not found in games.json for executable path: {exe_path}")
+        return self.pending.setdefault(exe_path, {"set": {}, "add": {}})
+
+    def update(self, exe_path, **fields):
+        self._pending(exe_path)["set"].update(fields)
+        self.index[exe_path].update(fields)
+
+    def increment(self, exe_path, field, amount):
+        added = self._pending(exe_path)["add"]
+        added[field] = added.get(field, 0) + amount
+        entry = self.index[exe_path]
+        entry[field] = max(0, entry.get(field, 0) + amount)
+
+    def save(self):
+        if not self.pending:
+            return
+        with FileLock(self.path):
+            if os.path.getmtime(self.path) != self.mtime:
+                # games.json changed under us, re-apply only our own changes on top of it
+                self._load()
+                for exe_path, changes in self.pending.items():
+                    entry = self.index.get(exe_path)
+                    if entry is None:
+                        continue
+                    for field, amount in changes["add"].items():
+                        entry[field] = max(0, entry.get(field, 0) + amount)
+                    entry.update(changes["set"])
+            atomic_write(self.path, self.data)
+            self.mtime = os.path.getmtime(self.path)
+        self.pending = {}
+
+def add_play_time(file_path, is_custom_game, exe_path, seconds, updates=None, store=None):
+    """Add seconds to playTime in the game's JSON file (or its games.json entry) in one atomic write"""
+    if is_custom_game:
+        # For custom games, update the specific game entry in games.json
+        store = store or LibraryStore(file_path)
+        store.increment(exe_path, "playTime", seconds)
+        if updates:
+            store.update(exe_path, **updates)
+        store.save()
+        return
+
+    # For regular games, update the game-specific json
+    with StateFile(file_path) as state:
+        state.increment("playTime", seconds)
+        state.update(**(updates or {}))
+
+class PlaytimeTracker:
+    """Accumulates playtime in memory, flushing it to disk on a coarse interval and on exit.
+
+    Every session keeps a tiny append-only journal so that time played since the last flush
+    can be recovered after a crash or power loss.
+    """
+    FLUSH_INTERVAL = 60  # seconds between playTime writes
+    JOURNAL_INTERVAL = 10  # seconds between journal checkpoints
+
+    def __init__(self, file_path, is_custom_game, exe_path, store=None):
+        self.file_path = file_path
+        self.is_custom_game = is_custom_game
+        self.exe_path = exe_path
+        self.store = store
+        self.session_id = f"{int(time.time())}-{os.getpid()}"
+        self.journal_path = os.path.join(get_sessions_dir(), f"{self.session_id}.journal")
+        self.start_time = None
+        self.end_time = None
+        self.flushed = 0
+        self.last_flush = 0
+        self.last_journal = 0
+
+    def _journal(self, record):
         try:
-            if proc.info['name'] == os.path.basename(exe_path):
-                return True
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
-    return False
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            logging.error(f"Failed to write session journal: {e}")
+
+    def start(self):
+        os.makedirs(get_sessions_dir(), exist_ok=True)
+        self.start_time = time.time()
+        self.last_flush = self.last_journal = self.start_time
+        self._journal({
+            "event": "start",
+            "pid": os.getpid(),
+            "file": self.file_path,
+            "custom": self.is_custom_game,
+            "exe": self.exe_path,
+            "time": self.start_time
+        })
+
+    def elapsed(self):
+        if not self.start_time:
+            return 0
+        return int((self.end_time or time.time()) - self.start_time)
+
+    def seconds_until_due(self):
+        """Seconds until the next journal checkpoint or flush is due"""
+        now = time.time()
+        return max(0, min(self.last_journal + self.JOURNAL_INTERVAL, self.last_flush + self.FLUSH_INTERVAL) - now)
+
+    def tick(self):
+        """Checkpoint and flush when their intervals have passed, cheap enough to call often"""
+        now = time.time()
+        if now - self.last_journal >= self.JOURNAL_INTERVAL:
+            self.last_journal = now
+            self._journal({"event": "tick", "elapsed": self.elapsed()})
+        if now - self.last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self, updates=None):
+        self.last_flush = time.time()
+        elapsed = self.elapsed()
+        delta = elapsed - self.flushed
+        if delta <= 0 and not updates:
+            return
+        try:
+            add_play_time(self.file_path, self.is_custom_game, self.exe_path, max(0, delta), updates, self.store)
+            self.flushed = elapsed
+            self._journal({"event": "flush", "flushed": self.flushed})
+        except Exception as e:
+            logging.error(f"Failed to update play time: {e}")
+
+    def stop(self, updates=None):
+        """Final flush; the journal is only removed once the time is safely on disk"""
+        self.flush(updates)
+        if self.flushed >= self.elapsed():
+            try:
+                os.remove(self.journal_path)
+            except OSError:
+                pass
+
+def recover_play_time(running_exe=None):
+    """Credit playtime left unflushed by sessions that ended without a clean exit.
+
+    running_exe is the game this handler just launched, its running flag is left alone.
+    """
+    sessions_dir = get_sessions_dir()
+    if not os.path.isdir(sessions_dir):
+        return
+    wait_for_imports()
+    for name in os.listdir(sessions_dir):
+        if not name.endswith(".journal"):
+            continue
+        journal_path = os.path.join(sessions_dir, name)
+        try:
+            start = None
+            elapsed = 0
+            flushed = 0
+            with open(journal_path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Torn last line after a power loss
+                    if record["event"] == "start":
+                        start = record
+                    elif record["event"] == "tick":
+                        elapsed = max(elapsed, record["elapsed"])
+                    elif record["event"] == "flush":
+                        flushed = max(flushed, record["flushed"])
+                        elapsed = max(elapsed, flushed)
+
+            # Leave journals of sessions that are still being played alone
+            if start is None or (psutil.pid_exists(start["pid"]) and
+                                 time.time() - os.path.getmtime(journal_path) < PlaytimeTracker.JOURNAL_INTERVAL * 3):
+                continue
+
+            if elapsed > flushed:
+                relaunched = running_exe is not None and os.path.normcase(start["exe"]) == os.path.normcase(running_exe)
+                add_play_time(start["file"], start["custom"], start["exe"], elapsed - flushed,
+                              None if relaunched else {"isRunning": False})
+                logging.info(f"Recovered {elapsed - flushed}s of play time for {start['exe']}")
+            os.remove(journal_path)
+        except Exception as e:
+            logging.error(f"Failed to recover session journal {name}: {e}")
+
+class TelemetryRecorder:
+    """Samples the game's process tree into a fixed-size ring buffer file for the session.
+
+    Each sample holds CPU %, RSS, I/O bytes, thread and handle counts summed over the
+    tree. The sampling interval doubles whenever the recorder's own CPU cost exceeds
+    MAX_OVERHEAD of a core.
+    """
+    MAGIC = b"ASTL"
+    HEADER = struct.Struct("<4sHHIQ")  # magic, version, record size, capacity, samples written
+    RECORD = struct.Struct("<dfQQQII")  # time, cpu %, rss, read bytes, write bytes, threads, handles
+    CAPACITY = 4096
+    MAX_OVERHEAD = 0.01
+    SUMMARY_HISTORY = 10  # sessions kept in sessionStats
+
+    def __init__(self, session_id, interval=2.0):
+        self.interval = max(0.5, float(interval))
+        self.path = os.path.join(get_telemetry_dir(), f"{session_id}.ring")
+        self.written = 0
+        self.last_sample = 0
+        self.sampling_cpu = 0.0
+        self.start_time = None
+        self.processes = {}
+        self.cpu_samples = []
+        self.peak_rss = 0
+        self.file = None
+
+    def start(self):
+        os.makedirs(get_telemetry_dir(), exist_ok=True)
+        self.file = open(self.path, "w+b")
+        self.file.truncate(self.HEADER.size + self.RECORD.size * self.CAPACITY)
+        self._write_header()
+        self.start_time = time.time()
+
+    def _write_header(self):
+        self.file.seek(0)
+        self.file.write(self.HEADER.pack(self.MAGIC, 1, self.RECORD.size, self.CAPACITY, self.written))
+
+    def seconds_until_due(self):
+        return max(0, self.last_sample + self.interval - time.time())
+
+    def tick(self, processes):
+        if self.file is None or self.seconds_until_due() > 0:
+            return
+        cpu_before = time.process_time()
+        self.last_sample = time.time()
+        self._sample(processes)
+        self.sampling_cpu += time.process_time() - cpu_before
+
+        # Keep our own cost under budget by sampling less often
+        elapsed = max(1e-6, time.time() - self.start_time)
+        if self.sampling_cpu / elapsed > self.MAX_OVERHEAD:
+            self.interval *= 2
+            logging.info(f"Telemetry sampling over budget, interval raised to {self.interval:.1f}s")
+
+    def _sample(self, processes):
+        cpu = 0.0
+        rss = read_bytes = write_bytes = threads = handles = 0
+        for proc in processes:
+            try:
+                # cpu_percent needs a previous call on the same Process object to measure against
+                cached = self.processes.setdefault(proc.pid, proc)
+                with cached.oneshot():
+                    cpu += cached.cpu_percent(None)
+                    rss += cached.memory_info().rss
+                    threads += cached.num_threads()
+                    if hasattr(cached, "num_handles"):
+                        handles += cached.num_handles()
+                    elif hasattr(cached, "num_fds"):
+                        handles += cached.num_fds()
+                    if hasattr(cached, "io_counters"):
+                        io = cached.io_counters()
+                        read_bytes += io.read_bytes
+                        write_bytes += io.write_bytes
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                self.processes.pop(proc.pid, None)
+
+        slot = self.written % self.CAPACITY
+        self.file.seek(self.HEADER.size + slot * self.RECORD.size)
+        self.file.write(self.RECORD.pack(time.time(), cpu, rss, read_bytes, write_bytes, threads, handles))
+        self.written += 1
+        self._write_header()
+        self.file.flush()
+
+        self.cpu_samples.append(cpu)
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def stop(self, end_time=None):
+        if self.file is None:
+            return None
+        self.file.close()
+        self.file = None
+        # The first cpu_percent reading of every process is always 0.0, skip it
+        cpu = sorted(self.cpu_samples[1:]) or [0.0]
+        elapsed = max(1e-6, (end_time or time.time()) - self.start_time)
+        summary = {
+            "start": int(self.start_time),
+            "duration": int(elapsed),
+            "samples": self.written,
+            "cpuP50": round(cpu[int(0.5 * (len(cpu) - 1))], 1),
+            "cpuP95": round(cpu[int(0.95 * (len(cpu) - 1))], 1),
+            "peakMemory": self.peak_rss,
+            "telemetryFile": self.path
+        }
+        logging.info(f"Session telemetry: {summary}, sampling cost {self.sampling_cpu / elapsed * 100:.3f}% of a core")
+        return summary
+
+def get_telemetry_dir():
+    return os.path.join(os.environ.get('APPDATA', os.path.expanduser("~")), 'ascendara', 'telemetry')
+
+class PriorityManager:
+    """Raises the game's CPU and I/O priority and pushes other Ascendara processes back.
+
+    Downloaders, translators and the Electron app are lowered in priority and pinned to
+    the last few cores for the length of the session. Per-game overrides come from the
+    game's launchPriority entry. Helper priorities are shared by overlapping sessions, so
+    their originals live in priorities.json with the game handlers holding them and are
+    only restored by the last holder. While gaming mode is on the downloaders lower their
+    own priority and are left alone. Helpers are looked for once at the start of the
+    session, a system-wide process scan is too costly to repeat while the game runs.
+    """
+    RESCAN_INTERVAL = 10  # seconds between looks for new game children
+
+    def __init__(self, options, gaming_mode=True):
+        self.priority = options.get("priority", "above_normal")
+        self.io_priority = options.get("ioPriority", "high")
+        self.helper_cores = int(options.get("helperCores", 2))
+        self.skipped_tools = GAMING_MODE_TOOLS if gaming_mode else ()
+        self.state_path = os.path.join(os.environ.get('APPDATA', os.path.expanduser("~")), 'ascendara', 'priorities.json')
+        self.originals = {}
+        self.game_pids = set()
+        self.helper_pids = set()
+        self.helpers_scanned = False
+        self.last_scan = 0
+
+    def seconds_until_due(self):
+        return max(0, self.last_scan + self.RESCAN_INTERVAL - time.time())
+
+    @staticmethod
+    def _current(proc):
+        """The nice, ionice and cpu_affinity of proc, in a JSON friendly form"""
+        current = {}
+        for attribute in ("nice", "ionice", "cpu_affinity"):
+            try:
+                if hasattr(proc, attribute):
+                    value = getattr(proc, attribute)()
+                    current[attribute] = [int(v) for v in value] if isinstance(value, tuple) else value
+            except (psutil.Error, OSError):
+                pass
+        return current
+
+    def _boost(self, proc):
+        if proc.pid not in self.originals:
+            self.originals[proc.pid] = {"proc": proc, **self._current(proc)}
+        self.game_pids.add(proc.pid)
+        if sys.platform == "win32":
+            classes = {
+                "high": psutil.HIGH_PRIORITY_CLASS,
+                "above_normal": psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+                "normal": psutil.NORMAL_PRIORITY_CLASS
+            }
+            io_classes = {"high": psutil.IOPRIO_HIGH, "normal": psutil.IOPRIO_NORMAL}
+            self._apply(proc, "nice", classes.get(self.priority))
+            self._apply(proc, "ionice", io_classes.get(self.io_priority))
+        else:
+            niceness = {"high": -10, "above_normal": -5, "normal": 0}
+            self._apply(proc, "nice", niceness.get(self.priority))
+            if self.io_priority == "high" and hasattr(psutil, "IOPRIO_CLASS_BE"):
+                self._apply(proc, "ionice", psutil.IOPRIO_CLASS_BE, 0)
+
+    def _lower(self, proc, helper_cores):
+        if sys.platform == "win32":
+            self._apply(proc, "nice", psutil.BELOW_NORMAL_PRIORITY_CLASS)
+            self._apply(proc, "ionice", psutil.IOPRIO_VERYLOW)
+        else:
+            self._apply(proc, "nice", 10)
+            if hasattr(psutil, "IOPRIO_CLASS_IDLE"):
+                self._apply(proc, "ionice", psutil.IOPRIO_CLASS_IDLE)
+        if helper_cores:
+            self._apply(proc, "cpu_affinity", helper_cores)
+
+    def _apply(self, proc, attribute, *value):
+        if not value or value[0] is None or not hasattr(proc, attribute):
+            return
+        try:
+            getattr(proc, attribute)(*value)
+        except (psutil.Error, OSError) as e:
+            logging.debug(f"Could not set {attribute} of {proc.pid}: {e}")
+
+    def _restore(self, proc, original):
+        if "nice" in original:
+            self._apply(proc, "nice", original["nice"])
+        if "ionice" in original:
+            ionice = original["ionice"]
+            if isinstance(ionice, (list, tuple)):
+                self._apply(proc, "ionice", *ionice)
+            else:
+                self._apply(proc, "ionice", ionice)
+        if "cpu_affinity" in original:
+            self._apply(proc, "cpu_affinity", original["cpu_affinity"])
+
+    def _helper_cores(self):
+        cores = list(range(psutil.cpu_count() or 1))
+        if self.helper_cores <= 0 or len(cores) <= self.helper_cores:
+            return None
+        return cores[-self.helper_cores:]
+
+    def _lower_helpers(self, helpers):
+        """Lower helpers, or join as holder where another session already lowered them"""
+        helper_cores = self._helper_cores()
+        own_pid = os.getpid()
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with FileLock(self.state_path):
+            state = read_json(self.state_path)
+            for proc in helpers:
+                key = str(proc.pid)
+                try:
+                    create_time = proc.create_time()
+                except psutil.Error:
+                    continue
+                entry = state.get(key)
+                if not entry or entry.get("createTime") != create_time:
+                    # First session to lower this helper, what it has now is the original
+                    entry = state[key] = {"createTime": create_time, "holders": [], **self._current(proc)}
+                    self._lower(proc, helper_cores)
+                if own_pid not in entry["holders"]:
+                    entry["holders"].append(own_pid)
+                self.helper_pids.add(proc.pid)
+            atomic_write(self.state_path, state)
+
+    def tick(self, processes):
+        if self.seconds_until_due() > 0:
+            return
+        self.last_scan = time.time()
+        for proc in processes:
+            if proc.pid not in self.game_pids:
+                self._boost(proc)
+        if not self.helpers_scanned:
+            self.helpers_scanned = True
+            self._scan_helpers()
 
-def update_play_time(file_path, is_custom_game, game_entry=None):
-    """Update the playTime field in either the game's JSON file or games.json for custom games"""
+    def _scan_helpers(self):
+        own_pid = os.getpid()
+        helpers = []
+        for proc in psutil.process_iter(['name']):
+            name = os.path.splitext((proc.info['name'] or "").lower())[0]
+            if (proc.pid == own_pid or proc.pid in self.game_pids or proc.pid in self.helper_pids or
+                    not name.startswith("ascendara") or "gamehandler" in name or name in self.skipped_tools):
+                continue
+            helpers.append(proc)
+        if helpers:
+            self._lower_helpers(helpers)
+
+    def restore(self):
+        for original in self.originals.values():
+            proc = original["proc"]
+            try:
+                if proc.is_running():
+                    self._restore(proc, original)
+            except psutil.Error:
+                pass
+        self.originals = {}
+        self.game_pids = set()
+
+        # Leave helpers other live sessions still hold, and clean up after killed handlers
+        own_pid = os.getpid()
+        restored = 0
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with FileLock(self.state_path):
+                state = read_json(self.state_path)
+                for key, entry in list(state.items()):
+                    holders = [pid for pid in entry.get("holders", []) if pid != own_pid and psutil.pid_exists(pid)]
+                    if holders:
+                        entry["holders"] = holders
+                        continue
+                    del state[key]
+                    try:
+                        proc = psutil.Process(int(key))
+                        if proc.create_time() == entry.get("createTime"):
+                            self._restore(proc, entry)
+                            restored += 1
+                    except psutil.Error:
+                        pass
+                atomic_write(self.state_path, state)
+        except Exception as e:
+            logging.error(f"Failed to restore helper priorities: {e}")
+        self.helper_pids = set()
+        logging.info(f"Restored priorities of the game and {restored} helper processes")
+
+class WarmupProfile:
+    """Per-game page-cache warm-up before launch, learned from files earlier sessions used.
+
+    Every launch records the time from launch to the first visible window, tagged with
+    whether it was warmed, so the benefit can be compared per game. While gameWarmup is
+    on, the files the game's tree opens or maps below the game directory during the
+    loading phase are also recorded, and next launch the exe and the most used files
+    are read ahead in parallel up to a memory budget.
+    """
+    LEARN_PERIOD = 120  # seconds after launch in which loading activity is observed
+    WINDOW_CHECK_INTERVAL = 0.25
+    OBSERVE_INTERVAL = 2.0
+    LAUNCH_HISTORY = 20
+    READ_BLOCK = 1024 * 1024
+
+    def __init__(self, exe_path, game_root, learn=True):
+        self.exe_path = exe_path
+        self.learn = learn
+        # Trailing separator so a sibling folder like Foo2 does not match the root Foo
+        self.game_root = os.path.join(os.path.normcase(os.path.abspath(game_root)), '')
+        key = hashlib.sha1(os.path.normcase(exe_path).encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(os.environ.get('APPDATA', os.path.expanduser("~")), 'ascendara', 'warmup', f"{key}.json")
+        self.profile = {"exe": exe_path, "files": {}, "launches": []}
+        if os.path.exists(self.path):
+            self.profile.update(read_json(self.path))
+        self.session_files = set()
+        self.launch_time = None
+        self.window_time = None
+        self.warmed = False
+        self.warmed_bytes = 0
+        self.last_window_check = 0
+        self.last_observe = 0
+
+    def _read_ahead(self, file_path):
+        try:
+            with open(file_path, 'rb', buffering=0) as f:
+                if hasattr(os, 'posix_fadvise'):
+                    # Let the kernel read ahead asynchronously without copying into our memory
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                    return os.fstat(f.fileno()).st_size
+                buffer = bytearray(self.READ_BLOCK)
+                total = 0
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        return total
+                    total += read
+        except OSError:
+            return 0
+
+    def warm(self, budget_mb):
+        """Read ahead the exe and learned files, most used first, within budget_mb"""
+        start = time.time()
+        budget = budget_mb * 1024 * 1024
+        learned = sorted(self.profile["files"], key=self.profile["files"].get, reverse=True)
+        candidates = list(dict.fromkeys([self.exe_path] + learned))
+        selected = []
+        planned = 0
+        for file_path in candidates:
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                continue
+            if planned + size > budget:
+                continue
+            planned += size
+            selected.append(file_path)
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(8, max(1, len(selected)))) as executor:
+            self.warmed_bytes = sum(executor.map(self._read_ahead, selected))
+        self.warmed = True
+        logging.info(f"Warmed {len(selected)} files ({self.warmed_bytes / (1024 * 1024):.1f} MB) "
+                     f"in {time.time() - start:.2f}s")
+
+    def launched(self):
+        self.launch_time = time.time()
+
+    def seconds_until_due(self):
+        if self.launch_time is None or time.time() - self.launch_time > self.LEARN_PERIOD:
+            return float('inf')
+        if self.window_time is None and sys.platform == "win32":
+            return max(0, self.last_window_check + self.WINDOW_CHECK_INTERVAL - time.time())
+        if not self.learn:
+            return float('inf')
+        return max(0, self.last_observe + self.OBSERVE_INTERVAL - time.time())
+
+    def tick(self, processes):
+        now = time.time()
+        if self.launch_time is None or now - self.launch_time > self.LEARN_PERIOD:
+            return
+        if self.window_time is None and now - self.last_window_check >= self.WINDOW_CHECK_INTERVAL:
+            self.last_window_check = now
+            if has_visible_window({proc.pid for proc in processes}):
+                self.window_time = now
+                logging.info(f"First window after {self.window_time - self.launch_time:.2f}s")
+        if self.learn and now - self.last_observe >= self.OBSERVE_INTERVAL:
+            self.last_observe = now
+            self._observe(processes)
+
+    def _observe(self, processes):
+        for proc in processes:
+            try:
+                paths = [f.path for f in proc.open_files()]
+                if hasattr(proc, "memory_maps"):
+                    paths += [m.path for m in proc.memory_maps()]
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, OSError):
+                continue
+            for file_path in paths:
+                if os.path.normcase(os.path.abspath(file_path)).startswith(self.game_root):
+                    self.session_files.add(file_path)
+
+    def save(self):
+        files = self.profile["files"]
+        for file_path in self.session_files:
+            files[file_path] = files.get(file_path, 0) + 1
+        launch_to_window = round(self.window_time - self.launch_time, 3) if self.window_time else None
+        self.profile["launches"] = (self.profile["launches"] + [{
+            "time": int(self.launch_time or time.time()),
+            "warmed": self.warmed,
+            "warmedBytes": self.warmed_bytes,
+            "launchToWindow": launch_to_window
+        }])[-self.LAUNCH_HISTORY:]
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_json(self.path, self.profile)
+        except Exception as e:
+            logging.error(f"Failed to save warm-up profile: {e}")
+
+def has_visible_window(pids):
+    """Whether any of pids owns a visible top-level window (Windows only)"""
+    if sys.platform != "win32" or not pids:
+        return False
+    import ctypes
+    from ctypes import wintypes
+    user32 = ctypes.windll.user32
+    found = []
+
+    @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    def callback(hwnd, lparam):
+        if user32.IsWindowVisible(hwnd):
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            if pid.value in pids:
+                found.append(hwnd)
+                return False
+        return True
+
+    user32.EnumWindows(callback, 0)
+    return bool(found)
+
+def enable_child_subreaper():
+    """Ask Linux to re-parent orphaned descendants to this process instead of init"""
+    if not sys.platform.startswith("linux"):
+        return False
     try:
-        with open(file_path, "r") as f:
-            data = json.load(f)
-        
-        if is_custom_game:
-            # For custom games, update the specific game entry in games.json
-            for game in data["games"]:
-                if game["executable"] == game_entry["executable"]:
-                    if "playTime" not in game:
-                        game["playTime"] = 0
-                    game["playTime"] += 1
+        import ctypes
+        PR_SET_CHILD_SUBREAPER = 36
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) == 0
+    except Exception:
+        return False
+
+class ProcessSupervisor:
+    """Follows a launched game and every process it spawns until the whole tree has exited.
+
+    Stub launchers that start the real game and exit right away are handled by tracking
+    descendants, including orphans whose tracked parent already exited. On Linux orphans
+    are re-parented to us; elsewhere they are looked for in the system process list, but
+    only while a launcher can be handing over (right after launch and once the tree
+    emptied). The supervisor only wakes up when a tracked process exits, a child scan is
+    due, the playtime tracker has a checkpoint to write or a monitor asks for a sample.
+    """
+    FAST_SCAN_INTERVAL = 0.5  # child scans right after launch, when launchers hand over
+    FAST_SCAN_PERIOD = 15
+    SCAN_INTERVAL = 10
+    HANDOVER_GRACE = 3  # seconds to look for a handed-over game after the tree emptied
+
+    def __init__(self, process):
+        self.process = process
+        self.start_time = time.time()
+        self.alive = {}
+        self.seen_pids = set()
+        self.last_scan = 0
+        self.returncode = None
+        # Orphans are re-parented on Linux, become their subreaper so they stay in our tree
+        self.subreaper = psutil.Process() if enable_child_subreaper() else None
+        try:
+            self._track(psutil.Process(process.pid))
+        except psutil.NoSuchProcess:
+            pass
+
+    def _track(self, proc):
+        if proc.pid not in self.alive:
+            self.alive[proc.pid] = proc
+            if proc.pid not in self.seen_pids:
+                self.seen_pids.add(proc.pid)
+                if proc.pid != self.process.pid:
+                    logging.info(f"Tracking child process {proc.pid}")
+
+    def _scan_interval(self):
+        if time.time() - self.start_time < self.FAST_SCAN_PERIOD:
+            return self.FAST_SCAN_INTERVAL
+        return self.SCAN_INTERVAL
+
+    def _discover(self, handover=False):
+        """Track new descendants; handover also searches all processes for orphans"""
+        self.last_scan = time.time()
+        roots = list(self.alive.values())
+        if self.subreaper is not None:
+            roots.append(self.subreaper)
+        for proc in roots:
+            try:
+                for child in proc.children(recursive=True):
+                    self._track(child)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        if self.subreaper is not None:
+            return
+        if not handover and time.time() - self.start_time >= self.FAST_SCAN_PERIOD:
+            return
+        # Orphans keep the pid of their exited parent as ppid, match them against every pid we saw
+        for proc in psutil.process_iter(['ppid', 'create_time']):
+            try:
+                if (proc.pid not in self.alive and proc.info['ppid'] in self.seen_pids and
+                        proc.info['create_time'] >= self.start_time - 1):
+                    self._track(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+
+    async def run(self, tracker, monitors=()):
+        """Supervise until the tree exits; monitors are woken with the live processes when due"""
+        loop = asyncio.get_running_loop()
+        self._discover()
+        while True:
+            next_scan = max(0, self.last_scan + self._scan_interval() - time.time())
+            timeout = min(next_scan, tracker.seconds_until_due())
+            for monitor in monitors:
+                timeout = min(timeout, monitor.seconds_until_due())
+            timeout = max(0.05, timeout)
+            if self.alive:
+                gone, _ = await loop.run_in_executor(None, psutil.wait_procs, list(self.alive.values()), timeout)
+                for proc in gone:
+                    self.alive.pop(proc.pid, None)
+                    if proc.pid == self.process.pid:
+                        # On POSIX wait_procs reaped the launcher, Popen can no longer see its exit code
+                        self.returncode = proc.returncode
+            tracker.tick()
+            if self.alive:
+                for monitor in monitors:
+                    monitor.tick(list(self.alive.values()))
+
+            if not self.alive or time.time() - self.last_scan >= self._scan_interval():
+                self._discover(handover=not self.alive)
+            if not self.alive:
+                # A launcher may still be handing over to the real game, look again briefly
+                tracker.end_time = time.time()
+                deadline = tracker.end_time + self.HANDOVER_GRACE
+                while not self.alive and time.time() < deadline:
+                    await asyncio.sleep(self.FAST_SCAN_INTERVAL)
+                    self._discover(handover=True)
+                if not self.alive:
                     break
+                tracker.end_time = None
+        if self.returncode is not None:
+            self.process.returncode = self.returncode
         else:
-            # For regular games, update the game-specific json
-            if "playTime" not in data:
-                data["playTime"] = 0
-            data["playTime"] += 1
-        
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=4)
-    except Exception as e:
-        logging.error(f"Failed to update play time: {e}")
+            # Reap the launcher so its exit code is available
+            self.process.wait()
+        logging.info(f"Process tree of {self.process.pid} exited with code {self.process.returncode} "
+                     f"({len(self.seen_pids)} processes tracked)")
 
 def execute(game_path, is_custom_game, is_shortcut=False):
-    rpc = None
-    if is_shortcut:
-        rpc = setup_discord_rpc()
-
+    # Only what is needed to start the game runs before Popen, all bookkeeping follows it
     json_file_path = None
     games_json_path = None
-    game_entry = None
+    store = None
+    settings_file = os.path.join(os.environ.get('APPDATA', os.path.expanduser("~")), 'ascendara', 'ascendarasettings.json')
+    settings = read_json(settings_file)
 
     if not is_custom_game:
         game_dir, exe_name = os.path.split(game_path)
@@ -137,159 +891,145 @@ def execute(game_path, is_custom_game, is_shortcut=False):
             json_file_path = os.path.join(parent_dir, f"{parent_name}.ascendara.json")
     else:
         exe_path = game_path
-        user_data_dir = os.path.join(os.environ['APPDATA'], 'ascendara')
-        settings_file = os.path.join(user_data_dir, 'ascendarasettings.json')
-        with open(settings_file, 'r') as f:
-            settings = json.load(f)
         download_dir = settings.get('downloadDirectory')
         if not download_dir:
             logging.error('Download directory not found in ascendarasettings.json')
             return
         games_json_path = os.path.join(download_dir, 'games.json')
-        with open(games_json_path, 'r') as f:
-            games_data = json.load(f)
-        game_entry = next((game for game in games_data['games'] if game['executable'] == exe_path), None)
-        if game_entry is None:
+        store = LibraryStore(games_json_path)
+        if store.get(exe_path) is None:
             logging.error(f"Game not found in games.json for executable path: {exe_path}")
             return
-
-    logging.info(f"game_dir: {os.path.dirname(exe_path)}, exe_path: {exe_path}")
+        game_name = store.get(exe_path).get('game') or os.path.basename(exe_path)
 
     if not os.path.isfile(exe_path):
         error = "The exe file does not exist"
-        if not is_custom_game:
-            with open(json_file_path, "r") as f:
-                data = json.load(f)
-            data["runError"] = error
-            with open(json_file_path, "w") as f:
-                json.dump(data, f, indent=4)
-        else:
-            logging.error(error)
+        logging.error(f"{error}: {exe_path}")
+        if not is_custom_game and os.path.exists(json_file_path):
+            with StateFile(json_file_path) as state:
+                state.set("runError", error)
         return
 
-    def update_launch_count(file_path, increment=True):
-        try:
-            with open(file_path, "r") as f:
-                data = json.load(f)
-            if "launchCount" not in data:
-                data["launchCount"] = 0
-            data["launchCount"] += 1 if increment else -1
-            data["launchCount"] = max(0, data["launchCount"])
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=4)
-        except Exception as e:
-            logging.error(f"Error updating launch count: {e}")
+    try:
+        if os.path.dirname(exe_path):
+            os.chdir(os.path.dirname(exe_path))
 
-    if not is_custom_game:
-        update_launch_count(json_file_path)
-        with open(json_file_path, "r") as f:
-            game_data = json.load(f)
-        game_data["isRunning"] = True
-        with open(json_file_path, "w") as f:
-            json.dump(game_data, f, indent=4)
+        # Launch-to-window time is recorded on every launch as the unwarmed baseline; sampling
+        # open files and memory maps and the read-ahead only run when gameWarmup is on
+        warmup_enabled = settings.get('gameWarmup', False)
+        warmup = WarmupProfile(exe_path, os.path.dirname(json_file_path) if json_file_path else os.path.dirname(exe_path),
+                               learn=warmup_enabled)
+        if warmup_enabled:
+            warmup.warm(settings.get('gameWarmupBudget', 512))
+
+        process = subprocess.Popen(exe_path)
+    except Exception as e:
+        logging.error(f"Failed to execute game: {e}")
+        launch_crash_reporter(1, str(e))
+        return
+
+    warmup.launched()
+    start_deferred_imports()
+    logging.info(f"Started {exe_path} {(time.perf_counter() - HANDLER_START) * 1000:.0f} ms after handler start")
+
+    rpc = {}
+    rpc_thread = None
+    if is_shortcut:
+        def connect_discord_rpc():
+            rpc["client"] = setup_discord_rpc()
+            update_discord_presence(rpc["client"], game_name)
+        rpc_thread = threading.Thread(target=connect_discord_rpc, daemon=True)
+        rpc_thread.start()
+
+    if is_custom_game:
+        store.increment(exe_path, "launchCount", 1)
+        store.update(exe_path, isRunning=True)
+        store.save()
+        game_data = store.get(exe_path)
     else:
-        with open(games_json_path, "r") as f:
-            games_data = json.load(f)
-        for game in games_data["games"]:
-            if game["executable"] == exe_path:
-                if "launchCount" not in game:
-                    game["launchCount"] = 0
-                game["launchCount"] += 1
-                game["isRunning"] = True
-                break
-        with open(games_json_path, "w") as f:
-            json.dump(games_data, f, indent=4)
+        state = StateFile(json_file_path)
+        game_data = state.data
+        if game_data:
+            state.increment("launchCount", 1)
+            state.set("isRunning", True)
+            try:
+                state.commit()
+            except Exception as e:
+                logging.error(f"Error updating launch count: {e}")
 
     try:
-        with open(settings_file, "r") as f:
-            settings_data = json.load(f)
-        if "runningGames" not in settings_data:
-            settings_data["runningGames"] = {}
-        settings_data["runningGames"][game_name] = exe_path
-        with open(settings_file, "w") as f:
-            json.dump(settings_data, f, indent=4)
+        # Only our runningGames entry is merged, changes main.js made since the read are kept
+        if settings:
+            settings.setdefault("runningGames", {})[game_name] = exe_path
+            write_json(settings_file, settings)
     except Exception as e:
         logging.error(f"Error updating settings.json: {e}")
 
+    tracker = None
+    priority_manager = None
     try:
-        if os.path.dirname(exe_path):
-            os.chdir(os.path.dirname(exe_path))
-        
-        process = subprocess.Popen(exe_path)
-        start_time = time.time()
-        last_update = start_time
-        last_play_time = 0
-
-        while process.poll() is None:
-            current_time = time.time()
-            elapsed = int(current_time - last_update)
-            if elapsed >= 1:
-                last_play_time = elapsed
-                if is_custom_game and games_json_path:
-                    update_play_time(games_json_path, True, game_entry)
-                elif json_file_path:
-                    update_play_time(json_file_path, False)
-                last_update = current_time
-            time.sleep(0.1)
-
-        process.wait()
-        return_code = process.returncode
+        wait_for_imports()
+        # Runs after this launch marked the game running, so its own flag must survive
+        recover_play_time(exe_path)
+
+        # Per-game launchPriority overrides the global gamePriorityBoost setting
+        priority_options = game_data.get("launchPriority") or {}
+        if priority_options.get("enabled", settings.get('gamePriorityBoost', False)):
+            priority_manager = PriorityManager(priority_options, settings.get('gamingMode', True))
+
+        tracker = PlaytimeTracker(games_json_path if is_custom_game else json_file_path, is_custom_game, exe_path, store)
+        tracker.start()
+        monitors = [warmup]
+        if priority_manager:
+            monitors.append(priority_manager)
+        recorder = None
+        if settings.get('gameTelemetry', False):
+            recorder = TelemetryRecorder(tracker.session_id, settings.get('gameTelemetryInterval', 2.0))
+            recorder.start()
+            monitors.append(recorder)
+
+        asyncio.run(ProcessSupervisor(process).run(tracker, monitors))
+        warmup.save()
 
+        # Final playtime flush also clears the running flag and stores the session summary
+        final_updates = {"isRunning": False}
+        summary = recorder.stop(tracker.end_time) if recorder else None
+        if summary:
+            if is_custom_game:
+                history = store.get(exe_path).get("sessionStats", [])
+            else:
+                history = read_json(json_file_path).get("sessionStats", [])
+            final_updates["sessionStats"] = (history + [summary])[-TelemetryRecorder.SUMMARY_HISTORY:]
+        tracker.stop(final_updates)
+
+    except Exception as e:
+        # The game is already running at this point, only our bookkeeping failed
+        logging.error(f"Failed to monitor game: {e}")
+        launch_crash_reporter(1, str(e))
+        try:
+            if tracker is not None:
+                tracker.stop({"isRunning": False})
+            else:
+                add_play_time(games_json_path if is_custom_game else json_file_path, is_custom_game, exe_path, 0,
+                              {"isRunning": False}, store)
+        except Exception as cleanup_error:
+            logging.error(f"Failed to clear running state: {cleanup_error}")
+    finally:
+        if priority_manager is not None:
+            try:
+                priority_manager.restore()
+            except Exception as e:
+                logging.error(f"Failed to restore priorities: {e}")
+        # A stale runningGames entry would keep every download throttled
         try:
-            with open(settings_file, 'r') as f:
-                settings_data = json.load(f)
-            if 'runningGames' in settings_data:
-                if game_name in settings_data['runningGames']:
-                    del settings_data['runningGames'][game_name]
-            with open(settings_file, 'w') as f:
-                json.dump(settings_data, f, indent=4)
+            with StateFile(settings_file) as state:
+                state.delete(("runningGames", game_name))
         except Exception as e:
             logging.error(f"Error updating settings.json on exit: {e}")
 
-        if is_custom_game and games_json_path:
-            with open(games_json_path, "r") as f:
-                data = json.load(f)
-            for game in data["games"]:
-                if game["executable"] == exe_path:
-                    if last_play_time < 1 and "playTime" in game:
-                        game["playTime"] = max(0, game["playTime"] - 1)
-                    game["isRunning"] = False
-                    break
-            with open(games_json_path, "w") as f:
-                json.dump(data, f, indent=4)
-        elif json_file_path:
-            with open(json_file_path, "r") as f:
-                data = json.load(f)
-            if last_play_time < 1:
-                data["playTime"] = max(0, data["playTime"] - 1)
-            data["isRunning"] = False
-            with open(json_file_path, "w") as f:
-                json.dump(data, f, indent=4)
-
-        if is_shortcut and rpc:
-            clear_discord_presence(rpc)
-
-    except Exception as e:
-        if is_custom_game and games_json_path:
-            update_launch_count(games_json_path, False)
-            with open(games_json_path, "r") as f:
-                data = json.load(f)
-            for game in data["games"]:
-                if game["executable"] == exe_path:
-                    game["isRunning"] = False
-                    break
-            with open(games_json_path, "w") as f:
-                json.dump(data, f, indent=4)
-        elif json_file_path:
-            update_launch_count(json_file_path, False)
-            with open(json_file_path, "r") as f:
-                data = json.load(f)
-            data["isRunning"] = False
-            with open(json_file_path, "w") as f:
-                json.dump(data, f, indent=4)
-        
-        logging.error(f"Failed to execute game: {e}")
-        atexit.register(launch_crash_reporter, 1, str(e))
+    if rpc_thread is not None:
+        rpc_thread.join(timeout=5)
+        clear_discord_presence(rpc.get("client"))
 
 if __name__ == "__main__":
     # The script is called with: [script] [game_path] [is_custom_game] [--shortcut]
@@ -308,9 +1048,10 @@ if __name__ == "__main__":
     # Configure logging
     log_file = os.path.join(os.path.dirname(__file__), 'gamehandler.log')
     logging.basicConfig(filename=log_file, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    set_crash_context(logFile=log_file)
 
     try:
         execute(game_path, is_custom_game, is_shortcut)
     except Exception as e:
         logging.error(f"Failed to execute game: {e}")
-        atexit.register(launch_crash_reporter, 1, str(e))
+        launch_crash_reporter(1, str(e))
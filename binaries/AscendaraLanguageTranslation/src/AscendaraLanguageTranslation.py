@@ -12,17 +12,31 @@
 
 import json
 import os
+import re
 import sys
 import time
+import gzip
+import hashlib
 import logging
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
-import subprocess
 import atexit
 from typing import Dict, Any
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from AscendaraState import StateFile, atomic_write, read_json, replace_json
+from AscendaraCrash import launch_reporter, spool_crash
+
+# Brotli is optional, bundles always get a gzip sibling
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Rate limiting setup - 8 requests per second
@@ -33,44 +47,79 @@ class RateLimiter:
         self.lock = Lock()
 
     def wait(self):
+        # Reserve a slot under the lock and sleep outside it, so other threads can
+        # reserve the following slots in the meantime
         with self.lock:
             now = time.time()
             # Remove requests older than 1 second
             while self.last_requests and now - self.last_requests[0] >= 1.0:
                 self.last_requests.popleft()
-            
+
             # If we haven't hit the limit, proceed immediately
             if len(self.last_requests) < self.last_requests.maxlen:
                 self.last_requests.append(now)
                 return
-            
-            # Otherwise, wait until we can make another request
-            sleep_time = 1.0 - (now - self.last_requests[0])
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-            self.last_requests.append(time.time())
+
+            # Otherwise take the slot that frees up one second after the oldest request
+            slot = self.last_requests[0] + 1.0
+            self.last_requests.append(slot)
+        sleep_time = slot - time.time()
+        if sleep_time > 0:
+            time.sleep(sleep_time)
 
 # Global rate limiter
 rate_limiter = RateLimiter(8)
 
-def _launch_crash_reporter_on_exit(error_code, error_message):
+# Requests kept in flight so request latency does not eat into the rate budget
+TRANSLATION_WORKERS = 6
+
+# Endpoints, scripts/benchmark_translator.py points them at scripts/mock_translation_server.py
+TRANSLATE_URL = 'https://translate.google.com/translate_a/single'
+LANGUAGE_API_URL = 'https://api.ascendara.app/language'
+
+# Rate limited and transient server errors are retried with backoff
+RETRY_STATUSES = (429, 500, 502, 503)
+REQUEST_ATTEMPTS = 3
+RETRY_BACKOFF = 1.0  # seconds, doubled per attempt unless the server sends Retry-After
+
+def create_session(pool_size=TRANSLATION_WORKERS):
+    """Keep-alive session with a connection per worker, shared by all requests"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+session = create_session()
+
+# Batching - many strings share one request, each preceded by a numbered marker line
+BATCH_CHAR_BUDGET = 3000  # source characters per request, keeps the GET URL well under limits
+BATCH_MAX_STRINGS = 100
+SEGMENT_MARKER = "[[{}]]"
+SEGMENT_PATTERN = re.compile(r"\[\s*\[\s*(\d+)\s*\]\s*\]")
+
+TRANSLATION_PROVIDER = "google-gtx"
+MEMORY_VERSION = 1
+
+# Precompiled language bundles (--bundle)
+BUNDLE_VERSION = 1
+BUNDLE_INDEX_NAME = "bundles.ascendara.json"
+
+# Hashes of the English each language file was translated from, for --updateKeys diffs
+SOURCE_SNAPSHOT_SUFFIX = ".source.ascendara.json"
+SOURCE_SNAPSHOT_VERSION = 1
+
+def _launch_crash_reporter_on_exit():
     try:
-        crash_reporter_path = os.path.join('./AscendaraCrashReporter.exe')
-        if os.path.exists(crash_reporter_path):
-            # Use subprocess.Popen with CREATE_NO_WINDOW flag to hide console
-            subprocess.Popen(
-                [crash_reporter_path, "languagetranslation", str(error_code), error_message],
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-        else:
-            logging.error(f"Crash reporter not found at: {crash_reporter_path}")
+        launch_reporter()
     except Exception as e:
         logging.error(f"Failed to launch crash reporter: {e}")
 
 def launch_crash_reporter(error_code, error_message):
-    """Register the crash reporter to launch on exit with the given error details"""
+    """Spool the error and register the crash reporter to open on exit"""
+    spool_crash("languagetranslation", error_code, error_message)
     if not hasattr(launch_crash_reporter, "_registered"):
-        atexit.register(_launch_crash_reporter_on_exit, error_code, error_message)
+        atexit.register(_launch_crash_reporter_on_exit)
         launch_crash_reporter._registered = True
 
 def get_window_tkk():
@@ -82,7 +131,7 @@ def get_window_tkk():
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
         }
-        response = requests.get('https://translate.google.com', headers=headers, timeout=10)
+        response = session.get('https://translate.google.com', headers=headers, timeout=10)
         response.raise_for_status()
         # Extract TKK from response
         code = response.text
@@ -157,60 +206,224 @@ def generate_token(text):
 
     return f"{a}.{a ^ b}"
 
+# Progress file writes - main.js polls the file, it only needs a few updates per second
+PROGRESS_MIN_INTERVAL = 0.25  # seconds between writes for a visible progress change
+PROGRESS_MAX_INTERVAL = 1.0  # seconds after which any pending change is written
+
 class TranslationProgress:
-    def __init__(self, language_code):
+    """Progress of one run over one or more target languages.
+
+    The top level fields describe the whole run, so a single language run writes
+    the same document as before; "languages" holds the state of each target.
+    Counter updates only touch memory. The file is rewritten atomically when the
+    phase or language changes, when the rounded progress moved and
+    PROGRESS_MIN_INTERVAL passed, or when PROGRESS_MAX_INTERVAL passed with any
+    change pending.
+    """
+
+    def __init__(self, language_codes):
+        if isinstance(language_codes, str):
+            language_codes = [language_codes]
         self.progress_file = os.path.join(os.path.expanduser("~"), "translation_progress.ascendara.json")
-        self.language_code = language_code
+        self.language_codes = list(language_codes)
+        self.language_code = self.language_codes[0]
         self.lock = Lock()
-        self.total_strings = 0
-        self.translated_strings = 0
+        self.write_lock = Lock()
+        self.languages = {code: {"phase": "pending", "total": 0, "translated": 0} for code in self.language_codes}
         self.current_phase = "initializing"
-        self._update_progress()
-    
-    def _update_progress(self):
-        """Write progress to file with thread safety"""
+        self.pending = False
+        self.sequence = 0
+        self.written_sequence = -1
+        self.written_progress = None
+        self.written_at = 0.0
+        self.writes = 0
+        self._update_progress(force=True)
+
+    @property
+    def total_strings(self):
+        return self.languages[self.language_code]["total"]
+
+    @total_strings.setter
+    def total_strings(self, value):
+        self.languages[self.language_code]["total"] = value
+
+    @property
+    def translated_strings(self):
+        return self.languages[self.language_code]["translated"]
+
+    @staticmethod
+    def _fraction(state):
+        if state["phase"] == "completed":
+            return 1.0
+        return min(1.0, state["translated"] / max(1, state["total"]))
+
+    def _document(self):
+        # Every language weighs the same, a --updateKeys run only learns a language's
+        # total once it gets to it
+        fractions = {code: self._fraction(state) for code, state in self.languages.items()}
+        return {
+            "languageCode": self.language_code if len(self.language_codes) == 1 else ",".join(self.language_codes),
+            "currentLanguage": self.language_code,
+            "phase": self.current_phase,
+            "progress": round(sum(fractions.values()) / len(fractions), 2),
+            "languages": {
+                code: {
+                    "phase": state["phase"],
+                    "progress": round(fractions[code], 2)
+                }
+                for code, state in self.languages.items()
+            },
+            "timestamp": time.time()
+        }
+
+    def _update_progress(self, force=False):
+        """Write progress to file when the throttle allows it, or always with force"""
         with self.lock:
-            progress = {
-                "languageCode": self.language_code,
-                "phase": self.current_phase,
-                "progress": round(self.translated_strings / max(1, self.total_strings), 2),
-                "timestamp": time.time()
-            }
+            self.pending = True
+            progress = self._document()
+            elapsed = progress["timestamp"] - self.written_at
+            if not force and elapsed < PROGRESS_MAX_INTERVAL and (
+                    elapsed < PROGRESS_MIN_INTERVAL or progress["progress"] == self.written_progress):
+                return
+            self.sequence += 1
+            sequence = self.sequence
+            self.pending = False
+            self.written_progress = progress["progress"]
+            self.written_at = progress["timestamp"]
+
+        # Serialise and write outside the state lock, a newer snapshot wins
+        with self.write_lock:
+            if sequence < self.written_sequence:
+                return
             try:
-                with open(self.progress_file, 'w', encoding='utf-8') as f:
-                    json.dump(progress, f)
+                replace_json(self.progress_file, progress)
+                self.written_sequence = sequence
+                self.writes += 1
             except Exception as e:
                 logging.error(f"Error writing progress: {str(e)}")
 
-    def set_phase(self, phase):
-        """Update the current translation phase"""
-        self.current_phase = phase
-        self._update_progress()
+    def flush(self):
+        """Write any change the throttle held back, phase and language changes always write"""
+        if self.pending:
+            self._update_progress(force=True)
 
-    def count_string(self):
-        """Increment total string count"""
-        self.total_strings += 1
-        self._update_progress()
+    def set_language(self, language_code):
+        """Make language_code the target the following updates apply to"""
+        with self.lock:
+            self.language_code = language_code
+        self._update_progress(force=True)
+
+    def set_phase(self, phase, language_phase=None):
+        """Update the phase of the run and of the current language"""
+        with self.lock:
+            self.current_phase = phase
+            self.languages[self.language_code]["phase"] = language_phase or phase
+        self._update_progress(force=True)
+
+    def set_total(self, total):
+        """Set the string count of every target language"""
+        with self.lock:
+            for state in self.languages.values():
+                state["total"] = total
+        self._update_progress(force=True)
 
     def mark_translated(self):
-        """Mark a string as translated"""
-        self.translated_strings += 1
+        """Mark a string of the current language as translated"""
+        with self.lock:
+            self.languages[self.language_code]["translated"] += 1
         self._update_progress()
 
-def count_strings(d, progress):
-    """Count total number of strings in a nested dictionary"""
-    for value in d.values():
+class TranslationMemory:
+    """On-disk translation memory shared by every run and language.
+
+    Entries are keyed by target language and a hash of the English source text and
+    hold the translation with where and when it came from. Only successful
+    translations are stored, so a failed request is retried on the next run.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(os.path.expanduser("~"), "translation_memory.ascendara.json")
+        self.lock = Lock()
+        self.entries = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        document = read_json(self.path)
+        if document.get("version") == MEMORY_VERSION:
+            self.entries = document.get("entries", {})
+        logging.debug(f"Loaded {len(self.entries)} translation memory entries from {self.path}")
+
+    @staticmethod
+    def source_hash(text):
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    @classmethod
+    def _key(cls, text, target_lang):
+        return f"{target_lang}:{cls.source_hash(text)}"
+
+    def get(self, text, target_lang):
+        entry = self.entries.get(self._key(text, target_lang))
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry["text"]
+
+    def put(self, text, target_lang, translation, provider=TRANSLATION_PROVIDER):
+        with self.lock:
+            self.entries[self._key(text, target_lang)] = {
+                "text": translation,
+                "provider": provider,
+                "time": int(time.time())
+            }
+            self.dirty = True
+
+    def evict(self, sources):
+        """Drop entries whose English source is no longer in sources, for every language"""
+        alive = {self.source_hash(text) for text in sources}
+        with self.lock:
+            stale = [key for key in self.entries if key.split(':', 1)[1] not in alive]
+            for key in stale:
+                del self.entries[key]
+            if stale:
+                self.dirty = True
+        if stale:
+            logging.info(f"Evicted {len(stale)} translation memory entries with no English source left")
+        return len(stale)
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            document = {"version": MEMORY_VERSION, "entries": self.entries}
+            try:
+                replace_json(self.path, document)
+                self.dirty = False
+            except Exception as e:
+                logging.error(f"Error saving translation memory: {str(e)}")
+
+def flatten(d, prefix=""):
+    """Dotted key -> string table of a nested dictionary"""
+    table = {}
+    for key, value in d.items():
+        dotted = f"{prefix}.{key}" if prefix else key
         if isinstance(value, dict):
-            count_strings(value, progress)
+            table.update(flatten(value, dotted))
         elif isinstance(value, str):
-            progress.count_string()
+            table[dotted] = value
+    return table
 
-def translate_text(text, target_lang):
-    """Translate text using Google Translate web API"""
-    if not text.strip():
-        return text
+def iter_strings(d):
+    """Every string value of a nested dictionary"""
+    for value in d.values():
+        if isinstance(value, dict):
+            yield from iter_strings(value)
+        elif isinstance(value, str):
+            yield value
 
-    url = 'https://translate.google.com/translate_a/single'
+def _request_translation(text, target_lang):
+    """One Google Translate web API request, returns the translated text"""
     params = {
         'client': 'gtx',
         'sl': 'en',
@@ -235,54 +448,167 @@ def translate_text(text, target_lang):
         'Referer': 'https://translate.google.com/'
     }
 
-    try:
+    for attempt in range(REQUEST_ATTEMPTS):
         # Apply rate limiting
         rate_limiter.wait()
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        result = response.json()
-        
-        if isinstance(result, list) and result and isinstance(result[0], list):
-            translation = ''
-            for item in result[0]:
-                if item and isinstance(item, list) and item[0]:
-                    translation += item[0]
-            return translation
-        else:
-            logging.warning(f"Unexpected response format: {result}")
-            return text  # Return original text if translation fails
-            
+        response = session.get(TRANSLATE_URL, params=params, headers=headers, timeout=10)
+        if response.status_code not in RETRY_STATUSES or attempt == REQUEST_ATTEMPTS - 1:
+            break
+        try:
+            delay = float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            delay = RETRY_BACKOFF * (2 ** attempt)
+        logging.warning(f"Translate request returned {response.status_code}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+    response.raise_for_status()
+    result = response.json()
+
+    if isinstance(result, list) and result and isinstance(result[0], list):
+        translation = ''
+        for item in result[0]:
+            if item and isinstance(item, list) and item[0]:
+                translation += item[0]
+        return translation
+    raise ValueError(f"Unexpected response format: {str(result)[:200]}")
+
+def _translate_one(text, target_lang):
+    """Translate one string, None when the request failed"""
+    try:
+        return _request_translation(text, target_lang)
     except Exception as e:
         logging.error(f"Translation error for text '{text[:50]}...': {str(e)}")
-        return text  # Return original text if translation fails
+        return None
+
+def _restore_whitespace(source, translated):
+    """Markers are on their own lines, so give a segment back the source's outer whitespace"""
+    stripped = source.strip()
+    if not stripped:
+        return source
+    start = source.index(stripped)
+    return source[:start] + translated.strip() + source[start + len(stripped):]
+
+def translate_batch(texts, target_lang):
+    """Translate several strings in one request, None when the segments do not come back intact"""
+    payload = "\n".join(f"{SEGMENT_MARKER.format(i)}\n{text.strip()}" for i, text in enumerate(texts))
+    try:
+        translation = _request_translation(payload, target_lang)
+    except Exception as e:
+        logging.error(f"Batch translation error for {len(texts)} strings: {str(e)}")
+        return None
+
+    parts = SEGMENT_PATTERN.split(translation)
+    # parts is [text before the first marker, index, segment, index, segment, ...]
+    indices = parts[1::2]
+    if parts[0].strip() or [int(i) for i in indices] != list(range(len(texts))):
+        logging.warning(f"Batch of {len(texts)} strings came back with {len(indices)} segments, "
+                        f"translating them one by one")
+        return None
+    return [_restore_whitespace(text, segment) for text, segment in zip(texts, parts[2::2])]
+
+def make_batches(texts):
+    """Group strings into batches under the character and string budgets, keeping their order"""
+    batches = []
+    current = []
+    size = 0
+    for text in texts:
+        cost = len(text) + len(SEGMENT_MARKER.format(len(current))) + 2
+        if current and (size + cost > BATCH_CHAR_BUDGET or len(current) >= BATCH_MAX_STRINGS):
+            batches.append(current)
+            current = []
+            size = 0
+        current.append(text)
+        size += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _translate_batch_or_each(batch, target_lang):
+    translated = translate_batch(batch, target_lang) if len(batch) > 1 else None
+    if translated is None:
+        translated = [_translate_one(text, target_lang) for text in batch]
+    return translated
+
+def translate_texts(texts, target_lang, progress=None, memory=None, workers=TRANSLATION_WORKERS, executor=None):
+    """Translate a list of strings with as few requests as possible, results in input order.
+
+    Each distinct string is looked up in the translation memory first and only
+    requested once per run. Batches whose segments do not match fall back to one
+    request per string. Batches run on a pool of workers sharing the rate limiter,
+    their results are applied in submission order so output and progress do not
+    depend on which request finishes first. A multi-language run passes one
+    executor for all of its languages.
+    """
+    results = list(texts)
+    positions = {}  # distinct source string -> indices in texts
+    for i, text in enumerate(texts):
+        if text.strip():
+            positions.setdefault(text, []).append(i)
 
-def translate_dict(d, target_lang, progress):
+    def resolve(source, translated):
+        for index in positions[source]:
+            results[index] = translated
+            if progress:
+                progress.mark_translated()
+
+    pending = []
+    for source in positions:
+        cached = memory.get(source, target_lang) if memory else None
+        if cached is None:
+            pending.append(source)
+        else:
+            resolve(source, cached)
+    if memory and positions:
+        logging.info(f"{len(positions) - len(pending)} of {len(positions)} distinct strings "
+                     f"found in translation memory")
+
+    batches = make_batches(pending)
+    if not batches:
+        return results
+    owned = executor is None
+    if owned:
+        executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches))))
+    try:
+        for batch, translated in zip(batches, executor.map(
+                lambda batch: _translate_batch_or_each(batch, target_lang), batches)):
+            for source, text in zip(batch, translated):
+                if text is None:
+                    # Keep the English text, it is retried on the next run
+                    for index in positions[source]:
+                        results[index] = source
+                    continue
+                if memory:
+                    memory.put(source, target_lang, text)
+                resolve(source, text)
+    finally:
+        if owned:
+            executor.shutdown()
+    return results
+
+def translate_dict(d, target_lang, progress, memory=None, workers=TRANSLATION_WORKERS, executor=None):
     """Recursively translate all string values in a dictionary"""
     result = {}
-    
+    slots = []  # (output dict, key, source string) in breadth-first order
+
     # Use a queue for breadth-first traversal to maintain a more predictable progress
-    queue = deque([([], d, result)])
-    
+    queue = deque([(d, result)])
+
     while queue:
-        path, current_dict, output_dict = queue.popleft()
-        
+        current_dict, output_dict = queue.popleft()
+
         for key, value in current_dict.items():
             if isinstance(value, dict):
                 output_dict[key] = {}
-                queue.append((path + [key], value, output_dict[key]))
+                queue.append((value, output_dict[key]))
             elif isinstance(value, str):
-                try:
-                    translated = translate_text(value, target_lang)
-                    output_dict[key] = translated
-                    if translated != value:  # Only count if actually translated
-                        progress.mark_translated()
-                    logging.debug(f"Translated '{value[:30]}...' -> '{translated[:30]}...'")
-                except Exception as e:
-                    logging.error(f"Translation error for {'.'.join(path + [key])}: {str(e)}")
-                    output_dict[key] = value
+                output_dict[key] = value
+                slots.append((output_dict, key, value))
             else:
                 output_dict[key] = value
-    
+
+    translated = translate_texts([value for _, _, value in slots], target_lang, progress, memory, workers, executor)
+    for (output_dict, key, _), text in zip(slots, translated):
+        output_dict[key] = text
+
     return result
 
 def get_english_translations():
@@ -294,7 +620,7 @@ def get_english_translations():
             'Accept': '*/*',
         }
         logging.debug("Fetching English translations from API...")
-        response = requests.get('https://api.ascendara.app/language/en', headers=headers, timeout=10)
+        response = session.get(f'{LANGUAGE_API_URL}/en', headers=headers, timeout=10)
         logging.debug(f"API Response status: {response.status_code}")
         response.raise_for_status()
         data = response.json()
@@ -316,233 +642,388 @@ def get_base_path():
         logging.debug(f"Running from script: {base_path}")
     return base_path
 
-def save_translations(translations, output_path):
-    """Save translations to a JSON file"""
+def resolve_output_path(language_code, output, language_count=1):
+    """Output file of a language; with several languages --output names a directory"""
+    if output:
+        return output if language_count == 1 else os.path.join(output, f"{language_code}.json")
+    base_path = get_base_path()
+    languages_dir = os.path.join(base_path, "..", "languages")
+    logging.debug(f"Languages dir: {languages_dir}")
+    return os.path.join(languages_dir, f"{language_code}.json")
+
+def storage_path(output_path):
+    """Where save_translations puts output_path, relative paths go to AppData Local"""
+    if os.path.isabs(output_path):
+        return output_path
+    # Use AppData Local for translations
+    appdata_path = os.path.expandvars(r"%LOCALAPPDATA%\Ascendara")
+    return os.path.join(appdata_path, os.path.basename(output_path))
+
+def source_snapshot_path(output_path):
+    return os.path.splitext(storage_path(output_path))[0] + SOURCE_SNAPSHOT_SUFFIX
+
+def load_source_snapshot(output_path):
+    """Dotted key -> hash of the English a language file was translated from, None without one"""
+    document = read_json(source_snapshot_path(output_path))
+    return document.get("sources") if document.get("version") == SOURCE_SNAPSHOT_VERSION else None
+
+def source_hashes(en_flat, translated_flat):
+    """Snapshot of the English behind translated_flat.
+
+    Keys still holding the English text get an empty hash, so the next diff looks at
+    them again; one that really translates to itself is then a translation memory hit.
+    """
+    return {
+        key: TranslationMemory.source_hash(text)
+        if key in translated_flat and translated_flat[key] != text else ""
+        for key, text in en_flat.items()
+    }
+
+def diff_keys(en_flat, lang_flat, snapshot):
+    """Added, changed and removed keys of a language file against the current English.
+
+    Keys missing from the language file are added, keys whose English hash differs
+    from the snapshot are changed and keys English no longer has are removed.
+    Without a snapshot only added and removed keys can be found.
+    """
+    added = []
+    changed = []
+    for key, text in en_flat.items():
+        if key not in lang_flat:
+            added.append(key)
+        elif snapshot is not None and snapshot.get(key) is not None \
+                and snapshot[key] != TranslationMemory.source_hash(text):
+            changed.append(key)
+    removed = [key for key in lang_flat if key not in en_flat]
+    return added, changed, removed
+
+def set_key(d, key, value):
+    current = d
+    key_parts = key.split('.')
+    for part in key_parts[:-1]:
+        if not isinstance(current.get(part), dict):
+            current[part] = {}
+        current = current[part]
+    current[key_parts[-1]] = value
+
+def prune_key(d, key):
+    """Remove a dotted key and the sections it leaves empty"""
+    key_parts = key.split('.')
+    parents = []
+    current = d
+    for part in key_parts[:-1]:
+        if not isinstance(current.get(part), dict):
+            return
+        parents.append((current, part))
+        current = current[part]
+    current.pop(key_parts[-1], None)
+    for parent, part in reversed(parents):
+        if parent[part]:
+            break
+        del parent[part]
+
+def write_language_bundle(translations, output_path, language_code):
+    """Write a precompiled bundle of a language next to its file.
+
+    The bundle is minified JSON holding the flattened key -> string table, named
+    {lang}.{content hash}.bundle.json with .gz (and .br when brotli is available)
+    siblings. bundles.ascendara.json maps each language to its current bundle so the
+    UI can cache packs by hash; older bundles of the language are removed.
+    """
+    directory = os.path.dirname(output_path)
+    table = flatten(translations)
+    body = json.dumps({"version": BUNDLE_VERSION, "language": language_code, "strings": table},
+                      ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    content_hash = hashlib.blake2b(body, digest_size=8).hexdigest()
+    name = f"{language_code}.{content_hash}.bundle.json"
+    bundle_path = os.path.join(directory, name)
+
+    atomic_write(bundle_path, body)
+    atomic_write(bundle_path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        atomic_write(bundle_path + ".br", brotli.compress(body, quality=11))
+
+    with StateFile(os.path.join(directory, BUNDLE_INDEX_NAME)) as index:
+        index.set(language_code, {
+            "file": name,
+            "hash": content_hash,
+            "strings": len(table),
+            "bytes": len(body),
+            "compressed": [ext for ext in ("gz", "br") if os.path.exists(f"{bundle_path}.{ext}")],
+            "time": int(time.time())
+        })
+
+    prefix = f"{language_code}."
+    for existing in os.listdir(directory):
+        if existing.startswith(prefix) and ".bundle.json" in existing and not existing.startswith(name):
+            try:
+                os.remove(os.path.join(directory, existing))
+            except OSError as e:
+                logging.warning(f"Could not remove old bundle {existing}: {e}")
+    logging.info(f"Bundle {name} written ({len(table)} strings, {len(body)} bytes)")
+    return bundle_path
+
+def save_translations(translations, output_path, bundle=False, language_code=None, sources=None):
+    """Save translations to a JSON file, and a precompiled bundle with bundle.
+
+    sources is the English snapshot (see source_hashes) stored next to the file for
+    later --updateKeys diffs.
+    """
     try:
         base_path = get_base_path()
-        if not os.path.isabs(output_path):
-            # Use AppData Local for translations
-            appdata_path = os.path.expandvars(r"%LOCALAPPDATA%\Ascendara")
-            output_path = os.path.join(appdata_path, os.path.basename(output_path))
+        snapshot_path = source_snapshot_path(output_path)
+        output_path = storage_path(output_path)
         
         logging.debug(f"Base path: {base_path}")
         logging.debug(f"Saving translations to: {output_path}")
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(translations, f, ensure_ascii=False, indent=2)
-        
-        # Fetch and save language version
-        try:
-            version_response = requests.get('https://api.ascendara.app/language/version', timeout=10)
-            version_response.raise_for_status()
-            version_data = version_response.json()
-            
-            timestamp_path = os.path.join(os.environ['USERPROFILE'], 'timestamp.ascendara.json')
-            
-            timestamp_data = {}
-            if os.path.exists(timestamp_path):
-                with open(timestamp_path, 'r') as f:
-                    timestamp_data = json.load(f)
-            
-            timestamp_data['extraLangVer'] = version_data['version']
-            
-            with open(timestamp_path, 'w') as f:
-                json.dump(timestamp_data, f, indent=2)
-            
-            logging.info(f"Language version {version_data['version']} saved to timestamp file")
-        except Exception as e:
-            logging.error(f"Error saving language version: {str(e)}")
-        
+        replace_json(output_path, translations)
         logging.info(f"Translations saved to {output_path}")
+        if sources is not None:
+            replace_json(snapshot_path, {"version": SOURCE_SNAPSHOT_VERSION, "sources": sources})
+        if bundle:
+            language_code = language_code or os.path.splitext(os.path.basename(output_path))[0]
+            write_language_bundle(translations, output_path, language_code)
     except Exception as e:
         logging.error(f"Error saving translations: {str(e)}")
         raise  # Let the main function handle the error
 
-def main():
-    parser = argparse.ArgumentParser(description='Translate Ascendara language files')
-    parser.add_argument('lang', help='Target language code (e.g., fr, de, es)')
-    parser.add_argument('--output', '-o', help='Output file path', default=None)
-    parser.add_argument('--updateKeys', action='store_true', help='Update specific keys in the language file')
-    parser.add_argument('--newKey', action='append', help='New key to translate (can be specified multiple times)', default=[])
-    args = parser.parse_args()
+def save_language_version():
+    """Fetch the language version and record it in the timestamp file, once per run"""
+    try:
+        version_response = session.get(f'{LANGUAGE_API_URL}/version', timeout=10)
+        version_response.raise_for_status()
+        version_data = version_response.json()
+        
+        timestamp_path = os.path.join(os.environ['USERPROFILE'], 'timestamp.ascendara.json')
+        
+        with StateFile(timestamp_path) as timestamp:
+            timestamp.set('extraLangVer', version_data['version'])
+        
+        logging.info(f"Language version {version_data['version']} saved to timestamp file")
+    except Exception as e:
+        logging.error(f"Error saving language version: {str(e)}")
 
-    logging.info(f"Starting translation to {args.lang}")
-    logging.debug(f"Arguments: {args}")
+def parse_languages(values):
+    """Target languages from the lang arguments, which may also be comma separated"""
+    languages = []
+    for value in values:
+        for code in value.split(','):
+            code = code.strip()
+            if code and code not in languages:
+                languages.append(code)
+    return languages
 
-    try:
-        # Initialize progress tracking
-        progress = TranslationProgress(args.lang)
+def find_missing_keys(keys, existing_translations, en_translations):
+    """English text of every dotted key that has no string translation yet"""
+    to_translate = {}
+    for key in keys:
+        # Check if key already exists in translations
+        current_translated = existing_translations
+        key_parts = key.split('.')
+        exists = False
         
-        if args.updateKeys:
-            # Handle specific key updates
-            logging.info(f"Updating specific keys: {args.newKey}")
-            try:
-                # Load existing translations if available
-                base_path = get_base_path()
-                # Go up one level from dist and into languages directory
-                languages_dir = os.path.join(base_path, "..", "languages")
-                output_path = args.output or os.path.join(languages_dir, f"{args.lang}.json")
-                
-                logging.debug(f"Base path: {base_path}")
-                logging.debug(f"Languages dir: {languages_dir}")
-                logging.debug(f"Using output path: {output_path}")
-                
-                existing_translations = {}
-                if os.path.exists(output_path):
-                    try:
-                        with open(output_path, 'r', encoding='utf-8') as f:
-                            existing_translations = json.load(f)
-                            logging.info(f"Loaded existing translations from {output_path}")
-                    except Exception as e:
-                        logging.error(f"Error loading existing translations: {e}")
-                        existing_translations = {}
-
-                # Get English translations for reference
-                en_translations = get_english_translations()
-                
-                # Extract values for the specified keys
-                to_translate = {}
-                for key in args.newKey:
-                    # Check if key already exists in translations
-                    current_translated = existing_translations
-                    current_en = en_translations
-                    key_parts = key.split('.')
+        # Debug log the current state
+        logging.debug(f"Checking key: {key}")
+        logging.debug(f"Key parts: {key_parts}")
+        
+        # Check if key exists in current translations
+        try:
+            for i, part in enumerate(key_parts):
+                logging.debug(f"Checking part {i}: {part}")
+                if part not in current_translated:
+                    logging.debug(f"Part {part} not found in translations")
                     exists = False
-                    
-                    # Debug log the current state
-                    logging.debug(f"Checking key: {key}")
-                    logging.debug(f"Key parts: {key_parts}")
-                    
-                    # Check if key exists in current translations
-                    try:
-                        for i, part in enumerate(key_parts):
-                            logging.debug(f"Checking part {i}: {part}")
-                            if part not in current_translated:
-                                logging.debug(f"Part {part} not found in translations")
-                                exists = False
-                                break
-                            current_translated = current_translated[part]
-                            if i == len(key_parts) - 1:  # Last part
-                                if isinstance(current_translated, str):
-                                    exists = True
-                                    logging.debug(f"Found complete key with value: {current_translated[:30]}...")
-                                else:
-                                    exists = False
-                                    logging.debug(f"Found key but value is not a string: {type(current_translated)}")
-                    except (KeyError, TypeError) as e:
+                    break
+                current_translated = current_translated[part]
+                if i == len(key_parts) - 1:  # Last part
+                    if isinstance(current_translated, str):
+                        exists = True
+                        logging.debug(f"Found complete key with value: {current_translated[:30]}...")
+                    else:
                         exists = False
-                        logging.debug(f"Error checking key existence: {str(e)}")
-                    
-                    # Get English value and translate if key doesn't exist
-                    try:
-                        current = en_translations
-                        for part in key_parts:
-                            current = current[part]
-                        if isinstance(current, str):
-                            if not exists:
-                                to_translate[key] = current
-                                logging.info(f"Will translate missing key: {key}")
-                            else:
-                                logging.info(f"Key exists with valid value, skipping: {key}")
-                        else:
-                            logging.warning(f"English key exists but is not a string: {type(current)}")
-                    except (KeyError, TypeError) as e:
-                        logging.warning(f"Key not found in English translations: {key} ({str(e)})")
-                        continue
-                if to_translate:
-                    # Translate the missing keys
-                    progress.total_strings = len(to_translate)
-                    translated_values = {}
-                    for key, value in to_translate.items():
-                        translated = translate_text(value, args.lang)
-                        translated_values[key] = translated
-                        progress.mark_translated()
-                        logging.info(f"Translated {key}: {value[:30]}... -> {translated[:30]}...")
-
-                    # Update the existing translations with new values
-                    for key, value in translated_values.items():
-                        current = existing_translations
-                        key_parts = key.split('.')
-                        for part in key_parts[:-1]:
-                            if part not in current:
-                                current[part] = {}
-                            current = current[part]
-                        current[key_parts[-1]] = value
-
-                    # Save updated translations
-                    save_translations(existing_translations, output_path)
-                    progress.set_phase("completed")
-                    logging.info("Translation of specific keys completed successfully!")
+                        logging.debug(f"Found key but value is not a string: {type(current_translated)}")
+        except (KeyError, TypeError) as e:
+            exists = False
+            logging.debug(f"Error checking key existence: {str(e)}")
+        
+        # Get English value and translate if key doesn't exist
+        try:
+            current = en_translations
+            for part in key_parts:
+                current = current[part]
+            if isinstance(current, str):
+                if not exists:
+                    to_translate[key] = current
+                    logging.info(f"Will translate missing key: {key}")
                 else:
-                    logging.info("No new keys to translate")
-                return
+                    logging.info(f"Key exists with valid value, skipping: {key}")
+            else:
+                logging.warning(f"English key exists but is not a string: {type(current)}")
+        except (KeyError, TypeError) as e:
+            logging.warning(f"Key not found in English translations: {key} ({str(e)})")
+            continue
+    return to_translate
+
+def update_keys(languages, args, progress, memory, executor):
+    """Bring each language file up to date with the current English.
+
+    With --newKey only the listed keys that are missing get translated. Without it
+    the language file is diffed against the English snapshot saved with it: added
+    and changed keys are translated and removed keys are pruned.
+    """
+    if args.newKey:
+        logging.info(f"Updating specific keys: {args.newKey}")
+    else:
+        logging.info("Updating keys that changed since the last translation")
+
+    # Get English translations for reference, once for every language
+    en_translations = get_english_translations()
+    memory.evict(iter_strings(en_translations))
+    en_flat = flatten(en_translations)
+
+    for lang in languages:
+        progress.set_language(lang)
+        # Load existing translations if available
+        output_path = resolve_output_path(lang, args.output, len(languages))
+        logging.debug(f"Using output path: {output_path}")
 
+        existing_translations = {}
+        if os.path.exists(output_path):
+            try:
+                with open(output_path, 'r', encoding='utf-8') as f:
+                    existing_translations = json.load(f)
+                    logging.info(f"Loaded existing translations from {output_path}")
             except Exception as e:
-                logging.error(f"Failed to update specific keys: {e}")
-                launch_crash_reporter(1, str(e))
-                sys.exit(1)
+                logging.error(f"Error loading existing translations: {e}")
+                existing_translations = {}
+
+        snapshot = load_source_snapshot(output_path)
+        if args.newKey:
+            to_translate = find_missing_keys(args.newKey, existing_translations, en_translations)
+            removed = []
+        else:
+            added, changed, removed = diff_keys(en_flat, flatten(existing_translations), snapshot)
+            to_translate = {key: en_flat[key] for key in added + changed}
+            logging.info(f"{lang}: {len(added)} added, {len(changed)} changed and {len(removed)} removed keys")
+        if not to_translate and not removed:
+            logging.info(f"No new keys to translate for {lang}")
+            if snapshot is None and not args.newKey and existing_translations:
+                # Seed the snapshot, the file is taken to match the current English
+                replace_json(source_snapshot_path(output_path), {
+                    "version": SOURCE_SNAPSHOT_VERSION,
+                    "sources": source_hashes(en_flat, flatten(existing_translations))
+                })
+            progress.set_phase("translating", "completed")
+            continue
+
+        # Translate the missing keys
+        progress.total_strings = len(to_translate)
+        progress.set_phase("translating")
+        translated_values = dict(zip(to_translate, translate_texts(
+            list(to_translate.values()), lang, memory=memory, workers=args.workers, executor=executor)))
+        for key, value in to_translate.items():
+            progress.mark_translated()
+            logging.info(f"Translated {key}: {value[:30]}... -> {translated_values[key][:30]}...")
+
+        # Update the existing translations with new values
+        for key, value in translated_values.items():
+            set_key(existing_translations, key, value)
+        for key in removed:
+            prune_key(existing_translations, key)
+
+        if args.newKey:
+            # Other keys were not looked at, only the translated ones move to the current English
+            sources = dict(snapshot or {})
+            sources.update(source_hashes({key: en_flat[key] for key in translated_values}, translated_values))
+        else:
+            sources = source_hashes(en_flat, flatten(existing_translations))
+
+        # Save updated translations
+        progress.set_phase("saving")
+        save_translations(existing_translations, output_path, args.bundle, lang, sources)
+        progress.set_phase("translating", "completed")
+        logging.info(f"Translation of specific keys to {lang} completed successfully!")
+
+    save_language_version()
+
+def translate_languages(languages, args, progress, memory, executor):
+    """Full translation of every target language from one English fetch"""
+    # Get English translations
+    progress.set_phase("fetching")
+    logging.info("Fetching English translations...")
+    en_translations = get_english_translations()
+
+    # Count total strings
+    progress.set_phase("analyzing")
+    logging.info("Analyzing translation scope...")
+    en_flat = flatten(en_translations)
+    total = len(en_flat)
+    progress.set_total(total)
+    logging.debug(f"Found {total} strings to translate")
+    memory.evict(en_flat.values())
+
+    for lang in languages:
+        progress.set_language(lang)
 
-        # Regular full translation flow
-        # Initialize progress tracking
-        progress = TranslationProgress(args.lang)
-        
-        # Get English translations
-        progress.set_phase("fetching")
-        logging.info("Fetching English translations...")
-        try:
-            en_translations = get_english_translations()
-        except Exception as e:
-            logging.error(f"Failed to fetch English translations: {e}")
-            launch_crash_reporter(1, str(e))
-            sys.exit(1)
-        
-        # Count total strings
-        progress.set_phase("analyzing")
-        logging.info("Analyzing translation scope...")
-        count_strings(en_translations, progress)
-        logging.debug(f"Found {progress.total_strings} strings to translate")
-        
         # Translate to target language
         progress.set_phase("translating")
-        logging.info(f"Translating to {args.lang}...")
-        try:
-            translated = translate_dict(en_translations, args.lang, progress)
-        except Exception as e:
-            logging.error(f"Translation failed: {e}")
-            launch_crash_reporter(1, str(e))
-            sys.exit(1)
-        
+        logging.info(f"Translating to {lang}...")
+        translated = translate_dict(en_translations, lang, progress, memory, args.workers, executor)
+        logging.info(f"Translation memory: {memory.hits} hits, {memory.misses} misses")
+
         # Save translations
         progress.set_phase("saving")
-        logging.info("Saving translations...")
-        
-        # Determine output path
-        if args.output:
-            output_path = args.output
+        logging.info(f"Saving {lang} translations...")
+        save_translations(translated, resolve_output_path(lang, args.output, len(languages)), args.bundle, lang,
+                          source_hashes(en_flat, flatten(translated)))
+        progress.set_phase("translating", "completed")
+
+    save_language_version()
+
+def main():
+    parser = argparse.ArgumentParser(description='Translate Ascendara language files')
+    parser.add_argument('lang', nargs='+', help='Target language code(s) (e.g., fr, de, es or fr,de,es)')
+    parser.add_argument('--output', '-o', help='Output file path, or directory with several languages', default=None)
+    parser.add_argument('--updateKeys', action='store_true', help='Update keys in the language file, the --newKey keys '
+                                                                  'or, without them, every key English added, changed or removed')
+    parser.add_argument('--newKey', action='append', help='New key to translate (can be specified multiple times)', default=[])
+    parser.add_argument('--workers', type=int, default=TRANSLATION_WORKERS, help='Translation requests kept in flight')
+    parser.add_argument('--bundle', action='store_true', help='Also write a minified, precompressed language bundle')
+    args = parser.parse_args()
+    languages = parse_languages(args.lang)
+
+    logging.info(f"Starting translation to {', '.join(languages)}")
+    logging.debug(f"Arguments: {args}")
+
+    # Initialize progress tracking
+    progress = TranslationProgress(languages)
+    # The translation memory, rate limiter, session and worker pool are shared by every language
+    memory = TranslationMemory()
+    executor = ThreadPoolExecutor(max_workers=max(1, args.workers))
+    try:
+        if args.updateKeys:
+            update_keys(languages, args, progress, memory, executor)
         else:
-            base_path = get_base_path()
-            languages_dir = os.path.join(base_path, "..", "languages")
-            output_path = os.path.join(languages_dir, f"{args.lang}.json")
-        
-        try:
-            save_translations(translated, output_path)
-        except Exception as e:
-            logging.error(f"Failed to save translations: {e}")
-            launch_crash_reporter(1, str(e))
-            sys.exit(1)
-            
+            translate_languages(languages, args, progress, memory, executor)
         progress.set_phase("completed")
         logging.info("Translation completed successfully!")
-        
+        logging.debug(f"Progress file written {progress.writes} times")
     except KeyboardInterrupt:
         logging.info("\nTranslation cancelled by user")
         launch_crash_reporter(1, "User cancelled")
         sys.exit(1)
     except Exception as e:
-        logging.error(f"Unexpected error: {e}")
+        logging.error(f"Translation failed: {e}")
+        progress.set_phase("error")
         launch_crash_reporter(1, str(e))
         sys.exit(1)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        # Counter updates the throttle held back since the last phase change
+        progress.flush()
+        memory.save()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -21,9 +21,11 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve
 from PyQt6.QtGui import QColor, QPainter, QPainterPath, QIcon, QPixmap
-import subprocess
 import atexit
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from AscendaraCrash import launch_reporter, spool_crash
+
 # Set up logging
 logging.basicConfig(
     level=logging.DEBUG,
@@ -110,24 +112,17 @@ THEME_COLORS = {
 # Cache for icon pixmap
 _icon_pixmap = None
 
-def _launch_crash_reporter_on_exit(error_code, error_message):
+def _launch_crash_reporter_on_exit():
     try:
-        crash_reporter_path = os.path.join('./AscendaraCrashReporter.exe')
-        if os.path.exists(crash_reporter_path):
-            # Use subprocess.Popen with CREATE_NO_WINDOW flag to hide console
-            subprocess.Popen(
-                [crash_reporter_path, "notificationhelper", str(error_code), error_message],
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-        else:
-            logging.error(f"Crash reporter not found at: {crash_reporter_path}")
+        launch_reporter()
     except Exception as e:
         logging.error(f"Failed to launch crash reporter: {e}")
 
 def launch_crash_reporter(error_code, error_message):
-    """Register the crash reporter to launch on exit with the given error details"""
+    """Spool the error and register the crash reporter to open on exit"""
+    spool_crash("notificationhelper", error_code, error_message)
     if not hasattr(launch_crash_reporter, "_registered"):
-        atexit.register(_launch_crash_reporter_on_exit, error_code, error_message)
+        atexit.register(_launch_crash_reporter_on_exit)
         launch_crash_reporter._registered = True
 
 class NotificationWindow(QWidget):
@@ -11,37 +11,44 @@
 
 
 import os
-import json
 import sys
 import atexit
 import time
 import threading
-from tempfile import NamedTemporaryFile, gettempdir
+from tempfile import gettempdir
 from datetime import datetime
 import logging
+import psutil
 import qbittorrentapi
 import argparse
 import subprocess
 from typing import Dict, Any
 
-def _launch_crash_reporter_on_exit(error_code, error_message):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from AscendaraState import FileLock, atomic_write, read_json, replace_json, write_json
+from AscendaraGamingMode import GamingMode
+from AscendaraCrash import launch_reporter, set_crash_context, spool_crash
+from AscendaraManifest import build_manifest
+
+# libtorrent is only needed for the optional embedded engine
+try:
+    import libtorrent as lt
+except ImportError:
+    lt = None
+
+DEFAULT_CACHE_SIZE_MB = 256
+
+def _launch_crash_reporter_on_exit():
     try:
-        crash_reporter_path = os.path.join('./AscendaraCrashReporter.exe')
-        if os.path.exists(crash_reporter_path):
-            # Use subprocess.Popen with CREATE_NO_WINDOW flag to hide console
-            subprocess.Popen(
-                [crash_reporter_path, "torrenthandler", str(error_code), error_message],
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-        else:
-            logging.error(f"Crash reporter not found at: {crash_reporter_path}")
+        launch_reporter()
     except Exception as e:
         logging.error(f"Failed to launch crash reporter: {e}")
 
 def launch_crash_reporter(error_code, error_message):
-    """Register the crash reporter to launch on exit with the given error details"""
+    """Spool the error and register the crash reporter to open on exit"""
+    spool_crash("torrenthandler", error_code, error_message)
     if not hasattr(launch_crash_reporter, "_registered"):
-        atexit.register(_launch_crash_reporter_on_exit, error_code, error_message)
+        atexit.register(_launch_crash_reporter_on_exit)
         launch_crash_reporter._registered = True
 
 def resource_path(relative_path):
@@ -51,26 +58,29 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def safe_write_json(filepath, data):
-    temp_dir = os.path.dirname(filepath)
-    temp_file_path = None
-    try:
-        with NamedTemporaryFile('w', delete=False, dir=temp_dir) as temp_file:
-            json.dump(data, temp_file, indent=4)
-            temp_file_path = temp_file.name
-        retry_attempts = 3
-        for attempt in range(retry_attempts):
-            try:
-                os.replace(temp_file_path, filepath)
-                break
-            except PermissionError as e:
-                if attempt < retry_attempts - 1:
-                    time.sleep(1)
-                else:
-                    raise e
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+# Install progress sampling for the repack setup
+SETUP_SAMPLE_INTERVAL = 2.0  # seconds between install directory scans
+SETUP_PROGRESS_STEP = 1.0  # minimum progress change (percent) before rewriting the JSON
+
+def get_directory_size(path):
+    """Total size in bytes of all files below path"""
+    total = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
 
 def handleerror(game_info, game_info_path, e):
     game_info['online'] = ""
@@ -82,7 +92,7 @@ def handleerror(game_info, game_info_path, e):
         "error": True,
         "message": str(e)
     }
-    safe_write_json(game_info_path, game_info)
+    write_json(game_info_path, game_info)
 
 def setup_logging():
     log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -112,6 +122,7 @@ def setup_logging():
 
 # Initialize logging
 temp_log_file = setup_logging()
+set_crash_context(logFile=temp_log_file)
 
 def _launch_notification(theme, title, message):
     try:
@@ -133,29 +144,99 @@ def _launch_notification(theme, title, message):
     except Exception as e:
         logging.error(f"Failed to launch notification helper: {e}")
 
-class TorrentManager:
-    def __init__(self):
+def detect_disk_type(path):
+    """Best-effort detection of the storage type backing path ('ssd', 'hdd' or 'unknown')"""
+    try:
+        if sys.platform == "win32":
+            drive = os.path.splitdrive(os.path.abspath(path))[0].rstrip(':')
+            if not drive:
+                return "unknown"
+            command = (f"(Get-Partition -DriveLetter {drive} | Get-Disk | "
+                       f"Get-PhysicalDisk | Select-Object -First 1).MediaType")
+            result = subprocess.run(
+                ["powershell", "-NoProfile", "-Command", command],
+                capture_output=True, text=True, timeout=5,
+                creationflags=subprocess.CREATE_NO_WINDOW
+            )
+            media_type = result.stdout.strip().lower()
+            if media_type == "ssd":
+                return "ssd"
+            if media_type == "hdd":
+                return "hdd"
+            return "unknown"
+
+        # Linux exposes the rotational flag of the block device through sysfs
+        st_dev = os.stat(path).st_dev
+        device = f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}"
+        for candidate in (os.path.join(device, "queue", "rotational"),
+                          os.path.join(device, "..", "queue", "rotational")):
+            if os.path.exists(candidate):
+                with open(candidate, 'r') as f:
+                    return "hdd" if f.read().strip() == "1" else "ssd"
+    except Exception as e:
+        logging.debug(f"Could not detect disk type for {path}: {e}")
+    return "unknown"
+
+def build_tuning_profile(disk_type, cpu_count):
+    """Build qBittorrent engine preferences suited to the disk type and core count"""
+    cores = max(1, cpu_count or 1)
+    if disk_type == "hdd":
+        # Spinning disks: few I/O threads to limit seeking, larger cache to coalesce writes
+        return {
+            "disk_cache": 256,
+            "memory_working_set_limit": 1024,
+            "async_io_threads": 4,
+            "hashing_threads": 1,
+            "file_pool_size": 100,
+            "max_connec_per_torrent": 100,
+            "send_buffer_watermark": 1024,
+            "send_buffer_low_watermark": 256,
+            "send_buffer_watermark_factor": 150,
+            "socket_send_buffer_size": 1024 * 1024,
+            "socket_receive_buffer_size": 1024 * 1024
+        }
+    # SSDs (and unknown disks) handle parallel I/O well, scale threads with the CPU
+    return {
+        "disk_cache": 128,
+        "memory_working_set_limit": 512,
+        "async_io_threads": min(32, max(4, cores * 2)),
+        "hashing_threads": max(1, min(8, cores // 2)),
+        "file_pool_size": 500,
+        "max_connec_per_torrent": 200,
+        "send_buffer_watermark": 2048,
+        "send_buffer_low_watermark": 512,
+        "send_buffer_watermark_factor": 150,
+        "socket_send_buffer_size": 2 * 1024 * 1024,
+        "socket_receive_buffer_size": 2 * 1024 * 1024
+    }
+
+class QBittorrentEngine:
+    """Torrent engine backed by a separately running qBittorrent Web UI.
+
+    qBittorrent's preferences are global, so the tuning profile is shared by every
+    handler downloading through the same Web UI: qbittorrent_tuning.json keeps the
+    user's original values and the handlers holding the profile, and only the last
+    one to finish restores them. Values left tuned by a killed handler are restored
+    by the next handler that connects.
+    """
+    name = "qBittorrent"
+
+    def __init__(self, tuning=True, host='localhost', port=8080):
         self.qbt_client = None
-        self.connect_thread = None
-        self.current_torrent_hash = None
-        self.notification_theme = None
-        
-    def cleanup(self):
-        if self.qbt_client and self.current_torrent_hash:
-            try:
-                # Get torrent info to check if it's complete
-                torrents = self.qbt_client.torrents_info(torrent_hashes=self.current_torrent_hash)
-                if torrents and not torrents[0].state_enum.is_complete:
-                    # Delete the torrent and its data if download is incomplete
-                    self.qbt_client.torrents_delete(delete_files=True, torrent_hashes=self.current_torrent_hash)
-            except:
-                pass  # Ignore any errors during cleanup
-    
-    def _connect_qbittorrent(self):
+        self.host = host
+        self.port = port
+        self.tuning = tuning
+        self.tuning_profile_name = None
+        self.tuned = False
+        self.original_alt_limits = None
+        self.state_path = os.path.join(os.getenv('APPDATA') or os.path.expanduser("~"), 'ascendara', 'qbittorrent_tuning.json')
+        self.state_key = f"{host}:{port}"
+
+    def connect(self, tuning_path=None):
         # Connect to local qBittorrent Web UI
         self.qbt_client = qbittorrentapi.Client(
-            host='localhost',
-            port=8080,
+            host=self.host,
+            port=self.port,
             username='admin',  # Default credentials
             password='adminadmin'
         )
@@ -163,10 +244,481 @@ class TorrentManager:
             self.qbt_client.auth_log_in()
         except qbittorrentapi.LoginFailed as e:
             raise Exception("Failed to connect to qBittorrent. Make sure it's running with Web UI enabled.") from e
+        self._apply_tuning_profile(tuning_path)
+
+    def _live_holders(self, entry, exclude=None):
+        return [pid for pid in entry.get("holders", []) if pid != exclude and psutil.pid_exists(pid)]
+
+    def _apply_tuning_profile(self, tuning_path):
+        """Apply a per-machine engine profile, or join the handlers that already applied it"""
+        if not self.qbt_client or self.tuned:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with FileLock(self.state_path):
+                state = read_json(self.state_path)
+                entry = state.get(self.state_key)
+                holders = self._live_holders(entry) if entry else []
+                if entry and not holders:
+                    # Every handler holding the profile was killed before it could restore
+                    if entry.get("original"):
+                        self.qbt_client.app_set_preferences(prefs=entry["original"])
+                        logging.info(f"Restored preferences left tuned by an earlier run: {entry['original']}")
+                    entry = None
+                    del state[self.state_key]
+
+                if self.tuning:
+                    if entry is None:
+                        disk_type = detect_disk_type(tuning_path or os.getcwd())
+                        cpu_count = os.cpu_count()
+                        profile = build_tuning_profile(disk_type, cpu_count)
+                        current = dict(self.qbt_client.app_preferences())
+
+                        # Only touch the preferences this qBittorrent build actually exposes
+                        changes = {key: value for key, value in profile.items()
+                                   if key in current and current[key] != value}
+                        self.tuning_profile_name = f"{disk_type}/{cpu_count} cores"
+                        entry = {"profile": self.tuning_profile_name,
+                                 "original": {key: current[key] for key in changes}}
+                        if changes:
+                            self.qbt_client.app_set_preferences(prefs=changes)
+                            logging.info(f"Applied tuning profile {self.tuning_profile_name}")
+                            logging.info(f"Preferences before tuning: {entry['original']}")
+                            logging.info(f"Preferences after tuning: {changes}")
+                        else:
+                            logging.info(f"Tuning profile {self.tuning_profile_name}: preferences already optimal")
+                    else:
+                        self.tuning_profile_name = entry.get("profile")
+                        logging.info(f"Tuning profile {self.tuning_profile_name} already applied by "
+                                     f"{len(holders)} other handler(s)")
+                    entry["holders"] = holders + [os.getpid()]
+                    state[self.state_key] = entry
+                    self.tuned = True
+                atomic_write(self.state_path, state)
+        except Exception as e:
+            logging.warning(f"Failed to apply tuning profile: {e}")
+
+    def _restore_preferences(self):
+        """Leave the tuning profile, restoring the original preferences as its last holder"""
+        if not self.qbt_client or not self.tuned:
+            return
+        self.tuned = False
+        try:
+            with FileLock(self.state_path):
+                state = read_json(self.state_path)
+                entry = state.get(self.state_key)
+                if not entry:
+                    return
+                holders = self._live_holders(entry, exclude=os.getpid())
+                if holders:
+                    entry["holders"] = holders
+                    logging.info(f"Keeping the tuning profile for {len(holders)} other handler(s)")
+                else:
+                    if entry.get("original"):
+                        self.qbt_client.app_set_preferences(prefs=entry["original"])
+                        logging.info(f"Restored original preferences: {entry['original']}")
+                    del state[self.state_key]
+                atomic_write(self.state_path, state)
+        except Exception as e:
+            logging.warning(f"Failed to restore original preferences: {e}")
+
+    def set_throttled(self, throttled, speed_limit):
+        """Switch qBittorrent to alternative speed limits while gaming mode is active"""
+        try:
+            if throttled:
+                if self.original_alt_limits is None:
+                    prefs = dict(self.qbt_client.app_preferences())
+                    self.original_alt_limits = {
+                        "alt_dl_limit": prefs.get("alt_dl_limit", 0),
+                        "alt_up_limit": prefs.get("alt_up_limit", 0),
+                        "mode": str(self.qbt_client.transfer_speed_limits_mode()) == "1"
+                    }
+                # The Web API takes alternative limits in KiB/s
+                self.qbt_client.app_set_preferences(prefs={
+                    "alt_dl_limit": max(1, speed_limit // 1024),
+                    "alt_up_limit": max(1, speed_limit // 4096)
+                })
+                self.qbt_client.transfer_set_speed_limits_mode(intended_state=True)
+            elif self.original_alt_limits is not None:
+                original = self.original_alt_limits
+                self.qbt_client.app_set_preferences(prefs={
+                    "alt_dl_limit": original["alt_dl_limit"],
+                    "alt_up_limit": original["alt_up_limit"]
+                })
+                self.qbt_client.transfer_set_speed_limits_mode(intended_state=original["mode"])
+                self.original_alt_limits = None
+        except Exception as e:
+            logging.warning(f"Failed to change qBittorrent speed limits: {e}")
+
+    def add(self, magnet_link, save_path):
+        self.qbt_client.torrents_add(
+            urls=magnet_link,
+            save_path=save_path,
+            use_auto_torrent_management=False,
+            sequential_download=True
+        )
+        # Get the torrent hash from the magnet link
+        return magnet_link.split('&')[0].split(':')[-1]
+
+    def status(self, torrent_hash):
+        torrent = self.qbt_client.torrents_info(torrent_hashes=torrent_hash)[0]
+        return {
+            "name": torrent.name,
+            "progress": torrent.progress,
+            "dlspeed": torrent.dlspeed,
+            "eta": torrent.eta,
+            "total_size": torrent.total_size,
+            "downloaded_session": torrent.downloaded_session,
+            "is_complete": torrent.state_enum.is_complete
+        }
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def finish(self, torrent_hash):
+        self._restore_preferences()
+        self.set_throttled(False, 0)
+
+    def cleanup(self, torrent_hash):
+        self._restore_preferences()
+        if self.qbt_client:
+            self.set_throttled(False, 0)
+        if self.qbt_client and torrent_hash:
+            try:
+                # Get torrent info to check if it's complete
+                torrents = self.qbt_client.torrents_info(torrent_hashes=torrent_hash)
+                if torrents and not torrents[0].state_enum.is_complete:
+                    # Delete the torrent and its data if download is incomplete
+                    self.qbt_client.torrents_delete(delete_files=True, torrent_hashes=torrent_hash)
+            except:
+                pass  # Ignore any errors during cleanup
+
+def _info_hash(torrent):
+    """Hex info-hash of a torrent_info, add_torrent_params, torrent_status or torrent_handle.
+
+    libtorrent 2.x deprecates info_hash for info_hashes; the v1 hash is preferred so a
+    hybrid torrent keeps the key it got from its v1 magnet once the metadata arrives.
+    """
+    hashes = getattr(torrent, "info_hashes", None)
+    if hashes is not None:
+        hashes = hashes() if callable(hashes) else hashes
+        return str(hashes.v1 if hashes.has_v1() else hashes.v2)
+    value = torrent.info_hash
+    return str(value() if callable(value) else value)
+
+class LibtorrentEngine:
+    """In-process torrent engine using the libtorrent Python bindings"""
+    name = "libtorrent"
+
+    def __init__(self, state_dir=None, cache_size=DEFAULT_CACHE_SIZE_MB, listen_interfaces=None, local_only=False,
+                 tuning=True):
+        self.state_dir = state_dir or os.path.join(os.getenv('APPDATA') or os.path.expanduser("~"), 'ascendara', 'torrent_session')
+        self.cache_size = cache_size
+        self.listen_interfaces = listen_interfaces or "0.0.0.0:6881,[::]:6881"
+        self.local_only = local_only
+        self.tuning = tuning
+        self.tuning_profile_name = None
+        self.session = None
+        self.handles = {}
+        self.statuses = {}
+        self.errors = {}
+        self.last_update_post = 0
+        self.original_rate_limits = None
+
+    def _settings(self, tuning_path):
+        settings = {
+            "listen_interfaces": self.listen_interfaces,
+            "alert_mask": int(lt.alert.category_t.status_notification |
+                              lt.alert.category_t.error_notification |
+                              lt.alert.category_t.storage_notification),
+            # libtorrent 1.2 counts the cache in 16 KiB blocks, 2.x bounds queued disk bytes instead
+            "cache_size": self.cache_size * 64,
+            "max_queued_disk_bytes": self.cache_size * 1024 * 1024
+        }
+        if self.tuning:
+            disk_type = detect_disk_type(tuning_path or os.getcwd())
+            cpu_count = os.cpu_count()
+            profile = build_tuning_profile(disk_type, cpu_count)
+            self.tuning_profile_name = f"{disk_type}/{cpu_count} cores (embedded)"
+            settings.update({
+                "aio_threads": profile["async_io_threads"],
+                "hashing_threads": profile["hashing_threads"],
+                "file_pool_size": profile["file_pool_size"],
+                "connections_limit": profile["max_connec_per_torrent"] * 2,
+                "send_buffer_watermark": profile["send_buffer_watermark"] * 1024,
+                "send_buffer_low_watermark": profile["send_buffer_low_watermark"] * 1024,
+                "send_buffer_watermark_factor": profile["send_buffer_watermark_factor"],
+                "send_socket_buffer_size": profile["socket_send_buffer_size"],
+                "recv_socket_buffer_size": profile["socket_receive_buffer_size"]
+            })
+        if self.local_only:
+            # Loopback testing: no discovery outside this machine, allow peers sharing 127.0.0.1
+            settings.update({
+                "enable_dht": False,
+                "enable_lsd": False,
+                "enable_upnp": False,
+                "enable_natpmp": False,
+                "allow_multiple_connections_per_ip": True
+            })
+        return settings
+
+    def connect(self, tuning_path=None):
+        if lt is None:
+            raise Exception("The embedded torrent engine requires the libtorrent Python bindings.")
+        os.makedirs(self.state_dir, exist_ok=True)
+
+        session_state_path = os.path.join(self.state_dir, "session.state")
+        session_state = None
+        if os.path.exists(session_state_path):
+            try:
+                with open(session_state_path, 'rb') as f:
+                    session_state = f.read()
+            except Exception as e:
+                logging.warning(f"Failed to read session state: {e}")
+
+        if session_state and hasattr(lt, 'read_session_params'):
+            self.session = lt.session(lt.read_session_params(session_state))
+        else:
+            self.session = lt.session()
+            if session_state:
+                try:
+                    self.session.load_state(lt.bdecode(session_state))
+                except Exception as e:
+                    logging.warning(f"Failed to restore session state: {e}")
+
+        # Unknown setting names raise in the bindings, only apply what this build supports
+        supported = self.session.get_settings()
+        settings = {key: value for key, value in self._settings(tuning_path).items() if key in supported}
+        self.session.apply_settings(settings)
+        logging.info(f"Started embedded libtorrent {lt.__version__} session with profile {self.tuning_profile_name or 'disabled'}")
+        logging.debug(f"Embedded session settings: {settings}")
+
+    def set_throttled(self, throttled, speed_limit):
+        """Apply session rate limits and background priority while gaming mode is active"""
+        try:
+            if throttled:
+                if self.original_rate_limits is None:
+                    current = self.session.get_settings()
+                    self.original_rate_limits = {
+                        "download_rate_limit": current.get("download_rate_limit", 0),
+                        "upload_rate_limit": current.get("upload_rate_limit", 0)
+                    }
+                self.session.apply_settings({
+                    "download_rate_limit": speed_limit,
+                    "upload_rate_limit": max(1024, speed_limit // 4)
+                })
+            elif self.original_rate_limits is not None:
+                self.session.apply_settings(self.original_rate_limits)
+                self.original_rate_limits = None
+        except Exception as e:
+            logging.warning(f"Failed to change session rate limits: {e}")
+
+    def _resume_path(self, torrent_hash):
+        return os.path.join(self.state_dir, f"{torrent_hash}.fastresume")
+
+    def add(self, source, save_path):
+        if os.path.isfile(source):
+            params = lt.add_torrent_params()
+            params.ti = lt.torrent_info(source)
+        else:
+            params = lt.parse_magnet_uri(source)
+        torrent_hash = _info_hash(params.ti if params.ti else params)
+
+        resume_path = self._resume_path(torrent_hash)
+        if os.path.exists(resume_path) and hasattr(lt, 'read_resume_data'):
+            try:
+                with open(resume_path, 'rb') as f:
+                    resumed = lt.read_resume_data(f.read())
+                if resumed.ti is None:
+                    resumed.ti = params.ti
+                params = resumed
+                logging.info(f"Loaded fast resume data for {torrent_hash}")
+            except Exception as e:
+                logging.warning(f"Ignoring unreadable resume data for {torrent_hash}: {e}")
+
+        params.save_path = save_path
+        handle = self.session.add_torrent(params)
+        handle.set_flags(lt.torrent_flags.sequential_download)
+        self.handles[torrent_hash] = handle
+        return torrent_hash
+
+    def _handle_alerts(self):
+        for alert in self.session.pop_alerts():
+            if isinstance(alert, lt.state_update_alert):
+                for status in alert.status:
+                    self.statuses[_info_hash(status)] = status
+            elif isinstance(alert, lt.torrent_error_alert):
+                self.errors[_info_hash(alert.handle)] = alert.message()
+            elif isinstance(alert, lt.save_resume_data_alert):
+                self._write_resume_data(alert)
+
+    def _write_resume_data(self, alert):
+        try:
+            if hasattr(lt, 'write_resume_data_buf'):
+                data = lt.write_resume_data_buf(alert.params)
+            else:
+                data = lt.bencode(alert.resume_data)
+            with open(self._resume_path(_info_hash(alert.handle)), 'wb') as f:
+                f.write(data)
+        except Exception as e:
+            logging.warning(f"Failed to write resume data: {e}")
+
+    def status(self, torrent_hash):
+        if torrent_hash in self.errors:
+            raise Exception(f"Torrent error: {self.errors[torrent_hash]}")
+        status = self.statuses.get(torrent_hash) or self.handles[torrent_hash].status()
+        rate = status.download_payload_rate
+        remaining = max(0, status.total_wanted - status.total_wanted_done)
+        return {
+            "name": status.name,
+            "progress": status.progress,
+            "dlspeed": rate,
+            "eta": int(remaining / rate) if rate > 0 else 0,
+            "total_size": status.total_wanted,
+            "downloaded_session": status.total_payload_download,
+            "is_complete": status.is_finished or status.is_seeding
+        }
+
+    def wait(self, timeout):
+        """Sleep until the next status update or an error alert arrives"""
+        deadline = time.time() + timeout
+        now = time.time()
+        if now - self.last_update_post >= timeout:
+            self.session.post_torrent_updates()
+            self.last_update_post = now
+        while now < deadline:
+            if self.session.wait_for_alert(int((deadline - now) * 1000)) is not None:
+                self._handle_alerts()
+                if self.errors:
+                    return
+            now = time.time()
+
+    def _save_state(self):
+        # Resume data is requested per torrent and written as the alerts come back
+        pending = 0
+        for handle in self.handles.values():
+            if handle.is_valid():
+                handle.save_resume_data()
+                pending += 1
+        deadline = time.time() + 5
+        while pending and time.time() < deadline:
+            self.session.wait_for_alert(500)
+            for alert in self.session.pop_alerts():
+                if isinstance(alert, lt.save_resume_data_alert):
+                    self._write_resume_data(alert)
+                    pending -= 1
+                elif isinstance(alert, lt.save_resume_data_failed_alert):
+                    pending -= 1
+        try:
+            if hasattr(lt, 'write_session_params_buf'):
+                data = lt.write_session_params_buf(self.session.session_state())
+            else:
+                data = lt.bencode(self.session.save_state())
+            with open(os.path.join(self.state_dir, "session.state"), 'wb') as f:
+                f.write(data)
+        except Exception as e:
+            logging.warning(f"Failed to save session state: {e}")
+
+    def finish(self, torrent_hash):
+        # Setup runs next, stop hashing and uploading but keep the files for fast resume
+        if self.session is None:
+            return
+        self._save_state()
+        handle = self.handles.pop(torrent_hash, None)
+        if handle and handle.is_valid():
+            self.session.remove_torrent(handle)
+
+    def cleanup(self, torrent_hash):
+        if self.session is None:
+            return
+        try:
+            self._save_state()
+            self.session.pause()
+        except Exception:
+            pass  # Ignore any errors during cleanup
+
+class TorrentManager:
+    def __init__(self, engine=None):
+        self.engine = engine or QBittorrentEngine()
+        self.connected = False
+        self.connect_error = None
+        self.connect_thread = None
+        self.current_torrent_hash = None
+        self.notification_theme = None
+        self.tuning_path = None
+        self.gaming_mode = GamingMode()
+        self.throttled = False
+
+    def cleanup(self):
+        self.engine.cleanup(self.current_torrent_hash)
+
+    def _connect_engine(self):
+        try:
+            self.engine.connect(self.tuning_path)
+            self.connected = True
+        except Exception as e:
+            logging.error(f"Failed to start the {self.engine.name} torrent engine: {e}")
+            self.connect_error = e
     
+    def _wait_for_setup(self, process, install_dir, payload_size, game_info, game_info_path):
+        """Block until setup exits, reporting install progress estimated from bytes written"""
+        setup_done = threading.Event()
+
+        def wait_for_exit():
+            # communicate() drains the pipes so a chatty setup can never block on a full buffer
+            try:
+                process.communicate()
+            finally:
+                setup_done.set()
+
+        threading.Thread(target=wait_for_exit, daemon=True).start()
+
+        start_time = time.time()
+        last_sample_time = start_time
+        last_written = get_directory_size(install_dir)
+        rate_window = []
+        last_reported = None
+
+        while not setup_done.wait(timeout=SETUP_SAMPLE_INTERVAL):
+            now = time.time()
+            written = get_directory_size(install_dir)
+            rate = max(0, written - last_written) / max(now - last_sample_time, 1e-6)
+            last_written = written
+            last_sample_time = now
+
+            rate_window.append(rate)
+            if len(rate_window) > 5:
+                rate_window.pop(0)
+            avg_rate = sum(rate_window) / len(rate_window)
+
+            # The installed size is only known roughly, never claim completion before setup exits
+            if payload_size > 0:
+                progress = min(99.0, written / payload_size * 100)
+                remaining = max(0, payload_size - written)
+                eta_seconds = int(remaining / avg_rate) if avg_rate > 0 else 0
+            else:
+                progress = 0.0
+                eta_seconds = 0
+
+            # Only touch the JSON when the reported progress moved measurably
+            if last_reported is not None and progress - last_reported < SETUP_PROGRESS_STEP:
+                continue
+            last_reported = progress
+            set_crash_context(phase="installing", throughputKBps=round(avg_rate / 1024, 2))
+            game_info["downloadingData"].update({
+                "extracting": True,
+                "progressCompleted": f"{progress:.2f}",
+                "progressDownloadSpeeds": f"{avg_rate / 1024:.2f} KB/s",
+                "timeUntilComplete": f"{eta_seconds}s"
+            })
+            replace_json(game_info_path, game_info)
+            logging.debug(f"Install progress: {progress:.2f}% ({written} / {payload_size} bytes)")
+
+        logging.info(f"Setup exited with code {process.returncode} after {time.time() - start_time:.0f}s")
+
     def ensure_connected(self):
-        if self.qbt_client is None:
-            self.connect_thread = threading.Thread(target=self._connect_qbittorrent)
+        if not self.connected and self.connect_thread is None:
+            self.connect_thread = threading.Thread(target=self._connect_engine)
             self.connect_thread.start()
         
     def download_torrent(self, magnet_link, game, online, dlc, version, size, download_dir, theme=None):
@@ -179,6 +731,7 @@ class TorrentManager:
             _launch_notification(theme, "Download Started", f"Starting torrent download for {game}")
 
         # Start connection process immediately
+        self.tuning_path = download_dir if os.path.isdir(download_dir) else None
         self.ensure_connected()
         
         # Create game-specific directory in a separate thread
@@ -217,48 +770,51 @@ class TorrentManager:
         
         try:
             # Create the JSON file right before adding the torrent
-            safe_write_json(game_info_path, game_info)
+            write_json(game_info_path, game_info)
             
-            # Wait for qBittorrent connection if not ready
+            # Wait for the engine connection if not ready
             if self.connect_thread and self.connect_thread.is_alive():
                 self.connect_thread.join()
+            if not self.connected:
+                raise self.connect_error or Exception(f"Failed to start the {self.engine.name} torrent engine")
             
-            # Add the torrent to qBittorrent
-            self.qbt_client.torrents_add(
-                urls=magnet_link,
-                save_path=game_dir,  # Save to game-specific directory
-                use_auto_torrent_management=False,
-                sequential_download=True
-            )
-            logging.info(f"Added torrent to qBittorrent for game: {game}")
-            
-            # Get the torrent hash from the magnet link
-            torrent_hash = magnet_link.split('&')[0].split(':')[-1]
+            # Add the torrent to the engine, saving to the game-specific directory
+            torrent_hash = self.engine.add(magnet_link, game_dir)
+            logging.info(f"Added torrent to {self.engine.name} for game: {game}")
             self.current_torrent_hash = torrent_hash
             
             # Register cleanup on exit
             atexit.register(self.cleanup)
             
+            download_start = time.time()
+            peak_rate = 0
             while True:
+                # Switch between full speed and gaming mode limits
+                if self.gaming_mode.poll() != self.throttled:
+                    self.throttled = self.gaming_mode.active
+                    self.engine.set_throttled(self.throttled, self.gaming_mode.speed_limit)
+
                 # Get torrent info
-                torrent = self.qbt_client.torrents_info(torrent_hashes=torrent_hash)[0]
+                torrent = self.engine.status(torrent_hash)
                 
-                if torrent.state_enum.is_complete:
+                if torrent["is_complete"]:
                     break
                 
                 # Update progress
-                progress = torrent.progress * 100
-                download_rate = torrent.dlspeed / 1024  # KB/s
+                progress = torrent["progress"] * 100
+                download_rate = torrent["dlspeed"] / 1024  # KB/s
+                peak_rate = max(peak_rate, download_rate)
+                set_crash_context(phase="downloading", throughputKBps=round(download_rate, 2))
                 
                 # Update waiting status based on download speed
                 if download_rate > 0 and game_info["downloadingData"]["waiting"]:
                     game_info["downloadingData"]["waiting"] = False
-                    safe_write_json(game_info_path, game_info)
+                    write_json(game_info_path, game_info)
                     if self.notification_theme:
                         _launch_notification(self.notification_theme, "Download Progress", f"Download started for {game}")
                 
-                if torrent.dlspeed > 0:
-                    eta_seconds = torrent.eta
+                if torrent["dlspeed"] > 0:
+                    eta_seconds = torrent["eta"]
                 else:
                     eta_seconds = 0
                 
@@ -268,20 +824,30 @@ class TorrentManager:
                     "timeUntilComplete": f"{int(eta_seconds)}s"
                 })
                 
-                safe_write_json(game_info_path, game_info)
-                time.sleep(1)
+                # Progress only, this process owns the file while downloading
+                replace_json(game_info_path, game_info)
+                self.engine.wait(1)
             
+            # Download complete, log throughput for the active profile and release the engine
+            elapsed = max(time.time() - download_start, 1e-6)
+            # Resumed torrents only downloaded part of their size in this session
+            average_rate = torrent["downloaded_session"] / 1024 / elapsed
+            logging.info(f"Throughput with tuning profile {self.engine.tuning_profile_name or 'disabled'}: "
+                         f"average {average_rate:.2f} KB/s, peak {peak_rate:.2f} KB/s "
+                         f"over {elapsed:.0f}s")
+            self.engine.finish(torrent_hash)
+
             # Download complete, now find and run setup
             game_info["downloadingData"]["downloading"] = False
             game_info["downloadingData"]["extracting"] = True
-            safe_write_json(game_info_path, game_info)
+            write_json(game_info_path, game_info)
             logging.info(f"Download complete for {game}, starting extraction")
             if self.notification_theme:
                 _launch_notification(self.notification_theme, "Download Complete", f"Download complete for {game}, starting installation")
             
             # Find setup executable
             setup_file = None
-            torrent_folder = os.path.join(game_dir, torrent.name)
+            torrent_folder = os.path.join(game_dir, torrent["name"])
             for file in os.listdir(torrent_folder):
                 if file.lower().startswith(('setup', game.lower())) and file.lower().endswith('.exe'):
                     setup_file = os.path.join(torrent_folder, file)
@@ -298,11 +864,7 @@ class TorrentManager:
             process = subprocess.Popen([setup_file, '/VERYSILENT', f'/DIR="{install_dir}"'], 
                                     stdout=subprocess.PIPE, 
                                     stderr=subprocess.PIPE)
-            
-            while process.poll() is None:
-                time.sleep(1)
-                game_info["downloadingData"]["extracting"] = True
-                safe_write_json(game_info_path, game_info)
+            self._wait_for_setup(process, install_dir, torrent["total_size"], game_info, game_info_path)
 
             if process.returncode != 0:
                 raise Exception(f"Setup failed with code {process.returncode}")
@@ -311,10 +873,16 @@ class TorrentManager:
             game_info["downloadingData"]["extracting"] = False
             del game_info["downloadingData"]
             game_info["executable"] = os.path.join(install_dir, f"{game}.exe")
-            safe_write_json(game_info_path, game_info)
+            write_json(game_info_path, game_info)
             logging.info(f"Installation complete for game: {game}")
             if self.notification_theme:
                 _launch_notification(self.notification_theme, "Installation Complete", f"Successfully installed {game}")
+
+            # Installed by a setup, so the manifest supports verifying but not member-level repair
+            try:
+                build_manifest(install_dir)
+            except Exception as e:
+                logging.error(f"Failed to write the install manifest: {e}")
             
         except Exception as e:
             error_msg = f"Error downloading/installing {game}: {str(e)}"
@@ -344,6 +912,12 @@ def main():
     parser.add_argument("size", help="Download size")
     parser.add_argument("dir", help="Download directory")
     parser.add_argument("--withNotification", help="Theme name for notifications (e.g. light, dark, blue)", default=None)
+    parser.add_argument("--noTuning", action="store_true", help="Keep the torrent engine's default tuning")
+    parser.add_argument("--engine", choices=["qbittorrent", "libtorrent"], default="qbittorrent",
+                        help="Torrent engine to use (qbittorrent Web UI or embedded libtorrent)")
+    parser.add_argument("--cacheSize", type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help="Disk cache size in MB for the embedded engine")
+    parser.add_argument("--stateDir", default=None, help="Session and resume data directory for the embedded engine")
     
     try:
         if len(sys.argv) == 1:  # No arguments provided
@@ -359,7 +933,11 @@ def main():
                      f"version={args.version}, size={args.size}, dir={args.dir}, "
                      f"withNotification={args.withNotification}")
         
-        torrent_manager = TorrentManager()
+        if args.engine == "libtorrent":
+            engine = LibtorrentEngine(state_dir=args.stateDir, cache_size=args.cacheSize, tuning=not args.noTuning)
+        else:
+            engine = QBittorrentEngine(tuning=not args.noTuning)
+        torrent_manager = TorrentManager(engine)
         torrent_manager.download_torrent(
             args.magnet,
             args.game,
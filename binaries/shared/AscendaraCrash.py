@@ -0,0 +1,277 @@
+# ==============================================================================
+# Ascendara Crash Spool
+# ==============================================================================
+# Crash records of every Ascendara tool. A failing tool writes its error to the
+# local spool (%APPDATA%/ascendara/crashes), where repeats of the same failure are
+# merged by a fingerprint of tool, error code and normalized message, and then
+# opens the crash reporter unless one is already showing the spool. Uploads send
+# every pending record in one gzip-compressed batch, retried with backoff.
+# Each record carries a compressed attachment with the tail of the tool's log and
+# a snapshot of its memory, threads, open files, throughput and phase.
+
+
+
+
+
+
+
+
+
+
+import os
+import re
+import json
+import time
+import hashlib
+import base64
+import logging
+import threading
+import subprocess
+
+from AscendaraState import FileLock, StateFile, read_json
+
+CRASH_RECORD_SUFFIX = ".crash.json"
+REPORTER_LOCK_NAME = "reporter"
+MAX_RECORDS = 200
+UPLOADED_RETENTION = 30 * 24 * 3600  # seconds an uploaded record is kept
+MESSAGE_LIMIT = 8000  # characters of the latest message kept in a record
+UPLOAD_ATTEMPTS = 4
+UPLOAD_BACKOFF = 1.0  # seconds, doubled per attempt
+UPLOAD_TIMEOUT = 15
+ENDPOINT_ENV = "ASCENDARA_CRASH_ENDPOINT"
+LOG_TAIL_BYTES = 64 * 1024  # bytes read from the end of the tool's log
+OPEN_FILES_LIMIT = 50  # open file paths listed in a snapshot
+
+# What the running tool registered for its crash attachment: its log file, current
+# phase and last throughput. Updated from progress loops, so it is a plain dict.
+_context = {"logFile": None, "phase": None, "throughputKBps": None}
+
+# Variable parts of error messages that should not split one failure into many records
+_NORMALIZERS = (
+    (re.compile(r"(?:[A-Za-z]:)?(?:[\\/][^\\/\s'\":]+)+[\\/]?"), "<path>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"), "<hex>"),
+    (re.compile(r"https?://\S+"), "<url>"),
+    (re.compile(r"\d+"), "<n>"),
+    (re.compile(r"\s+"), " "),
+)
+
+def crash_dir():
+    return os.path.join(os.environ.get('APPDATA', os.path.expanduser("~")), 'ascendara', 'crashes')
+
+def normalize_message(message):
+    normalized = str(message).strip().lower()
+    for pattern, replacement in _NORMALIZERS:
+        normalized = pattern.sub(replacement, normalized)
+    return normalized
+
+def fingerprint(tool, error_code, message):
+    key = f"{tool.lower()}|{error_code}|{normalize_message(message)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def _record_path(record_fingerprint):
+    return os.path.join(crash_dir(), record_fingerprint + CRASH_RECORD_SUFFIX)
+
+def spool_crash(tool, error_code, message, attachment=None):
+    """Record a crash, merging it into an earlier record of the same failure.
+
+    Without an explicit attachment one is built from the registered crash context.
+    Callers spooling for another process pass attachment={}, since this process's
+    log and performance snapshot do not describe that crash.
+    """
+    try:
+        if attachment is None:
+            try:
+                attachment = build_attachment()
+            except Exception as e:
+                logging.error(f"Failed to build crash attachment: {e}")
+        os.makedirs(crash_dir(), exist_ok=True)
+        record_fingerprint = fingerprint(tool, error_code, message)
+        now = time.time()
+        with StateFile(_record_path(record_fingerprint)) as record:
+            if record.get("fingerprint") is None:
+                record.update(fingerprint=record_fingerprint, tool=tool.lower(), errorCode=int(error_code),
+                              firstSeen=now)
+            record.increment("count")
+            record.update(message=str(message)[:MESSAGE_LIMIT], lastSeen=now, shown=False, uploaded=False)
+            if attachment is not None:
+                record.set("attachment", attachment)
+        return record_fingerprint
+    except Exception as e:
+        logging.error(f"Failed to spool crash record: {e}")
+        return None
+
+def set_crash_context(**fields):
+    """Register the log file (logFile), phase or throughputKBps for the next crash attachment"""
+    _context.update(fields)
+
+def read_log_tail(path, max_bytes=LOG_TAIL_BYTES):
+    """The last max_bytes of a log, starting at a line boundary, without reading the whole file"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        data = f.read(max_bytes)
+    if size > max_bytes:
+        newline = data.find(b"\n")
+        if newline != -1:
+            data = data[newline + 1:]
+    return data.decode('utf-8', errors='replace')
+
+def performance_snapshot():
+    """Memory, threads and open files of this process plus the registered phase and throughput"""
+    snapshot = {
+        "pid": os.getpid(),
+        "threads": threading.active_count(),
+        "phase": _context.get("phase"),
+        "throughputKBps": _context.get("throughputKBps"),
+        "time": time.time()
+    }
+    try:
+        import psutil
+    except ImportError:
+        return snapshot
+    try:
+        process = psutil.Process()
+        snapshot["rss"] = process.memory_info().rss
+        snapshot["threads"] = process.num_threads()
+        open_files = process.open_files()
+        snapshot["openFileCount"] = len(open_files)
+        snapshot["openFiles"] = [f.path for f in open_files[:OPEN_FILES_LIMIT]]
+    except (psutil.Error, OSError) as e:
+        snapshot["error"] = str(e)
+    return snapshot
+
+def build_attachment(log_path=None):
+    """Log tail and performance snapshot, gzip-compressed and base64 encoded for the JSON record"""
+    import gzip
+
+    log_path = log_path or _context.get("logFile")
+    content = {"performance": performance_snapshot()}
+    if log_path:
+        content["logFile"] = os.path.basename(log_path)
+        try:
+            content["logTail"] = read_log_tail(log_path)
+        except OSError as e:
+            content["logError"] = str(e)
+    raw = json.dumps(content, ensure_ascii=False).encode('utf-8')
+    return {
+        "encoding": "gzip+base64",
+        "size": len(raw),
+        "data": base64.b64encode(gzip.compress(raw)).decode('ascii')
+    }
+
+def decode_attachment(attachment):
+    if not attachment:
+        return {}
+    import gzip
+
+    return json.loads(gzip.decompress(base64.b64decode(attachment["data"])).decode('utf-8'))
+
+def load_records(pending_only=False):
+    """Spooled records, most recent first; pending_only skips records already shown"""
+    records = []
+    try:
+        names = os.listdir(crash_dir())
+    except FileNotFoundError:
+        return records
+    for name in names:
+        if not name.endswith(CRASH_RECORD_SUFFIX):
+            continue
+        record = read_json(os.path.join(crash_dir(), name))
+        if record.get("fingerprint") and not (pending_only and record.get("shown")):
+            records.append(record)
+    records.sort(key=lambda record: record.get("lastSeen", 0), reverse=True)
+    return records
+
+def mark_records(fingerprints, **fields):
+    for record_fingerprint in fingerprints:
+        path = _record_path(record_fingerprint)
+        if os.path.exists(path):
+            with StateFile(path) as record:
+                record.update(**fields)
+
+def prune_records():
+    """Drop uploaded records past their retention and the oldest beyond MAX_RECORDS"""
+    records = load_records()
+    now = time.time()
+    for index, record in enumerate(records):
+        expired = record.get("uploaded") and now - record.get("lastSeen", 0) > UPLOADED_RETENTION
+        if expired or index >= MAX_RECORDS:
+            for path in (_record_path(record["fingerprint"]), _record_path(record["fingerprint"]) + ".lock"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+def reporter_lock():
+    os.makedirs(crash_dir(), exist_ok=True)
+    return FileLock(os.path.join(crash_dir(), REPORTER_LOCK_NAME))
+
+def reporter_running():
+    """Whether a crash reporter instance currently holds the spool"""
+    lock = reporter_lock()
+    if lock.try_acquire():
+        lock.release()
+        return False
+    return True
+
+def launch_reporter(reporter_path='./AscendaraCrashReporter.exe'):
+    """Open the crash reporter on the spool unless one is already open.
+
+    A running reporter picks up new records by itself, so a burst of failures
+    ends up in one window.
+    """
+    if reporter_running():
+        logging.info("Crash reporter already open, the crash was added to its list")
+        return
+    if not os.path.exists(reporter_path):
+        logging.error(f"Crash reporter not found at: {reporter_path}")
+        return
+    # Use subprocess.Popen with CREATE_NO_WINDOW flag to hide console
+    subprocess.Popen([reporter_path], creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+
+def crash_endpoint():
+    """Configured upload endpoint: the environment, then crashReportEndpoint in the settings"""
+    endpoint = os.environ.get(ENDPOINT_ENV)
+    if endpoint:
+        return endpoint
+    settings_path = os.path.join(os.environ.get('APPDATA', os.path.expanduser("~")), 'ascendara',
+                                 'ascendarasettings.json')
+    return read_json(settings_path).get("crashReportEndpoint") or None
+
+def upload_pending(endpoint=None, attempts=UPLOAD_ATTEMPTS, backoff=UPLOAD_BACKOFF):
+    """Upload every record not uploaded yet in one gzip-compressed POST.
+
+    Returns the number of records uploaded; raises after the last failed attempt.
+    """
+    # Only the reporter uploads, the tools that spool should not pay for these imports
+    import gzip
+    import urllib.request
+
+    endpoint = endpoint or crash_endpoint()
+    if not endpoint:
+        raise RuntimeError("No crash report endpoint is configured")
+    records = [record for record in load_records() if not record.get("uploaded")]
+    if not records:
+        return 0
+    body = gzip.compress(json.dumps({"reports": records}, ensure_ascii=False).encode('utf-8'))
+    request = urllib.request.Request(endpoint, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'Content-Encoding': 'gzip',
+        'User-Agent': 'AscendaraCrashReporter'
+    })
+    for attempt in range(attempts):
+        try:
+            with urllib.request.urlopen(request, timeout=UPLOAD_TIMEOUT) as response:
+                response.read()
+            break
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = backoff * (2 ** attempt)
+            logging.warning(f"Crash report upload failed ({e}), retrying in {delay:.0f}s")
+            time.sleep(delay)
+    mark_records([record["fingerprint"] for record in records], uploaded=True, uploadedAt=time.time())
+    logging.info(f"Uploaded {len(records)} crash records ({len(body)} bytes compressed)")
+    return len(records)
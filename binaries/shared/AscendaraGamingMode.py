@@ -0,0 +1,137 @@
+# ==============================================================================
+# Ascendara Gaming Mode
+# ==============================================================================
+# Download throttling while a game launched by Ascendara is running. The game
+# handler lists running games under runningGames in the settings; the downloaders
+# poll that, cap their combined rate at gamingModeSpeedLimit and move themselves
+# to background priority until the last game exits.
+
+
+
+
+
+
+
+
+
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+
+DEFAULT_GAMING_SPEED_LIMIT = 1024  # KB/s while a game is running
+BACKGROUND_NICE = 10  # POSIX niceness while a game is running
+# Process names (lowercase, without extension) of the tools that use GamingMode and
+# manage their own priority while a game is running
+GAMING_MODE_TOOLS = ("ascendaradownloader", "ascendaragofilehelper", "ascendaratorrenthandler")
+
+class GamingMode:
+    """Throttles this job while any game launched by Ascendara is running (runningGames in settings)"""
+    CHECK_INTERVAL = 5  # seconds between settings checks
+
+    def __init__(self):
+        self.settings_path = os.path.join(os.getenv('APPDATA') or os.path.expanduser("~"), 'ascendara', 'ascendarasettings.json')
+        self.active = False
+        self.speed_limit = DEFAULT_GAMING_SPEED_LIMIT * 1024  # bytes per second
+        self._lock = threading.Lock()
+        self._last_check = 0
+        self._last_mtime = None
+        self._allowance = 0
+        self._last_refill = time.time()
+
+    def poll(self):
+        """Return whether gaming mode is active, re-reading settings at most every CHECK_INTERVAL"""
+        with self._lock:
+            now = time.time()
+            if now - self._last_check < self.CHECK_INTERVAL:
+                return self.active
+            self._last_check = now
+            try:
+                mtime = os.path.getmtime(self.settings_path)
+                if mtime == self._last_mtime:
+                    return self.active
+                self._last_mtime = mtime
+                with open(self.settings_path, 'r') as f:
+                    settings = json.load(f)
+            except Exception:
+                return self.active
+
+            active = bool(settings.get('gamingMode', True)) and bool(settings.get('runningGames'))
+            self.speed_limit = max(1, int(settings.get('gamingModeSpeedLimit', DEFAULT_GAMING_SPEED_LIMIT))) * 1024
+            if active != self.active:
+                self.active = active
+                self._allowance = 0
+                self._last_refill = now
+                set_background_priority(active)
+                if active:
+                    logging.info(f"Game running, throttling to {self.speed_limit // 1024} KB/s at low priority")
+                else:
+                    logging.info("No games running, restoring full speed")
+            return self.active
+
+    def throttle(self, nbytes):
+        """Sleep as needed to keep the combined rate of all threads under the gaming mode limit"""
+        if not self.poll():
+            return
+        with self._lock:
+            now = time.time()
+            self._allowance = min(self.speed_limit, self._allowance + (now - self._last_refill) * self.speed_limit)
+            self._last_refill = now
+            self._allowance -= nbytes
+            delay = -self._allowance / self.speed_limit if self._allowance < 0 else 0
+        if delay > 0:
+            time.sleep(delay)
+
+# Niceness before set_background_priority lowered it, None while not lowered
+_original_nice = None
+
+def _can_raise_nice_to(value):
+    """Whether this process may lower its niceness back to value (root or RLIMIT_NICE)"""
+    if os.geteuid() == 0:
+        return True
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+    except (ImportError, AttributeError, ValueError, OSError):
+        return False
+    # RLIMIT_NICE allows niceness down to 20 - limit
+    return soft == resource.RLIM_INFINITY or 20 - soft <= value
+
+def set_background_priority(enabled):
+    """Move this process in or out of background (low CPU and I/O) priority"""
+    global _original_nice
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000
+            PROCESS_MODE_BACKGROUND_END = 0x00200000
+            kernel32 = ctypes.windll.kernel32
+            mode = PROCESS_MODE_BACKGROUND_BEGIN if enabled else PROCESS_MODE_BACKGROUND_END
+            if not kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), mode):
+                logging.warning(f"Could not change process priority: error {ctypes.GetLastError()}")
+        except Exception as e:
+            logging.warning(f"Could not change process priority: {e}")
+        return
+
+    # An unprivileged process cannot lower its niceness again, so only raise it when
+    # it can be restored once the game exits
+    try:
+        if enabled:
+            if _original_nice is not None:
+                return
+            current = os.getpriority(os.PRIO_PROCESS, 0)
+            if current >= BACKGROUND_NICE:
+                return
+            if not _can_raise_nice_to(current):
+                logging.info("Not lowering process priority, it could not be restored after the game exits")
+                return
+            os.setpriority(os.PRIO_PROCESS, 0, BACKGROUND_NICE)
+            _original_nice = current
+        elif _original_nice is not None:
+            os.setpriority(os.PRIO_PROCESS, 0, _original_nice)
+            _original_nice = None
+    except OSError as e:
+        logging.warning(f"Could not change process priority: {e}")
@@ -0,0 +1,190 @@
+# ==============================================================================
+# Ascendara Manifest
+# ==============================================================================
+# Installed-files manifest for games. The downloaders write one after extraction
+# ({game}.manifest.ascendara.json in the game folder) with the size, mtime and a
+# fast hash of every file, plus the archive member each file came from, so an
+# install can later be verified and only its damaged files fetched again.
+
+
+
+
+
+
+
+
+
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from AscendaraState import TEMP_PREFIX, TEMP_SUFFIX, StateFile, read_json, replace_json
+
+# xxh3 is several times faster than any hashlib algorithm, blake2b is the stdlib fallback
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+MANIFEST_SUFFIX = ".manifest.ascendara.json"
+MANIFEST_VERSION = 1
+READ_BLOCK = 4 * 1024 * 1024
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+_buffers = threading.local()
+
+def manifest_path(game_dir):
+    return os.path.join(game_dir, os.path.basename(os.path.normpath(game_dir)) + MANIFEST_SUFFIX)
+
+def default_algorithm():
+    return "xxh3_128" if xxhash is not None else "blake2b"
+
+def _new_hash(algorithm):
+    if algorithm == "xxh3_128":
+        if xxhash is None:
+            raise RuntimeError("This manifest uses xxh3_128 but the xxhash module is not installed")
+        return xxhash.xxh3_128()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    raise RuntimeError(f"Unknown manifest hash algorithm: {algorithm}")
+
+def hash_file(file_path, algorithm):
+    """Hash a file with large sequential reads into a per-thread buffer.
+
+    Both hash implementations release the GIL on large updates, so several of
+    these run in parallel across a thread pool.
+    """
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _buffers.buffer = bytearray(READ_BLOCK)
+    view = memoryview(buffer)
+    digest = _new_hash(algorithm)
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+def _is_own_file(name):
+    """Ascendara's own files in a game folder are not part of the install"""
+    if name.startswith(TEMP_PREFIX) and name.endswith(TEMP_SUFFIX):
+        return True
+    return name.endswith((".ascendara.json", ".ascendara.json.lock")) or name.startswith("header.ascendara")
+
+def _walk(game_dir):
+    for root, _, files in os.walk(game_dir):
+        for name in files:
+            if _is_own_file(name):
+                continue
+            full_path = os.path.join(root, name)
+            yield os.path.relpath(full_path, game_dir).replace(os.sep, '/'), full_path
+
+def _describe(full_path, algorithm):
+    stat = os.stat(full_path)
+    return [stat.st_size, stat.st_mtime_ns, hash_file(full_path, algorithm)]
+
+def build_manifest(game_dir, archives=None, members=None, workers=DEFAULT_WORKERS):
+    """Hash every file of an install and write its manifest.
+
+    archives is a list of {"name", "url", "format"} records and members
+    maps a relative path to [archive index, member name] for files that came out of
+    one of them.
+    """
+    start = time.time()
+    algorithm = default_algorithm()
+    paths = dict(_walk(game_dir))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        described = executor.map(lambda item: (item[0], _describe(item[1], algorithm)), paths.items())
+        files = dict(described)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "algorithm": algorithm,
+        "created": int(time.time()),
+        "files": files,
+        "archives": archives or [],
+        "members": {path: source for path, source in (members or {}).items() if path in files}
+    }
+    replace_json(manifest_path(game_dir), manifest)
+    total = sum(entry[0] for entry in files.values())
+    logging.info(f"Manifest of {len(files)} files ({total / (1024 * 1024):.1f} MB) written in {time.time() - start:.2f}s")
+    return manifest
+
+def load_manifest(game_dir):
+    manifest = read_json(manifest_path(game_dir))
+    return manifest if manifest.get("files") is not None else None
+
+def verify_install(game_dir, quick=False, workers=DEFAULT_WORKERS):
+    """Check an install against its manifest and return a report with a repair list.
+
+    The repair list holds every missing or damaged file. quick trusts files whose
+    size and mtime still match the manifest and only hashes the rest; a full check
+    hashes everything.
+    """
+    manifest = load_manifest(game_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No manifest found in {game_dir}")
+    start = time.time()
+    algorithm = manifest["algorithm"]
+
+    damaged = []
+    to_hash = []
+    for rel_path, (size, mtime_ns, expected) in manifest["files"].items():
+        full_path = os.path.join(game_dir, rel_path)
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            damaged.append({"path": rel_path, "reason": "missing"})
+            continue
+        if stat.st_size != size:
+            damaged.append({"path": rel_path, "reason": "size"})
+        elif not (quick and stat.st_mtime_ns == mtime_ns):
+            to_hash.append((rel_path, full_path, expected))
+
+    def check(item):
+        rel_path, full_path, expected = item
+        try:
+            return rel_path, hash_file(full_path, algorithm) == expected
+        except OSError:
+            return rel_path, False
+
+    hashed_bytes = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for rel_path, matches in executor.map(check, to_hash):
+            hashed_bytes += manifest["files"][rel_path][0]
+            if not matches:
+                damaged.append({"path": rel_path, "reason": "hash"})
+
+    # Each damaged file with the archive member that covers it, when known
+    members = manifest.get("members", {})
+    for item in damaged:
+        source = members.get(item["path"])
+        item["archive"] = source[0] if source else None
+        item["member"] = source[1] if source else None
+
+    report = {
+        "time": int(time.time()),
+        "quick": quick,
+        "files": len(manifest["files"]),
+        "hashed": len(to_hash),
+        "hashedBytes": hashed_bytes,
+        "seconds": round(time.time() - start, 2),
+        "repair": damaged
+    }
+    logging.info(f"Verified {report['files']} files of {game_dir} in {report['seconds']}s, "
+                 f"{len(damaged)} damaged, {len(to_hash)} hashed")
+    return report
+
+def refresh_entries(game_dir, rel_paths):
+    """Re-describe repaired files so the next quick verify trusts them again"""
+    with StateFile(manifest_path(game_dir)) as manifest:
+        algorithm = manifest.get("algorithm", default_algorithm())
+        for rel_path in rel_paths:
+            full_path = os.path.join(game_dir, rel_path)
+            if os.path.isfile(full_path):
+                manifest.set(("files", rel_path), _describe(full_path, algorithm))
@@ -0,0 +1,448 @@
+# ==============================================================================
+# Ascendara State
+# ==============================================================================
+# Shared JSON state store for the Ascendara tools. Game info files, games.json
+# and ascendarasettings.json are written by several tools and by main.js at the
+# same time, so every write here takes an advisory lock, merges only the fields
+# this process changed into what is on disk and replaces the file atomically.
+# Changes of {game}.ascendara.json that the library view sees are mirrored into
+# the download directory's library index so main.js can load the whole library in
+# one read. Only these tools write the index, main.js just reads it.
+#
+# The tools import this module from binaries/shared, builds need it on the
+# module search path (pyinstaller --paths binaries/shared).
+
+
+
+
+
+
+
+
+
+
+import os
+import sys
+import time
+import copy
+import json
+import logging
+from tempfile import NamedTemporaryFile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOCK_TIMEOUT = 10  # seconds to wait for another tool before writing without the lock
+REPLACE_ATTEMPTS = 3
+LIBRARY_INDEX_NAME = "library.ascendara.index"
+GAME_INFO_SUFFIX = ".ascendara.json"
+TEMP_PREFIX = ".ascendara-"  # atomic_write temporary files, never part of a game install
+TEMP_SUFFIX = ".tmp"
+# downloadingData fields that change on every progress write; only the Downloads page
+# reads them, from the game file itself, so they are left out of the library index
+PROGRESS_FIELDS = ("progressCompleted", "progressDownloadSpeeds", "timeUntilComplete",
+                   "progressCurrentFile", "progressTotalFiles")
+
+_DELETED = object()
+_snapshots = {}  # path -> document as read_json/write_json callers last saw it
+_indexed = {}  # (index path, key) -> library view this process last appended
+
+def dumps(data):
+    """Serialize to UTF-8 JSON bytes with the four-space indent the files are read with by hand.
+
+    orjson can only indent by two, so documents always go through json.
+    """
+    return json.dumps(data, indent=4, ensure_ascii=False).encode('utf-8')
+
+def loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+class FileLock:
+    """Advisory inter-process lock on a sidecar <path>.lock file.
+
+    The lock is released by the OS when the holder dies, so a crashed tool never
+    leaves it stuck. If it cannot be taken within timeout the caller proceeds
+    unlocked, the write itself is still atomic.
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.lock_path = f"{path}.lock"
+        self.timeout = timeout
+        self.file = None
+
+    def _try_lock(self):
+        if sys.platform == 'win32':
+            import msvcrt
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def acquire(self):
+        try:
+            self.file = open(self.lock_path, 'a+b')
+        except OSError as e:
+            logging.warning(f"Could not open lock file {self.lock_path}: {e}")
+            return False
+        deadline = time.time() + self.timeout
+        delay = 0.005
+        while True:
+            try:
+                self._try_lock()
+                return True
+            except OSError:
+                if time.time() >= deadline:
+                    logging.warning(f"Timed out waiting for {self.lock_path}, writing without the lock")
+                    self.file.close()
+                    self.file = None
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
+
+    def try_acquire(self):
+        """Take the lock only if it is free right now, for single-instance checks"""
+        try:
+            self.file = open(self.lock_path, 'a+b')
+        except OSError:
+            return False
+        try:
+            self._try_lock()
+            return True
+        except OSError:
+            self.file.close()
+            self.file = None
+            return False
+
+    def release(self):
+        if self.file is None:
+            return
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+def _read_document(path, attempts=3):
+    """The document on disk or None when it is missing.
+
+    main.js writes in place, so a read can catch a half-written file. Such reads are
+    retried briefly before giving up with ValueError.
+    """
+    for attempt in range(attempts):
+        try:
+            with open(path, 'rb') as f:
+                return loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            if attempt == attempts - 1:
+                raise ValueError(f"Unreadable {path}: {e}")
+            time.sleep(0.05)
+
+def atomic_write(path, data):
+    """Replace path with data (a document or raw bytes) through a temporary file.
+
+    Callers that need it hold the FileLock.
+    """
+    directory = os.path.dirname(path) or '.'
+    temp_file_path = None
+    try:
+        with NamedTemporaryFile('wb', delete=False, dir=directory, prefix=TEMP_PREFIX,
+                                suffix=TEMP_SUFFIX) as temp_file:
+            temp_file.write(data if isinstance(data, bytes) else dumps(data))
+            temp_file_path = temp_file.name
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(temp_file_path, path)
+                temp_file_path = None
+                break
+            except PermissionError:
+                # Windows refuses the replace while a reader has the file open
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.2 * (attempt + 1))
+    finally:
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+
+def _diff(old, new, path=()):
+    """(key path, value) pairs turning old into new, recursing into nested dicts"""
+    changes = []
+    for key, value in new.items():
+        if key not in old:
+            changes.append((path + (key,), value))
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            changes.extend(_diff(old[key], value, path + (key,)))
+        elif old[key] != value:
+            changes.append((path + (key,), value))
+    for key in old:
+        if key not in new:
+            changes.append((path + (key,), _DELETED))
+    return changes
+
+def _apply(document, key_path, value):
+    target = document
+    for key in key_path[:-1]:
+        if not isinstance(target.get(key), dict):
+            target[key] = {}
+        target = target[key]
+    if value is _DELETED:
+        target.pop(key_path[-1], None)
+    else:
+        target[key_path[-1]] = copy.deepcopy(value)
+
+def read_json(path, default=None):
+    """Read a document and remember it, so a later write_json only sends what changed"""
+    try:
+        data = _read_document(path)
+    except ValueError as e:
+        logging.error(str(e))
+        data = None
+    if data is None:
+        return {} if default is None else default
+    _snapshots[path] = copy.deepcopy(data)
+    return data
+
+def write_json(path, data):
+    """Write data, merging only the fields changed since this process last read or wrote path.
+
+    Fields other tools changed in the meantime are kept. Without a previous read or
+    write the whole document is replaced. Returns False when nothing had to be written.
+    """
+    snapshot = _snapshots.get(path)
+    with FileLock(path):
+        try:
+            current = _read_document(path)
+        except ValueError as e:
+            # Our own full view beats a broken file
+            logging.warning(str(e))
+            current = None
+        if snapshot is None or current is None or not isinstance(current, dict):
+            merged = copy.deepcopy(data)
+        else:
+            changes = _diff(snapshot, data)
+            if not changes:
+                return False
+            merged = copy.deepcopy(current)
+            for key_path, value in changes:
+                _apply(merged, key_path, value)
+            if merged == current:
+                _snapshots[path] = copy.deepcopy(data)
+                return False
+        atomic_write(path, merged)
+        _index_game_file(path, merged)
+    # Diff against the caller's view next time, not the merged one, or fields only
+    # other tools know about would look deleted
+    _snapshots[path] = copy.deepcopy(data)
+    return True
+
+def replace_json(path, data):
+    """Replace the whole document atomically under the lock"""
+    with FileLock(path):
+        atomic_write(path, data)
+        _index_game_file(path, data)
+    _snapshots[path] = copy.deepcopy(data)
+
+class StateFile:
+    """Batched transaction on one JSON document.
+
+    Sets, deletes and increments are recorded against key paths and applied in one
+    locked read-merge-write on commit(), so counters stay correct even when another
+    tool updated them in between. Used as a context manager it commits on success.
+    """
+
+    def __init__(self, path, default=None):
+        self.path = path
+        try:
+            self.data = _read_document(path)
+        except ValueError as e:
+            logging.error(str(e))
+            self.data = None
+        if self.data is None:
+            self.data = {} if default is None else default
+        self.pending = []
+
+    @staticmethod
+    def _key_path(key):
+        return key if isinstance(key, tuple) else (key,)
+
+    def get(self, key, default=None):
+        target = self.data
+        for part in self._key_path(key):
+            if not isinstance(target, dict) or part not in target:
+                return default
+            target = target[part]
+        return target
+
+    def set(self, key, value):
+        key_path = self._key_path(key)
+        self.pending.append(("set", key_path, value))
+        _apply(self.data, key_path, value)
+
+    def update(self, **fields):
+        for key, value in fields.items():
+            self.set(key, value)
+
+    def delete(self, key):
+        key_path = self._key_path(key)
+        self.pending.append(("set", key_path, _DELETED))
+        _apply(self.data, key_path, _DELETED)
+
+    def increment(self, key, amount=1, minimum=None):
+        key_path = self._key_path(key)
+        self.pending.append(("add", key_path, (amount, minimum)))
+        _apply(self.data, key_path, self._added(self.get(key_path, 0), amount, minimum))
+
+    @staticmethod
+    def _added(value, amount, minimum):
+        value = (value or 0) + amount
+        return value if minimum is None else max(minimum, value)
+
+    @property
+    def dirty(self):
+        return bool(self.pending)
+
+    def commit(self):
+        """Apply the pending changes to the current document on disk in one write"""
+        if not self.pending:
+            return False
+        with FileLock(self.path):
+            current = _read_document(self.path)
+            current = current if isinstance(current, dict) else {}
+            document = copy.deepcopy(current)
+            for operation, key_path, value in self.pending:
+                if operation == "add":
+                    amount, minimum = value
+                    current_value = document
+                    for part in key_path:
+                        current_value = current_value.get(part) if isinstance(current_value, dict) else None
+                    value = self._added(current_value, amount, minimum)
+                _apply(document, key_path, value)
+            changed = document != current
+            if changed:
+                atomic_write(self.path, document)
+                _index_game_file(self.path, document)
+        self.pending = []
+        self.data = document
+        return changed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+
+def game_status(info):
+    """Short library status of a game info document"""
+    downloading_data = info.get("downloadingData") or {}
+    if downloading_data.get("error"):
+        return "error"
+    for phase in ("extracting", "updating", "downloading"):
+        if downloading_data.get(phase):
+            return phase
+    if downloading_data:
+        return "downloading"
+    return "running" if info.get("isRunning") else "installed"
+
+def library_view(info):
+    """A game info document without the fields only progress writes change"""
+    downloading_data = info.get("downloadingData")
+    if not isinstance(downloading_data, dict):
+        return info
+    view = dict(info)
+    view["downloadingData"] = {k: v for k, v in downloading_data.items() if k not in PROGRESS_FIELDS}
+    return view
+
+class LibraryIndex:
+    """Append-and-compact log of every game in a download directory.
+
+    Each line is one JSON record {"key", "status", "mtime", "info"} and later lines
+    for a key replace earlier ones, so an update is a single small append. info is the
+    game document without its PROGRESS_FIELDS and a line is only appended when that
+    changed. Once the log has grown well past its last compacted size it is rewritten
+    with one line per game. The first line records that size. main.js loads settled
+    games from this file in one read instead of opening every {game}.ascendara.json,
+    as long as mtime still matches the game file.
+    """
+    COMPACT_SLACK = 64 * 1024  # bytes the log may grow beyond twice its compacted size
+
+    def __init__(self, library_dir):
+        self.path = os.path.join(library_dir, LIBRARY_INDEX_NAME)
+
+    @staticmethod
+    def _line(record):
+        if orjson is not None:
+            return orjson.dumps(record) + b"\n"
+        return json.dumps(record, separators=(',', ':'), ensure_ascii=False).encode('utf-8') + b"\n"
+
+    def _compacted_size(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return loads(f.readline()).get("compacted", 0)
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+    def load(self):
+        """key -> latest record; a torn last line from a crash is skipped"""
+        records = {}
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = loads(line)
+                    except ValueError:
+                        continue
+                    if "key" in record:
+                        records[record["key"]] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def update(self, key, info, mtime=None):
+        view = library_view(info)
+        if _indexed.get((self.path, key)) == view:
+            return
+        record = {"key": key, "status": game_status(info), "mtime": mtime or time.time(), "info": view}
+        with FileLock(self.path):
+            with open(self.path, 'ab') as f:
+                f.write(self._line(record))
+                size = f.tell()
+            if size > 2 * self._compacted_size() + self.COMPACT_SLACK:
+                self._compact()
+        _indexed[(self.path, key)] = view
+
+    def _compact(self):
+        """Rewrite the log with one line per game; the caller holds the lock"""
+        records = self.load()
+        body = b"".join(self._line(record) for record in records.values())
+        atomic_write(self.path, self._line({"compacted": len(body)}) + body)
+
+def _index_game_file(path, document):
+    """Mirror a write of <library>/<game>/<game>.ascendara.json into the library index"""
+    directory, name = os.path.split(os.path.abspath(path))
+    game = os.path.basename(directory)
+    if name != f"{game}{GAME_INFO_SUFFIX}" or not isinstance(document, dict):
+        return
+    try:
+        LibraryIndex(os.path.dirname(directory)).update(game, document, os.path.getmtime(path))
+    except Exception as e:
+        logging.error(f"Failed to update the library index for {game}: {e}")
@@ -67,6 +67,9 @@ const LANG_DIR = !isWindows
   ? path.join(app.getPath("userData"), "Ascendara", "languages")
   : path.join(os.homedir(), ".ascendara", "languages");
 
+// {lang}.json only, not the translator's bundles, bundle index or lock files
+const isLanguageFile = file => /^[^.]+\.json$/.test(file);
+
 try {
   config = require("./config.prod.js");
 } catch (e) {
@@ -456,6 +459,13 @@ class SettingsManager {
       language: "en",
       theme: "purple",
       threadCount: 4,
+      gamingMode: true,
+      gamingModeSpeedLimit: 1024,
+      gameTelemetry: false,
+      gameTelemetryInterval: 2,
+      gameWarmup: false,
+      gameWarmupBudget: 512,
+      gamePriorityBoost: false,
       sideScrollBar: false,
       crackDirectory: "",
     };
@@ -718,7 +728,7 @@ async function getNewLangKeys() {
     }
 
     // Get all language files from the languages directory in AppData Local
-    const languageFiles = fs.readdirSync(LANG_DIR).filter(file => file.endsWith(".json"));
+    const languageFiles = fs.readdirSync(LANG_DIR).filter(isLanguageFile);
 
     // Fetch reference English translations from API
     const response = await fetch("https://api.ascendara.app/language/en");
@@ -743,83 +753,79 @@ async function getNewLangKeys() {
 
     // Store missing keys for each language
     const missingKeys = {};
-
-    // Compare each language file with reference
-    for (const langFile of languageFiles) {
-      const langCode = langFile.replace(".json", "");
-      const langPath = path.join(LANG_DIR, langFile);
-      let langContent = JSON.parse(fs.readFileSync(langPath, "utf8"));
-
-      // Get all nested keys from the language file
-      let langKeys = getAllKeys(langContent);
-
+    const languageMissing = langPath => {
+      const langContent = JSON.parse(fs.readFileSync(langPath, "utf8"));
+      const langKeys = new Set(getAllKeys(langContent));
       // Find keys that exist in reference but not in language file
-      let missing = referenceKeys.filter(key => !langKeys.includes(key));
-
-      if (missing.length > 0) {
-        // Run the translation script for missing keys
-        try {
-          let args;
-          if (isWindows) {
-            translatorExePath = isDev
-              ? path.join(
-                  "./binaries/AscendaraLanguageTranslation/dist/AscendaraLanguageTranslation.exe"
-                )
-              : path.join(appDirectory, "/resources/AscendaraLanguageTranslation.exe");
-            args = [langCode, "--updateKeys"];
-          } else {
-            // For non-Windows, use python3 directly
-            translatorExePath = "python3";
-            // Set the script path based on environment
-            const scriptPath = isDev
-              ? "./binaries/AscendaraLanguageTranslation/src/debian/AscendaraLanguageTranslation.py"
-              : path.join(appDirectory, "/resources/AscendaraLanguageTranslation.py");
-            // Initialize args with script path and standard arguments
-            args = [scriptPath, langCode, "--updateKeys"];
-          }
+      return referenceKeys.filter(key => !langKeys.has(key));
+    };
 
-          // Add each missing key as a separate --newKey argument
-          missing.forEach(key => {
-            args.push("--newKey", key);
-          });
+    // The language version changed, so every installed language goes to the translator.
+    // English may have only reworded or removed strings, which the key comparison
+    // below cannot see
+    const pendingLanguages = languageFiles.map(langFile => langFile.replace(".json", ""));
+    if (pendingLanguages.length > 0) {
+      // One translator run covers every language. Without --newKey it diffs each file
+      // against the English it was translated from, so added, changed and removed keys
+      // are all handled. It also saves the new language version once it is done
+      try {
+        let args;
+        if (isWindows) {
+          translatorExePath = isDev
+            ? path.join(
+                "./binaries/AscendaraLanguageTranslation/dist/AscendaraLanguageTranslation.exe"
+              )
+            : path.join(appDirectory, "/resources/AscendaraLanguageTranslation.exe");
+          args = [pendingLanguages.join(","), "--updateKeys"];
+        } else {
+          // For non-Windows, use python3 directly
+          translatorExePath = "python3";
+          // Set the script path based on environment
+          const scriptPath = isDev
+            ? "./binaries/AscendaraLanguageTranslation/src/debian/AscendaraLanguageTranslation.py"
+            : path.join(appDirectory, "/resources/AscendaraLanguageTranslation.py");
+          // Initialize args with script path and standard arguments
+          args = [scriptPath, pendingLanguages.join(","), "--updateKeys"];
+        }
 
-          // Start the translation process with proper configuration
-          const translationProcess = spawn(translatorExePath, args, {
-            stdio: ["ignore", "pipe", "pipe"],
-            shell: !isWindows, // Use shell on non-Windows platforms
-          });
+        // Start the translation process with proper configuration
+        const translationProcess = spawn(translatorExePath, args, {
+          stdio: ["ignore", "pipe", "pipe"],
+          shell: !isWindows, // Use shell on non-Windows platforms
+        });
 
-          // Monitor process output
-          translationProcess.stdout.on("data", data => {
-            console.log(`Translation stdout: ${data}`);
-          });
+        // Monitor process output
+        translationProcess.stdout.on("data", data => {
+          console.log(`Translation stdout: ${data}`);
+        });
 
-          translationProcess.stderr.on("data", data => {
-            console.error(`Translation stderr: ${data}`);
-          });
+        translationProcess.stderr.on("data", data => {
+          console.error(`Translation stderr: ${data}`);
+        });
 
-          // Wait for process to complete
-          await new Promise((resolve, reject) => {
-            translationProcess.on("close", code => {
-              if (code === 0) {
-                resolve();
-              } else {
-                reject(new Error(`Translation process exited with code ${code}`));
-              }
-            });
+        // Wait for process to complete
+        await new Promise((resolve, reject) => {
+          translationProcess.on("close", code => {
+            if (code === 0) {
+              resolve();
+            } else {
+              reject(new Error(`Translation process exited with code ${code}`));
+            }
           });
-
-          // Recheck the language file after translation
-          langContent = JSON.parse(fs.readFileSync(langPath, "utf8"));
-          langKeys = getAllKeys(langContent);
-          missing = referenceKeys.filter(key => !langKeys.includes(key));
-        } catch (error) {
-          console.error(`Error running translation script for ${langCode}:`, error);
-        }
+        });
+      } catch (error) {
+        console.error(
+          `Error running translation script for ${pendingLanguages.join(", ")}:`,
+          error
+        );
       }
 
-      if (missing.length > 0) {
-        missingKeys[langCode] = missing;
+      // Recheck the language files after translation, for reporting only
+      for (const langCode of pendingLanguages) {
+        const missing = languageMissing(path.join(LANG_DIR, `${langCode}.json`));
+        if (missing.length > 0) {
+          missingKeys[langCode] = missing;
+        }
       }
     }
     console.log("Missing Keys:", missingKeys);
@@ -1264,7 +1270,10 @@ ipcMain.handle("check-retry-extract", async (event, game) => {
     }
     const downloadDirectory = settings.downloadDirectory;
     const gameDirectory = path.join(downloadDirectory, game);
-    const files = await fs.promises.readdir(gameDirectory);
+    // Lock sidecars of the game info file are not game files
+    const files = (await fs.promises.readdir(gameDirectory)).filter(
+      file => !file.endsWith(".lock")
+    );
     const jsonFile = `${game}.ascendara.json`;
     if (files.length === 1 && files[0] === jsonFile) {
       return false;
@@ -2004,6 +2013,34 @@ ipcMain.handle("check-game-dependencies", async () => {
   return await checkGameDependencies();
 });
 
+const LIBRARY_INDEX_NAME = "library.ascendara.index";
+
+// Latest record per game from the library index the tools append to, later lines win.
+// Only the Python tools write the index, under their lock; main.js never appends to it.
+async function readLibraryIndex(downloadDirectory) {
+  const records = new Map();
+  try {
+    const data = await fs.promises.readFile(
+      path.join(downloadDirectory, LIBRARY_INDEX_NAME),
+      "utf8"
+    );
+    for (const line of data.split("\n")) {
+      if (!line) continue;
+      try {
+        const record = JSON.parse(line);
+        if (record.key) records.set(record.key, record);
+      } catch (error) {
+        // A torn last line after a crash, the game is read from its own file instead
+      }
+    }
+  } catch (error) {
+    if (error.code !== "ENOENT") {
+      console.error("Error reading library index:", error);
+    }
+  }
+  return records;
+}
+
 ipcMain.handle("get-games", async () => {
   const filePath = path.join(app.getPath("userData"), "ascendarasettings.json");
   try {
@@ -2022,10 +2059,28 @@ ipcMain.handle("get-games", async () => {
       .filter(dirent => dirent.isDirectory())
       .map(dirent => dirent.name);
 
-    // Read {game}.ascendara.json from each subdirectory
+    // Settled games whose {game}.ascendara.json has not been written since their index
+    // record are taken from the index; downloads, games written by main.js and games the
+    // index does not know yet are read from their own file
+    const libraryIndex = await readLibraryIndex(downloadDirectory);
     const games = await Promise.all(
       gameDirectories.map(async dir => {
+        const record = libraryIndex.get(dir);
         const gameInfoPath = path.join(downloadDirectory, dir, `${dir}.ascendara.json`);
+        if (
+          record &&
+          record.info &&
+          (record.status === "installed" || record.status === "running")
+        ) {
+          try {
+            const stats = await fs.promises.stat(gameInfoPath);
+            if (stats.mtimeMs / 1000 <= record.mtime + 0.001) {
+              return record.info;
+            }
+          } catch (error) {
+            // Missing file, the read below reports it
+          }
+        }
         try {
           const gameInfoData = await fs.promises.readFile(gameInfoPath, "utf8");
           return JSON.parse(gameInfoData);
@@ -3583,7 +3638,7 @@ ipcMain.handle("get-downloaded-languages", async () => {
 
     const files = await fs.readdir(LANG_DIR);
     return files
-      .filter(file => file.endsWith(".json"))
+      .filter(isLanguageFile)
       .map(file => file.replace(".json", ""));
   } catch (error) {
     console.error("Error getting downloaded languages:", error);
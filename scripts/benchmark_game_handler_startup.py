@@ -0,0 +1,119 @@
+# This script measures how long the Game Handler takes from being invoked to starting the game.
+# A throwaway game that only records when it was started is launched through the handler with a
+# temporary APPDATA, and the median latency is checked against the launch budget.
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BINARIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'binaries')
+HANDLER_SOURCE = os.path.join(BINARIES_DIR, 'AscendaraGameHandler', 'src', 'AscendaraGameHandler.py')
+DEFAULT_BUDGET_MS = 150
+
+def create_game(work_dir):
+    """Create a game folder whose exe only touches a marker file next to itself"""
+    game_dir = os.path.join(work_dir, 'games', 'Benchmark Game')
+    os.makedirs(game_dir)
+    if sys.platform == 'win32':
+        exe_path = os.path.join(game_dir, 'Benchmark Game.bat')
+        with open(exe_path, 'w') as f:
+            f.write('@echo off\r\ntype nul > "%~dp0started"\r\n')
+    else:
+        exe_path = os.path.join(game_dir, 'Benchmark Game')
+        with open(exe_path, 'w') as f:
+            f.write('#!/bin/sh\n: > "$(dirname "$0")/started"\n')
+        os.chmod(exe_path, 0o755)
+    with open(os.path.join(game_dir, 'Benchmark Game.ascendara.json'), 'w') as f:
+        json.dump({"game": "Benchmark Game", "version": "1.0", "online": False, "dlc": False,
+                   "isRunning": False, "executable": exe_path, "playTime": 0, "launchCount": 0}, f, indent=4)
+    return game_dir, exe_path
+
+def create_appdata(work_dir, args):
+    appdata = os.path.join(work_dir, 'appdata')
+    os.makedirs(os.path.join(appdata, 'ascendara'))
+    with open(os.path.join(appdata, 'ascendara', 'ascendarasettings.json'), 'w') as f:
+        json.dump({"downloadDirectory": os.path.join(work_dir, 'games'), "gameWarmup": args.warmup,
+                   "gameTelemetry": False, "gamePriorityBoost": False}, f, indent=4)
+    return appdata
+
+def run_once(handler_cmd, handler_dir, game_dir, exe_path, env):
+    marker = os.path.join(game_dir, 'started')
+    if os.path.exists(marker):
+        os.remove(marker)
+    log_file = os.path.join(handler_dir, 'gamehandler.log')
+    log_offset = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+
+    invoked = time.time_ns()
+    handler = subprocess.Popen(handler_cmd + [exe_path, 'false'], env=env, cwd=handler_dir)
+    handler.wait(timeout=60)
+    if not os.path.exists(marker):
+        raise RuntimeError("The game was never started, see gamehandler.log")
+    external = (os.stat(marker).st_mtime_ns - invoked) / 1e6
+
+    internal = None
+    if os.path.exists(log_file):
+        with open(log_file, 'r') as f:
+            f.seek(log_offset)
+            match = re.search(r"Started .* (\d+) ms after handler start", f.read())
+            if match:
+                internal = int(match.group(1))
+    return external, internal
+
+def measure_interpreter(handler_cmd):
+    """Bare interpreter start-up, the floor for a handler that is not frozen"""
+    if handler_cmd[0] != sys.executable:
+        return None
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Game Handler launch latency')
+    parser.add_argument('--runs', type=int, default=5, help='Number of launches')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS, help='Median launch budget in ms')
+    parser.add_argument('--handler', default=None, help='Built AscendaraGameHandler executable to measure '
+                                                        'instead of the source file')
+    parser.add_argument('--warmup', action='store_true', help='Enable gameWarmup for the runs')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='ascendara_startup_bench_')
+    try:
+        # Run a copy of the handler so its log file lands in the temporary folder
+        handler_dir = os.path.join(work_dir, 'handler')
+        os.makedirs(handler_dir)
+        if args.handler:
+            handler_cmd = [os.path.abspath(args.handler)]
+        else:
+            shutil.copy(HANDLER_SOURCE, handler_dir)
+            handler_cmd = [sys.executable, os.path.join(handler_dir, 'AscendaraGameHandler.py')]
+
+        game_dir, exe_path = create_game(work_dir)
+        # The copy is no longer next to binaries/shared, point it there explicitly
+        env = dict(os.environ, APPDATA=create_appdata(work_dir, args),
+                   PYTHONPATH=os.path.abspath(os.path.join(BINARIES_DIR, 'shared')))
+
+        interpreter = measure_interpreter(handler_cmd)
+        results = [run_once(handler_cmd, handler_dir, game_dir, exe_path, env) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'run':>4} {'invoke to game ms':>18} {'in handler ms':>14}")
+    for i, (external, internal) in enumerate(results, 1):
+        print(f"{i:>4} {external:>18.1f} {internal if internal is not None else 'n/a':>14}")
+    median = statistics.median(external for external, _ in results)
+    if interpreter is not None:
+        print(f"\nInterpreter start-up alone: {interpreter:.1f} ms")
+    print(f"Median invoke to game: {median:.1f} ms (budget {args.budget:.0f} ms)")
+    if median > args.budget:
+        print("FAILED: launch latency is over budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
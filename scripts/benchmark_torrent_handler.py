@@ -0,0 +1,133 @@
+# This script benchmarks the Torrent Handler progress loop against the mock qBittorrent server.
+# It reports polling overhead, game JSON write volume and the delay between the torrent
+# completing and the repack setup being launched.
+
+import argparse
+import atexit
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'binaries', 'AscendaraTorrentHandler', 'src'))
+
+import AscendaraTorrentHandler as handler
+from mock_qbittorrent_server import MockQBittorrent, CURVES
+
+TORRENT_HASH = "c9e15763f722f23e98a29decdfae341b98d53056"
+TORRENT_NAME = "Benchmark Game"
+
+class FakeSetup:
+    """Stands in for the repack setup.exe, recording when it was launched"""
+    launched_at = None
+
+    def __init__(self, args, stdout=None, stderr=None, **kwargs):
+        FakeSetup.launched_at = time.time()
+        self.args = args
+        self.returncode = 0
+
+    def communicate(self, timeout=None):
+        return b"", b""
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+def run_once(args, work_dir):
+    mock = MockQBittorrent(duration=args.duration, curve=args.curve, total_size=args.size,
+                           error_rate=args.errorRate)
+    server = mock.create_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Count every game JSON write and the bytes it puts on disk, merged or replaced
+    writes = {"count": 0, "bytes": 0}
+    original_write = handler.write_json
+    original_replace = handler.replace_json
+
+    def counting_write(filepath, data):
+        written = original_write(filepath, data)
+        if written:
+            writes["count"] += 1
+            writes["bytes"] += os.path.getsize(filepath)
+        return written
+
+    def counting_replace(filepath, data):
+        original_replace(filepath, data)
+        writes["count"] += 1
+        writes["bytes"] += os.path.getsize(filepath)
+
+    handler.write_json = counting_write
+    handler.replace_json = counting_replace
+    handler.subprocess = types.SimpleNamespace(Popen=FakeSetup, PIPE=subprocess.PIPE, run=subprocess.run,
+                                               CREATE_NO_WINDOW=0)
+    FakeSetup.launched_at = None
+
+    game = "BenchmarkGame"
+    download_dir = os.path.join(work_dir, f"run-{time.time_ns()}")
+    torrent_folder = os.path.join(download_dir, game, TORRENT_NAME)
+    os.makedirs(torrent_folder)
+    open(os.path.join(torrent_folder, "setup.exe"), 'wb').close()
+
+    engine = handler.QBittorrentEngine(tuning=not args.noTuning, host='127.0.0.1', port=server.server_address[1])
+    manager = handler.TorrentManager(engine)
+    magnet = f"magnet:?xt=urn:btih:{TORRENT_HASH}&dn={TORRENT_NAME.replace(' ', '+')}"
+
+    wall_start = time.time()
+    cpu_start = time.process_time()
+    try:
+        manager.download_torrent(magnet, game, False, False, "1.0", "1 GB", download_dir)
+    finally:
+        wall = time.time() - wall_start
+        cpu = time.process_time() - cpu_start
+        handler.write_json = original_write
+        handler.replace_json = original_replace
+        handler.subprocess = subprocess
+        atexit.unregister(manager.cleanup)
+        server.shutdown()
+        server.server_close()
+
+    completed_on = mock.completion_time(TORRENT_HASH)
+    launch_delay = FakeSetup.launched_at - completed_on if completed_on and FakeSetup.launched_at else None
+    return {
+        "wall": wall,
+        "cpu": cpu,
+        "requests": sum(mock.requests.values()),
+        "endpoints": dict(mock.requests),
+        "writes": writes["count"],
+        "bytes": writes["bytes"],
+        "launch_delay": launch_delay
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Torrent Handler progress loop')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds until the mock torrent completes')
+    parser.add_argument('--curve', choices=sorted(CURVES), default='linear', help='Progress curve')
+    parser.add_argument('--size', type=int, default=4 * 1024 * 1024 * 1024, help='Payload size in bytes')
+    parser.add_argument('--errorRate', type=float, default=0.0, help='Probability of an injected HTTP 500')
+    parser.add_argument('--runs', type=int, default=1, help='Number of runs')
+    parser.add_argument('--noTuning', action='store_true', help='Skip the tuning profile step')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='ascendara_torrent_bench_')
+    try:
+        results = [run_once(args, work_dir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print()
+    print(f"{'run':>4} {'wall s':>8} {'cpu s':>8} {'req':>6} {'req/s':>7} {'writes':>7} {'KB written':>11} {'setup delay s':>14}")
+    for i, r in enumerate(results, 1):
+        delay = f"{r['launch_delay']:.3f}" if r['launch_delay'] is not None else "n/a"
+        print(f"{i:>4} {r['wall']:>8.2f} {r['cpu']:>8.3f} {r['requests']:>6} {r['requests'] / r['wall']:>7.2f} "
+              f"{r['writes']:>7} {r['bytes'] / 1024:>11.1f} {delay:>14}")
+    print(f"\nRequests by endpoint (last run): {results[-1]['endpoints']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# This script benchmarks the Language Translator against the mock translation server.
+# It runs a cold full translation, a warm one served from the translation memory, an
+# --updateKeys run for newly added English keys and a diff --updateKeys run after English
+# strings changed, and reports strings/s, requests/s, wall time and the translation memory
+# hit rate of each.
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'binaries', 'AscendaraLanguageTranslation', 'src'))
+
+import AscendaraLanguageTranslation as translator
+from mock_translation_server import MockTranslation, generate_english
+
+TRANSLATE_ENDPOINT = 'translate_a/single'
+
+def count_strings(document):
+    return sum(1 for value in translator.iter_strings(document) if value.strip())
+
+def add_keys(document, count):
+    """Add count new English keys and return their dotted names"""
+    added = document.setdefault("benchmarkAdded", {})
+    keys = []
+    for i in range(count):
+        key = f"added{len(added)}"
+        added[key] = f"Freshly added string number {i} for the update benchmark"
+        keys.append(f"benchmarkAdded.{key}")
+    return keys
+
+def change_strings(document, count):
+    """Reword count existing English strings, the way a routine English update does"""
+    changed = 0
+    for section in document.values():
+        if changed >= count:
+            break
+        if not isinstance(section, dict):
+            continue
+        for key, value in section.items():
+            if isinstance(value, str):
+                section[key] = f"{value} (reworded)"
+                changed += 1
+                break
+    return changed
+
+def run_once(name, mock, args, languages, output_dir, new_keys=None, strings=None):
+    memory = translator.TranslationMemory()
+    progress = translator.TranslationProgress(languages)
+    run_args = argparse.Namespace(lang=languages, output=output_dir, updateKeys=new_keys is not None,
+                                  newKey=new_keys or [], workers=args.workers, bundle=args.bundle)
+    requests_before = mock.requests.get(TRANSLATE_ENDPOINT, 0)
+    responses_before = dict(mock.responses)
+
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    start = time.time()
+    try:
+        if new_keys is not None:
+            translator.update_keys(languages, run_args, progress, memory, executor)
+        else:
+            translator.translate_languages(languages, run_args, progress, memory, executor)
+        progress.set_phase("completed")
+    finally:
+        wall = time.time() - start
+        executor.shutdown()
+        memory.save()
+
+    if strings is None:
+        strings = len(new_keys) if new_keys else count_strings(mock.english)
+    strings *= len(languages)
+    requests = mock.requests.get(TRANSLATE_ENDPOINT, 0) - requests_before
+    lookups = memory.hits + memory.misses
+    return {
+        "name": name,
+        "wall": wall,
+        "strings": strings,
+        "requests": requests,
+        "hit_rate": memory.hits / lookups if lookups else 0.0,
+        "throttled": mock.responses.get(429, 0) - responses_before.get(429, 0),
+        "failed": mock.responses.get(500, 0) - responses_before.get(500, 0),
+        "progress_writes": progress.writes
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Language Translator against a mock server')
+    parser.add_argument('--strings', type=int, default=1500, help='Strings in the English document')
+    parser.add_argument('--languages', default='fr,de', help='Comma separated target languages')
+    parser.add_argument('--workers', type=int, default=translator.TRANSLATION_WORKERS, help='Translation workers')
+    parser.add_argument('--added', type=int, default=25, help='English keys added before the --updateKeys run')
+    parser.add_argument('--changed', type=int, default=25, help='English strings reworded before the diff run')
+    parser.add_argument('--minLatency', type=float, default=0.1, help='Minimum translate latency in seconds')
+    parser.add_argument('--maxLatency', type=float, default=0.4, help='Maximum translate latency in seconds')
+    parser.add_argument('--rateLimit', type=int, default=None, help='Mock requests per second before 429s')
+    parser.add_argument('--errorRate', type=float, default=0.0, help='Probability of an injected HTTP 500')
+    parser.add_argument('--markerLossRate', type=float, default=0.0, help='Probability of a mangled batch')
+    parser.add_argument('--bundle', action='store_true', help='Also write language bundles')
+    parser.add_argument('--verbose', action='store_true', help='Keep the translator debug log')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    mock = MockTranslation(generate_english(args.strings), latency=(args.minLatency, args.maxLatency),
+                           rate_limit=args.rateLimit, error_rate=args.errorRate,
+                           marker_loss_rate=args.markerLossRate)
+    server = mock.create_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    translator.TRANSLATE_URL = f"{base}/translate_a/single"
+    translator.LANGUAGE_API_URL = f"{base}/language"
+
+    work_dir = tempfile.mkdtemp(prefix='ascendara_translator_bench_')
+    # Progress, translation memory and the timestamp file all live in the home folder
+    saved_env = {name: os.environ.get(name) for name in ('HOME', 'USERPROFILE')}
+    os.environ['HOME'] = os.environ['USERPROFILE'] = work_dir
+    languages = translator.parse_languages([args.languages])
+    output_dir = os.path.join(work_dir, 'languages')
+    if len(languages) == 1:
+        output_dir = os.path.join(output_dir, f"{languages[0]}.json")
+    try:
+        results = [
+            run_once("full (cold)", mock, args, languages, output_dir),
+            run_once("full (warm)", mock, args, languages, output_dir)
+        ]
+        new_keys = add_keys(mock.english, args.added)
+        results.append(run_once("updateKeys", mock, args, languages, output_dir, new_keys))
+        changed = change_strings(mock.english, args.changed)
+        results.append(run_once("diff", mock, args, languages, output_dir, [], changed))
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(work_dir, ignore_errors=True)
+        server.shutdown()
+        server.server_close()
+
+    print()
+    print(f"{'run':<12} {'wall s':>8} {'strings':>8} {'strings/s':>10} {'req':>6} {'req/s':>7} "
+          f"{'hit rate':>9} {'429':>5} {'500':>5} {'progress writes':>16}")
+    for r in results:
+        print(f"{r['name']:<12} {r['wall']:>8.2f} {r['strings']:>8} {r['strings'] / r['wall']:>10.1f} "
+              f"{r['requests']:>6} {r['requests'] / r['wall']:>7.2f} {r['hit_rate']:>9.1%} "
+              f"{r['throttled']:>5} {r['failed']:>5} {r['progress_writes']:>16}")
+    print(f"\nRequests by endpoint: {mock.requests}")
+    print(f"Characters sent for translation: {mock.characters}")
+
+if __name__ == "__main__":
+    main()
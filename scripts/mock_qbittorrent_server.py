@@ -0,0 +1,300 @@
+# This script runs a local stand-in for the qBittorrent Web API used by the Torrent Handler.
+# Torrents follow scripted progress curves and faults can be injected, so TorrentManager can be
+# exercised and profiled without a real qBittorrent or a real swarm.
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+COMPLETE_STATES = ("uploading", "stalledUP", "pausedUP", "queuedUP", "forcedUP", "checkingUP")
+
+def linear_curve(t):
+    return t
+
+def slowstart_curve(t):
+    return t * t
+
+def bursty_curve(t):
+    # Progress arrives in ten bursts with idle gaps in between
+    step = math.floor(t * 10)
+    return min(1.0, (step + min(1.0, (t * 10 - step) * 3)) / 10)
+
+def stall_curve(t):
+    # Stalls between 40% and 60% of the run, then catches up
+    if t < 0.4:
+        return t * 0.5 / 0.4
+    if t < 0.6:
+        return 0.5
+    return 0.5 + (t - 0.6) * 0.5 / 0.4
+
+CURVES = {
+    "linear": linear_curve,
+    "slowstart": slowstart_curve,
+    "bursty": bursty_curve,
+    "stall": stall_curve
+}
+
+class MockTorrent:
+    def __init__(self, torrent_hash, name, save_path, total_size, duration, curve):
+        self.hash = torrent_hash
+        self.name = name
+        self.save_path = save_path
+        self.total_size = total_size
+        self.duration = duration
+        self.curve = CURVES[curve]
+        self.added_on = time.time()
+        self.completed_on = None
+        self.last_sample = (self.added_on, 0.0)
+
+    def snapshot(self, now):
+        t = min(1.0, (now - self.added_on) / self.duration) if self.duration > 0 else 1.0
+        progress = self.curve(t)
+        last_time, last_progress = self.last_sample
+        dlspeed = int((progress - last_progress) * self.total_size / (now - last_time)) if now > last_time else 0
+        self.last_sample = (now, progress)
+
+        if progress >= 1.0:
+            if self.completed_on is None:
+                self.completed_on = now
+            state = "uploading"
+            dlspeed = 0
+        else:
+            state = "downloading" if dlspeed > 0 else "stalledDL"
+
+        remaining = self.total_size * (1 - progress)
+        return {
+            "hash": self.hash,
+            "name": self.name,
+            "save_path": self.save_path,
+            "progress": round(progress, 4),
+            "dlspeed": max(0, dlspeed),
+            "upspeed": 0,
+            "eta": int(remaining / dlspeed) if dlspeed > 0 else 8640000,
+            "size": self.total_size,
+            "total_size": self.total_size,
+            "downloaded": int(self.total_size * progress),
+            "downloaded_session": int(self.total_size * progress),
+            "state": state,
+            "added_on": int(self.added_on),
+            "completion_on": int(self.completed_on) if self.completed_on else -1
+        }
+
+class MockQBittorrent:
+    """State, scripted behaviour and request statistics of the stand-in server"""
+
+    def __init__(self, duration=10.0, curve="linear", total_size=1024 * 1024 * 1024,
+                 fail_login=False, error_rate=0.0, vanish_after=None):
+        self.duration = duration
+        self.curve = curve
+        self.total_size = total_size
+        self.fail_login = fail_login
+        self.error_rate = error_rate
+        self.vanish_after = vanish_after
+        self.lock = threading.Lock()
+        self.torrents = {}
+        self.rid = 0
+        self.speed_limits_mode = False
+        self.preferences = {
+            "disk_cache": -1,
+            "memory_working_set_limit": 512,
+            "async_io_threads": 10,
+            "hashing_threads": 1,
+            "file_pool_size": 40,
+            "max_connec_per_torrent": 100,
+            "send_buffer_watermark": 500,
+            "send_buffer_low_watermark": 10,
+            "send_buffer_watermark_factor": 50,
+            "socket_send_buffer_size": 0,
+            "socket_receive_buffer_size": 0,
+            "alt_dl_limit": 10240,
+            "alt_up_limit": 10240
+        }
+        self.requests = {}
+        self.request_times = []
+
+    def record(self, endpoint):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.request_times.append(time.time())
+
+    def add(self, urls, save_path):
+        for url in urls.split('\n'):
+            url = url.strip()
+            if not url:
+                continue
+            query = parse_qs(urlparse(url).query)
+            torrent_hash = url.split('&')[0].split(':')[-1].lower()
+            name = query.get('dn', [torrent_hash])[0]
+            with self.lock:
+                self.torrents[torrent_hash] = MockTorrent(torrent_hash, name, save_path, self.total_size,
+                                                          self.duration, self.curve)
+
+    def info(self, hashes=None):
+        now = time.time()
+        wanted = set(h.lower() for h in hashes.split('|')) if hashes and hashes != 'all' else None
+        result = []
+        with self.lock:
+            for torrent in list(self.torrents.values()):
+                if self.vanish_after is not None and now - torrent.added_on > self.vanish_after:
+                    del self.torrents[torrent.hash]
+                    continue
+                if wanted is None or torrent.hash in wanted:
+                    result.append(torrent.snapshot(now))
+        return result
+
+    def maindata(self):
+        torrents = {item["hash"]: item for item in self.info()}
+        with self.lock:
+            self.rid += 1
+            rid = self.rid
+        return {
+            "rid": rid,
+            "full_update": True,
+            "torrents": torrents,
+            "server_state": {
+                "dl_info_speed": sum(t["dlspeed"] for t in torrents.values()),
+                "up_info_speed": 0,
+                "use_alt_speed_limits": self.speed_limits_mode,
+                "connection_status": "connected"
+            }
+        }
+
+    def delete(self, hashes):
+        with self.lock:
+            for torrent_hash in hashes.split('|'):
+                self.torrents.pop(torrent_hash.lower(), None)
+
+    def completion_time(self, torrent_hash):
+        torrent = self.torrents.get(torrent_hash.lower())
+        return torrent.completed_on if torrent else None
+
+    def create_server(self, host='127.0.0.1', port=0):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _params(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if self.command == 'POST':
+                    length = int(self.headers.get('Content-Length', 0) or 0)
+                    body = self.rfile.read(length).decode('utf-8') if length else ''
+                    content_type = self.headers.get('Content-Type', '')
+                    if 'multipart/form-data' in content_type:
+                        params.update(parse_multipart(body, content_type))
+                    else:
+                        params.update({k: v[0] for k, v in parse_qs(body).items()})
+                return url.path, params
+
+            def _send(self, status, body, content_type='text/plain; charset=UTF-8', headers=None):
+                data = body.encode('utf-8') if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _json(self, value):
+                self._send(200, json.dumps(value), 'application/json')
+
+            def _handle(self):
+                path, params = self._params()
+                endpoint = path.replace('/api/v2/', '')
+                mock.record(endpoint)
+
+                if mock.error_rate and endpoint != 'auth/login' and random.random() < mock.error_rate:
+                    self._send(500, 'Injected failure')
+                    return
+
+                if endpoint == 'auth/login':
+                    if mock.fail_login:
+                        self._send(200, 'Fails.')
+                    else:
+                        self._send(200, 'Ok.', headers={'Set-Cookie': 'SID=mock; path=/'})
+                elif endpoint == 'auth/logout':
+                    self._send(200, '')
+                elif endpoint == 'app/version':
+                    self._send(200, 'v4.6.0')
+                elif endpoint == 'app/webapiVersion':
+                    self._send(200, '2.9.3')
+                elif endpoint == 'app/buildInfo':
+                    self._json({"qt": "6.4.3", "libtorrent": "2.0.9.0", "boost": "1.83.0",
+                                "openssl": "3.1.2", "bitness": 64})
+                elif endpoint == 'app/preferences':
+                    with mock.lock:
+                        self._json(dict(mock.preferences))
+                elif endpoint == 'app/setPreferences':
+                    with mock.lock:
+                        mock.preferences.update(json.loads(params.get('json', '{}')))
+                    self._send(200, '')
+                elif endpoint == 'torrents/add':
+                    mock.add(params.get('urls', ''), params.get('savepath', ''))
+                    self._send(200, 'Ok.')
+                elif endpoint == 'torrents/info':
+                    self._json(mock.info(params.get('hashes')))
+                elif endpoint == 'torrents/delete':
+                    mock.delete(params.get('hashes', ''))
+                    self._send(200, '')
+                elif endpoint == 'sync/maindata':
+                    self._json(mock.maindata())
+                elif endpoint == 'transfer/speedLimitsMode':
+                    self._send(200, '1' if mock.speed_limits_mode else '0')
+                elif endpoint == 'transfer/toggleSpeedLimitsMode':
+                    mock.speed_limits_mode = not mock.speed_limits_mode
+                    self._send(200, '')
+                elif endpoint == 'transfer/setSpeedLimitsMode':
+                    mock.speed_limits_mode = params.get('mode', '0') == '1'
+                    self._send(200, '')
+                else:
+                    self._send(404, 'Not Found')
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+def parse_multipart(body, content_type):
+    """Extract the simple form fields qbittorrentapi sends as multipart/form-data"""
+    boundary = content_type.split('boundary=')[-1].strip('"')
+    fields = {}
+    for part in body.split(f'--{boundary}'):
+        if 'name="' not in part:
+            continue
+        header, _, value = part.partition('\r\n\r\n')
+        name = header.split('name="')[1].split('"')[0]
+        fields[name] = value.rstrip('\r\n-')
+    return fields
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock qBittorrent Web API server')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds until a torrent completes')
+    parser.add_argument('--curve', choices=sorted(CURVES), default='linear', help='Progress curve')
+    parser.add_argument('--size', type=int, default=1024 * 1024 * 1024, help='Payload size in bytes')
+    parser.add_argument('--failLogin', action='store_true', help='Reject every login')
+    parser.add_argument('--errorRate', type=float, default=0.0, help='Probability of an injected HTTP 500')
+    parser.add_argument('--vanishAfter', type=float, default=None, help='Drop torrents after this many seconds')
+    args = parser.parse_args()
+
+    mock = MockQBittorrent(args.duration, args.curve, args.size, args.failLogin, args.errorRate, args.vanishAfter)
+    server = mock.create_server(port=args.port)
+    print(f"Mock qBittorrent Web API listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requests served: {json.dumps(mock.requests, indent=2)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# This script runs a local stand-in for the endpoints used by the Language Translator.
+# It serves Google Translate's translate_a/single and api.ascendara.app's language/en and
+# language/version with configurable latency, rate limiting and failure injection, so
+# AscendaraLanguageTranslation can be measured without touching the real services.
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+MARKER_LINE = re.compile(r"^\s*\[\s*\[\s*\d+\s*\]\s*\]\s*$")
+
+WORDS = ("game", "library", "download", "settings", "install", "update", "play", "folder", "the",
+         "your", "is", "ready", "failed", "open", "select", "new", "version", "available", "time")
+
+def generate_english(strings=1500, sections=40, duplicate_rate=0.1, seed=1):
+    """A nested document shaped like language/en: sections of keys, some sharing their text"""
+    rng = random.Random(seed)
+    document = {}
+    made = []
+    for i in range(strings):
+        section = document.setdefault(f"section{i % sections}", {})
+        if i % 7 == 0:
+            section = section.setdefault("nested", {})
+        if made and rng.random() < duplicate_rate:
+            text = rng.choice(made)
+        else:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12))).capitalize()
+            if rng.random() < 0.1:
+                text += " {{count}}"
+            made.append(text)
+        section[f"key{i}"] = text
+    return document
+
+def fake_translate(text, target_lang):
+    """Prefix every line with the language, marker lines pass through like real placeholders"""
+    lines = []
+    for line in text.split("\n"):
+        lines.append(line if MARKER_LINE.match(line) or not line.strip() else f"{target_lang}: {line}")
+    return lines
+
+class MockTranslation:
+    """State, scripted behaviour and request statistics of the stand-in server"""
+
+    def __init__(self, english=None, version=1, latency=(0.05, 0.2), rate_limit=None,
+                 error_rate=0.0, marker_loss_rate=0.0):
+        self.english = english if english is not None else generate_english()
+        self.version = version
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.marker_loss_rate = marker_loss_rate
+        self.lock = threading.Lock()
+        self.window = []
+        self.requests = {}
+        self.responses = {}
+        self.characters = 0
+
+    def record(self, endpoint, status):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def over_rate_limit(self):
+        if not self.rate_limit:
+            return False
+        now = time.time()
+        with self.lock:
+            self.window = [t for t in self.window if now - t < 1.0]
+            if len(self.window) >= self.rate_limit:
+                return True
+            self.window.append(now)
+            return False
+
+    def translate(self, text, target_lang):
+        with self.lock:
+            self.characters += len(text)
+        lines = fake_translate(text, target_lang)
+        if self.marker_loss_rate and random.random() < self.marker_loss_rate:
+            # Drop a marker, the way a real translation sometimes merges segments
+            markers = [i for i, line in enumerate(lines) if MARKER_LINE.match(line)]
+            if markers:
+                del lines[random.choice(markers)]
+        # Google returns one segment per sentence, each with its trailing newline
+        segments = [[line + "\n" if i < len(lines) - 1 else line, None, None, None, 10]
+                    for i, line in enumerate(lines)]
+        return [segments, None, "en"]
+
+    def create_server(self, host='127.0.0.1', port=0):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real endpoints
+
+            def _send(self, status, body, content_type='text/plain; charset=UTF-8', headers=None):
+                data = body.encode('utf-8') if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _json(self, value):
+                self._send(200, json.dumps(value, ensure_ascii=False), 'application/json; charset=UTF-8')
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                endpoint = url.path.strip('/')
+
+                if endpoint == 'translate_a/single':
+                    if mock.over_rate_limit():
+                        mock.record(endpoint, 429)
+                        self._send(429, 'Too Many Requests', headers={'Retry-After': '1'})
+                        return
+                    if mock.latency:
+                        time.sleep(random.uniform(*mock.latency))
+                    if mock.error_rate and random.random() < mock.error_rate:
+                        mock.record(endpoint, 500)
+                        self._send(500, 'Injected failure')
+                        return
+                    mock.record(endpoint, 200)
+                    self._json(mock.translate(params.get('q', ''), params.get('tl', 'xx')))
+                elif endpoint == 'language/en':
+                    mock.record(endpoint, 200)
+                    self._json(mock.english)
+                elif endpoint == 'language/version':
+                    mock.record(endpoint, 200)
+                    self._json({"version": mock.version})
+                else:
+                    mock.record(endpoint, 404)
+                    self._send(404, 'Not Found')
+
+            def log_message(self, format, *args):
+                pass
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock translation and language API server')
+    parser.add_argument('--port', type=int, default=8090, help='Port to listen on')
+    parser.add_argument('--strings', type=int, default=1500, help='Strings in the generated English document')
+    parser.add_argument('--minLatency', type=float, default=0.05, help='Minimum translate latency in seconds')
+    parser.add_argument('--maxLatency', type=float, default=0.2, help='Maximum translate latency in seconds')
+    parser.add_argument('--rateLimit', type=int, default=None, help='Translate requests per second before 429s')
+    parser.add_argument('--errorRate', type=float, default=0.0, help='Probability of an injected HTTP 500')
+    parser.add_argument('--markerLossRate', type=float, default=0.0, help='Probability of dropping a segment marker')
+    args = parser.parse_args()
+
+    mock = MockTranslation(generate_english(args.strings), latency=(args.minLatency, args.maxLatency),
+                           rate_limit=args.rateLimit, error_rate=args.errorRate,
+                           marker_loss_rate=args.markerLossRate)
+    server = mock.create_server(port=args.port)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Mock translation server listening on {base}")
+    print(f"  TRANSLATE_URL = {base}/translate_a/single")
+    print(f"  LANGUAGE_API_URL = {base}/language")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requests served: {json.dumps(mock.requests, indent=2)}")
+        print(f"Responses by status: {json.dumps(mock.responses, indent=2)}")
+
+if __name__ == "__main__":
+    main()
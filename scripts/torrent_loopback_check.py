@@ -0,0 +1,124 @@
+# This script checks the embedded libtorrent engine of the Torrent Handler entirely on loopback.
+# It starts a local HTTP tracker, seeds a random payload from one LibtorrentEngine session and
+# downloads it with a second session, then verifies the downloaded bytes.
+
+import hashlib
+import os
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'binaries', 'AscendaraTorrentHandler', 'src'))
+
+import libtorrent as lt
+from AscendaraTorrentHandler import LibtorrentEngine
+
+PAYLOAD_SIZE = 16 * 1024 * 1024
+TIMEOUT = 120
+
+class TrackerHandler(BaseHTTPRequestHandler):
+    """Minimal announce-only tracker returning compact peer lists"""
+    peers = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/announce':
+            self.send_error(404)
+            return
+        query = parse_qs(url.query, encoding='latin-1')
+        info_hash = query['info_hash'][0]
+        port = int(query['port'][0])
+        with self.lock:
+            swarm = self.peers.setdefault(info_hash, set())
+            swarm.add((self.client_address[0], port))
+            compact = b''.join(socket.inet_aton(ip) + struct.pack('>H', p) for ip, p in swarm)
+        body = lt.bencode({'interval': 5, 'peers': compact})
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def create_payload(seed_dir):
+    payload_path = os.path.join(seed_dir, 'payload.bin')
+    with open(payload_path, 'wb') as f:
+        f.write(os.urandom(PAYLOAD_SIZE))
+    with open(payload_path, 'rb') as f:
+        return payload_path, hashlib.sha256(f.read()).hexdigest()
+
+def create_torrent(payload_path, tracker_url, torrent_path):
+    storage = lt.file_storage()
+    lt.add_files(storage, payload_path)
+    torrent = lt.create_torrent(storage)
+    torrent.add_tracker(tracker_url)
+    lt.set_piece_hashes(torrent, os.path.dirname(payload_path))
+    with open(torrent_path, 'wb') as f:
+        f.write(lt.bencode(torrent.generate()))
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix='ascendara_loopback_')
+    tracker = ThreadingHTTPServer(('127.0.0.1', 0), TrackerHandler)
+    threading.Thread(target=tracker.serve_forever, daemon=True).start()
+    tracker_url = f"http://127.0.0.1:{tracker.server_address[1]}/announce"
+
+    try:
+        seed_dir = os.path.join(work_dir, 'seed')
+        leech_dir = os.path.join(work_dir, 'leech')
+        os.makedirs(seed_dir)
+        os.makedirs(leech_dir)
+
+        payload_path, expected_hash = create_payload(seed_dir)
+        torrent_path = os.path.join(work_dir, 'payload.torrent')
+        create_torrent(payload_path, tracker_url, torrent_path)
+
+        seeder = LibtorrentEngine(state_dir=os.path.join(work_dir, 'seed_state'),
+                                  listen_interfaces='127.0.0.1:0', local_only=True)
+        leecher = LibtorrentEngine(state_dir=os.path.join(work_dir, 'leech_state'),
+                                   listen_interfaces='127.0.0.1:0', local_only=True)
+        seeder.connect(seed_dir)
+        leecher.connect(leech_dir)
+
+        seeder.add(torrent_path, seed_dir)
+        torrent_hash = leecher.add(torrent_path, leech_dir)
+
+        start = time.time()
+        while True:
+            seeder.wait(0.1)
+            status = leecher.status(torrent_hash)
+            if status["is_complete"]:
+                break
+            if time.time() - start > TIMEOUT:
+                print(f"FAILED: timed out at {status['progress'] * 100:.1f}%")
+                sys.exit(1)
+            leecher.wait(0.5)
+        elapsed = time.time() - start
+
+        leecher.finish(torrent_hash)
+        with open(os.path.join(leech_dir, 'payload.bin'), 'rb') as f:
+            actual_hash = hashlib.sha256(f.read()).hexdigest()
+        if actual_hash != expected_hash:
+            print("FAILED: downloaded payload does not match the seed")
+            sys.exit(1)
+
+        if not os.path.exists(os.path.join(leecher.state_dir, 'session.state')):
+            print("FAILED: session state was not persisted")
+            sys.exit(1)
+
+        print(f"OK: {PAYLOAD_SIZE / (1024 * 1024):.0f} MB transferred over loopback in {elapsed:.2f}s "
+              f"({PAYLOAD_SIZE / (1024 * 1024) / max(elapsed, 1e-6):.2f} MB/s)")
+    finally:
+        tracker.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
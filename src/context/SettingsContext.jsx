@@ -19,6 +19,13 @@ export function SettingsProvider({ children }) {
     language: "en",
     theme: "purple",
     threadCount: 4,
+    gamingMode: true,
+    gamingModeSpeedLimit: 1024,
+    gameTelemetry: false,
+    gameTelemetryInterval: 2,
+    gameWarmup: false,
+    gameWarmupBudget: 512,
+    gamePriorityBoost: false,
     sideScrollBar: false,
     crackDirectory: "",
   });